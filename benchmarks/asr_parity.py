@@ -0,0 +1,103 @@
+"""
+Cek paritas WER backend ASR (int8 / ctranslate2) terhadap backend transformers fp32 pada fixture audio lokal.
+
+Transkrip fp32 dipakai sebagai referensi; jika ada benchmarks/fixtures/audio/transcripts.json
+({"nama_file.mp3": "transkrip manual"}), WER terhadap transkrip manual juga dilaporkan untuk kedua backend.
+Exit code 1 jika WER rata-rata kandidat vs fp32 melebihi --max-wer.
+
+Contoh:
+    python -m benchmarks.asr_parity --backend int8
+    python -m benchmarks.asr_parity --backend ctranslate2 --max-wer 0.15
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import jiwer
+
+from benchmarks import fixtures
+from benchmarks.e2e import RESULTS_DIR
+from core.asr import get_asr_backend, load_audio_16k, BACKENDS, SAMPLE_RATE
+
+TRANSCRIPTS_PATH = os.path.join(fixtures.FIXTURE_DIR, "audio", "transcripts.json")
+
+
+def normalize_text(text: str) -> list:
+    return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+
+def wer(reference: str, hypothesis: str) -> float:
+    """Word error rate (jiwer) setelah normalisasi huruf kecil dan tanda baca."""
+    ref, hyp = normalize_text(reference), normalize_text(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    return jiwer.wer(" ".join(ref), " ".join(hyp))
+
+
+def transcribe_all(backend_name: str, audios: dict) -> dict:
+    backend = get_asr_backend(backend_name)
+    results = {}
+    for name, audio in audios.items():
+        t0 = time.perf_counter()
+        text = backend.transcribe(audio)
+        elapsed = time.perf_counter() - t0
+        results[name] = {"text": text.strip(), "seconds": round(elapsed, 3),
+                         "rtf": round(elapsed / (len(audio) / SAMPLE_RATE), 4)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek paritas WER backend ASR terhadap fp32")
+    parser.add_argument("--backend", default="int8", choices=[b for b in BACKENDS if b != "transformers"])
+    parser.add_argument("--max-wer", type=float, default=0.1)
+    args = parser.parse_args()
+
+    paths = fixtures.audio_fixtures()
+    if not paths:
+        print("Tidak ada fixture audio", file=sys.stderr)
+        sys.exit(1)
+    audios = {os.path.basename(p): load_audio_16k(p) for p in paths}
+    manual = {}
+    if os.path.exists(TRANSCRIPTS_PATH):
+        with open(TRANSCRIPTS_PATH, "r", encoding="utf-8") as f:
+            manual = json.load(f)
+
+    reference = transcribe_all("transformers", audios)
+    candidate = transcribe_all(args.backend, audios)
+
+    files = {}
+    for name in audios:
+        row = {
+            "fp32": reference[name],
+            args.backend: candidate[name],
+            "wer_vs_fp32": round(wer(reference[name]["text"], candidate[name]["text"]), 4),
+        }
+        if name in manual:
+            row["wer_fp32_vs_manual"] = round(wer(manual[name], reference[name]["text"]), 4)
+            row["wer_candidate_vs_manual"] = round(wer(manual[name], candidate[name]["text"]), 4)
+        files[name] = row
+
+    mean_wer = sum(r["wer_vs_fp32"] for r in files.values()) / len(files)
+    report = {
+        "backend": args.backend,
+        "mean_wer_vs_fp32": round(mean_wer, 4),
+        "fp32_total_s": round(sum(r["seconds"] for r in reference.values()), 3),
+        "candidate_total_s": round(sum(r["seconds"] for r in candidate.values()), 3),
+        "files": files,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"asr_parity_{args.backend}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Hasil disimpan di {out_path}")
+
+    if mean_wer > args.max_wer:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
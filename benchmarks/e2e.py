@@ -0,0 +1,358 @@
+"""
+Benchmark end-to-end semua endpoint main.py dengan mock Gemini/HF lokal.
+
+Contoh:
+    python -m benchmarks.e2e --concurrency 1,4,16 --requests 50 --latency-ms 800
+    python -m benchmarks.e2e --endpoints rekomendasi_rumah_sakit,bisabot --baseline benchmarks/results/baseline.json
+
+Server aplikasi dijalankan sebagai subprocess uvicorn (kecuali --base-url diberikan) dengan environment
+yang mengarahkan semua panggilan LLM ke mock. Hasil ditulis ke JSON agar bisa dibandingkan antar-deploy;
+jika --baseline diberikan dan p95 memburuk lebih dari --max-regression, proses keluar dengan kode 1.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import argparse
+import platform
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+from benchmarks import fixtures
+from benchmarks.mock_llm import start_mock_server, mock_env
+
+RESULTS_DIR = os.path.join(fixtures.ROOT, "benchmarks", "results")
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    pos = (len(sorted_values) - 1) * q
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+def summarize(latencies: list, errors: int, wall_time: float) -> dict:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        "requests": count,
+        "errors": errors,
+        "error_rate": round(errors / count, 4) if count else 0.0,
+        "mean_ms": round(1000 * sum(values) / count, 2) if count else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 2),
+        "p95_ms": round(1000 * percentile(values, 0.95), 2),
+        "p99_ms": round(1000 * percentile(values, 0.99), 2),
+        "max_ms": round(1000 * values[-1], 2) if values else 0.0,
+        "throughput_rps": round(count / wall_time, 3) if wall_time > 0 else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Skenario: nama -> (method, path, builder(rng, i, state) -> kwargs requests); method "WS" untuk WebSocket
+# ---------------------------------------------------------------------------
+
+def _audio_file():
+    paths = fixtures.audio_fixtures()
+    if not paths:
+        return None
+    path = paths[0]
+    with open(path, "rb") as f:
+        return os.path.basename(path), f.read()
+
+
+def _klaim_form() -> dict:
+    return {"nomor_polis": "1234567890", "jenis_layanan": "rawat inap", "nomor_hp": "081234567890",
+            "input_keluhan": fixtures.KELUHAN_SAMPLES[0], "diagnosis_text": fixtures.DIAGNOSIS_TEXT}
+
+
+def _klaim_files(ktp: bytes, polis: bytes, diagnosis: bytes) -> dict:
+    return {"foto_ktp": ("ktp.png", ktp, "image/png"), "foto_polis": ("polis.png", polis, "image/png"),
+            "foto_diagnosis": ("diagnosis.png", diagnosis, "image/png")}
+
+
+def build_scenarios(state: dict) -> dict:
+    audio = _audio_file()
+    ktp, polis = fixtures.image_fixture("ktp"), fixtures.image_fixture("polis")
+    slip, diagnosis = fixtures.image_fixture("slip"), fixtures.image_fixture("diagnosis")
+
+    scenarios = {
+        "root": ("GET", "/", lambda rng, i: {}),
+        "metrics": ("GET", "/metrics", lambda rng, i: {}),
+        "bisabot": ("POST", "/bisabot", lambda rng, i: {
+            "json": {"question": f"Apakah {rng.choice(['rawat inap', 'operasi', 'rawat jalan'])} ditanggung polis?"}}),
+        "bisabot_history": ("GET", "/bisabot/history", lambda rng, i: {}),
+        "surat_aju_banding": ("POST", "/surat_aju_banding", lambda rng, i: {"json": fixtures.surat_payload(i)}),
+        "surat_aju_banding_stream": ("POST", "/surat_aju_banding", lambda rng, i: {
+            "json": fixtures.surat_payload(i), "params": {"mode": "stream"}}),
+        "surat_aju_banding_batch": ("POST", "/surat_aju_banding/batch", lambda rng, i: {
+            "json": {"surat": [fixtures.surat_payload(i * 20 + k) for k in range(20)], "format": "zip"}}),
+        "download": ("GET", None, lambda rng, i: {"path": state.get("download_url")}),
+        "rekomendasi_rumah_sakit": ("POST", "/rekomendasi_rumah_sakit", lambda rng, i: {
+            "json": fixtures.hospital_payload(rng)}),
+        "rekomendasi_asuransi": ("POST", "/rekomendasi_asuransi", lambda rng, i: {
+            "json": {"query": fixtures.random_keluhan(rng), "top_n": 5}}),
+        "rekomendasi_rumah_sakit_batch": ("POST", "/rekomendasi_rumah_sakit/batch", lambda rng, i: {
+            "json": {"queries": [fixtures.hospital_payload(rng) for _ in range(100)]}}),
+        "rekomendasi_asuransi_batch": ("POST", "/rekomendasi_asuransi/batch", lambda rng, i: {
+            "json": {"queries": [{"query": fixtures.random_keluhan(rng), "top_n": 5} for _ in range(100)]}}),
+        "isi_data": ("POST", "/isi_data", lambda rng, i: {
+            "files": {"foto_ktp": ("ktp.png", ktp, "image/png"), "foto_polis": ("polis.png", polis, "image/png")},
+            "data": {"nomor_polis": "1234567890", "jenis_layanan": "rawat inap",
+                     "nomor_hp": "081234567890", "input_keluhan": fixtures.random_keluhan(rng)}}),
+        "bantu_proses_ai": ("POST", "/bantu_proses_ai", lambda rng, i: {"json": fixtures.isi_data_payload()}),
+        "slip_rumah_sakit": ("POST", "/slip_rumah_sakit", lambda rng, i: {
+            "files": {"foto_slip": ("slip.png", slip, "image/png")}}),
+        "get_slip": ("GET", None, lambda rng, i: {"path": f"/slip_rumah_sakit/{state.get('slip_id')}"}),
+        "keluhan_text": ("POST", "/keluhanmu_bisa_diklaim", lambda rng, i: {
+            "data": {"keluhan_text": fixtures.random_keluhan(rng), "metode_input": "text"}}),
+        "get_keluhan": ("GET", None, lambda rng, i: {"path": f"/keluhanmu_bisa_diklaim/{state.get('keluhan_id')}"}),
+        "hasil_diagnosis_text": ("POST", "/hasil_diagnosis_dokter", lambda rng, i: {
+            "data": {"diagnosis_text": fixtures.DIAGNOSIS_TEXT}}),
+        "hasil_diagnosis_foto": ("POST", "/hasil_diagnosis_dokter", lambda rng, i: {
+            "files": {"foto_diagnosis": ("diagnosis.png", diagnosis, "image/png")}}),
+        "tanggungan_ai": ("POST", "/tanggungan_ai", lambda rng, i: {"json": {
+            "isi_data": fixtures.isi_data_payload(),
+            "hasil_diagnosis": {"diagnosis_text": {"jenis": "text", "hasil": fixtures.DIAGNOSIS_TEXT}}}}),
+        "scan_data_slip_foto": ("POST", "/scan_data_slip", lambda rng, i: {
+            "files": {"foto_slip": ("slip.png", slip, "image/png")}}),
+        # ?mode=async hanya mengukur waktu submit; pemrosesan diukur lewat skenario sync di atas
+        "keluhan_text_async": ("POST", "/keluhanmu_bisa_diklaim", lambda rng, i: {
+            "data": {"keluhan_text": fixtures.random_keluhan(rng), "metode_input": "text"}, "params": {"mode": "async"}}),
+        "tanggungan_ai_async": ("POST", "/tanggungan_ai", lambda rng, i: {"params": {"mode": "async"}, "json": {
+            "isi_data": fixtures.isi_data_payload(),
+            "hasil_diagnosis": {"diagnosis_text": {"jenis": "text", "hasil": fixtures.DIAGNOSIS_TEXT}}}}),
+        "job_status": ("GET", None, lambda rng, i: {"path": f"/jobs/{state.get('job_id')}"}),
+        "klaim": ("POST", "/klaim", lambda rng, i: {
+            "params": {"mode": "sync"}, "files": _klaim_files(ktp, polis, diagnosis),
+            "data": {**_klaim_form(), "input_keluhan": fixtures.random_keluhan(rng)}}),
+        # Kirim ulang klaim yang sama: semua tahap berstatus cached, mengukur overhead memo
+        "klaim_resubmit": ("POST", "/klaim", lambda rng, i: {
+            "params": {"mode": "sync"}, "files": _klaim_files(ktp, polis, diagnosis),
+            "data": {**_klaim_form(), "claim_id": state.get("claim_id"), "claim_token": state.get("claim_token")}}),
+        "get_klaim": ("GET", None, lambda rng, i: {
+            "path": f"/klaim/{state.get('claim_id')}", "headers": {"X-Claim-Token": state.get("claim_token") or ""}}),
+    }
+    if audio is not None:
+        name, content = audio
+        scenarios.update({
+            "keluhan_voice": ("POST", "/keluhanmu_bisa_diklaim", lambda rng, i: {
+                "data": {"metode_input": "voice"}, "files": {"audio_file": (name, content, "audio/mpeg")}}),
+            "hasil_diagnosis_audio": ("POST", "/hasil_diagnosis_dokter", lambda rng, i: {
+                "files": {"diagnosis_audio": (name, content, "audio/mpeg")}}),
+            "scan_data_slip_audio": ("POST", "/scan_data_slip", lambda rng, i: {
+                "files": {"audio_slip": (name, content, "audio/mpeg")}}),
+            # Audio dikirim per 16 KB seperti frame MediaRecorder; latensi diukur sampai event "result"
+            "keluhan_ws": ("WS", "/ws/keluhanmu_bisa_diklaim?format=mp3", lambda rng, i: {
+                "frames": [content[k:k + 16384] for k in range(0, len(content), 16384)]}),
+        })
+    return scenarios
+
+
+def prepare_state(base_url: str) -> dict:
+    """Buat resource yang dibutuhkan endpoint GET (slip_id, keluhan_id, download_url, job_id, claim_id)."""
+    state = {}
+    try:
+        r = requests.post(f"{base_url}/surat_aju_banding", json=fixtures.surat_payload(), timeout=120)
+        state["download_url"] = r.json().get("download_url")
+        r = requests.post(f"{base_url}/slip_rumah_sakit",
+                          files={"foto_slip": ("slip.png", fixtures.image_fixture("slip"), "image/png")}, timeout=120)
+        state["slip_id"] = r.json().get("slip_id")
+        r = requests.post(f"{base_url}/keluhanmu_bisa_diklaim",
+                          data={"keluhan_text": fixtures.KELUHAN_SAMPLES[0], "metode_input": "text"}, timeout=120)
+        state["keluhan_id"] = r.json().get("keluhan_id")
+        r = requests.post(f"{base_url}/keluhanmu_bisa_diklaim", params={"mode": "async"},
+                          data={"keluhan_text": fixtures.KELUHAN_SAMPLES[0], "metode_input": "text"}, timeout=120)
+        state["job_id"] = r.json().get("job_id")
+        r = requests.post(f"{base_url}/klaim", params={"mode": "sync"}, data=_klaim_form(), timeout=300,
+                          files=_klaim_files(*(fixtures.image_fixture(name) for name in ("ktp", "polis", "diagnosis"))))
+        state["claim_id"], state["claim_token"] = r.json().get("claim_id"), r.json().get("claim_token")
+    except Exception as e:
+        print(f"[warn] Gagal menyiapkan state benchmark: {e}", file=sys.stderr)
+    return state
+
+
+def run_websocket(url: str, frames: list, timeout: float) -> bool:
+    """Kirim frame audio ke endpoint WebSocket streaming lalu tunggu event "result"; True jika berhasil."""
+    from websockets.exceptions import WebSocketException
+    from websockets.sync.client import connect
+    try:
+        with connect("ws" + url[len("http"):], open_timeout=timeout) as ws:
+            for frame in frames:
+                ws.send(frame)
+            ws.send(json.dumps({"event": "end"}))
+            while True:
+                event = json.loads(ws.recv(timeout=timeout)).get("event")
+                if event in ("result", "error"):
+                    return event == "result"
+    except WebSocketException:
+        return False
+
+
+def run_scenario(base_url: str, scenario, concurrency: int, total: int, timeout: float, seed: int) -> dict:
+    method, path, builder = scenario
+    local = threading.local()
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def one(i: int):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        kwargs = builder(random.Random(seed + i), i)
+        url = base_url + (kwargs.pop("path", None) or path)
+        start = time.perf_counter()
+        try:
+            if method == "WS":
+                ok = run_websocket(url, kwargs["frames"], timeout)
+            else:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+                ok = response.status_code < 400
+        except (requests.RequestException, OSError, TimeoutError, ValueError):
+            ok = False
+        elapsed = time.perf_counter() - start
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors[0] += 1
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    return summarize(latencies, errors[0], time.perf_counter() - wall_start)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_app(env: dict, workers: int, startup_timeout: float):
+    port = _free_port()
+    cmd = [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    process = subprocess.Popen(cmd, cwd=fixtures.ROOT, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server aplikasi berhenti saat startup (exit code {process.returncode})")
+        try:
+            if requests.get(f"{base_url}/", timeout=2).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(1)
+    process.terminate()
+    raise RuntimeError("Server aplikasi tidak siap dalam batas waktu startup")
+
+
+def compare_with_baseline(results: list, baseline_path: str, max_regression: float) -> list:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    reference = {(r["scenario"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        ref = reference.get((r["scenario"], r["concurrency"]))
+        if not ref or not ref.get("p95_ms"):
+            continue
+        ratio = r["p95_ms"] / ref["p95_ms"] - 1
+        if ratio > max_regression or r["error_rate"] > ref.get("error_rate", 0) + 0.01:
+            regressions.append({
+                "scenario": r["scenario"], "concurrency": r["concurrency"],
+                "p95_ms": r["p95_ms"], "baseline_p95_ms": ref["p95_ms"], "change": round(ratio, 3),
+                "error_rate": r["error_rate"], "baseline_error_rate": ref.get("error_rate", 0),
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end endpoint BISAcare")
+    parser.add_argument("--concurrency", default="1,4,16", help="Daftar level konkurensi, dipisah koma")
+    parser.add_argument("--requests", type=int, default=30, help="Jumlah request per skenario per level")
+    parser.add_argument("--endpoints", default="", help="Filter nama skenario, dipisah koma (default: semua)")
+    parser.add_argument("--latency-ms", type=float, default=500.0, help="Latency mock LLM")
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0, help="Simulasi kecepatan generate token (0 = off)")
+    parser.add_argument("--workers", type=int, default=1, help="Jumlah worker uvicorn")
+    parser.add_argument("--base-url", default="", help="Pakai server yang sudah berjalan (lewati spawn uvicorn)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--startup-timeout", type=float, default=900.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="", help="Path file JSON hasil (default: benchmarks/results/e2e_<waktu>.json)")
+    parser.add_argument("--baseline", default="", help="File JSON hasil sebelumnya untuk deteksi regresi")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Batas kenaikan p95 relatif (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    mock_server, mock_url = start_mock_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                              tokens_per_s=args.tokens_per_s)
+    app_process = None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+        else:
+            env = mock_env(mock_url)
+            env["RESULT_STORE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_store.db')}"
+            app_process, base_url = start_app(env, args.workers, args.startup_timeout)
+
+        state = prepare_state(base_url)
+        scenarios = build_scenarios(state)
+        selected = [s.strip() for s in args.endpoints.split(",") if s.strip()] or list(scenarios)
+        levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+
+        results = []
+        for name in selected:
+            if name not in scenarios:
+                print(f"[warn] Skenario tidak dikenal: {name}", file=sys.stderr)
+                continue
+            for concurrency in levels:
+                total = max(args.requests, concurrency)
+                summary = run_scenario(base_url, scenarios[name], concurrency, total, args.timeout, args.seed)
+                results.append({"scenario": name, "concurrency": concurrency, **summary})
+                print(f"{name:28s} c={concurrency:<3d} p50={summary['p50_ms']:>9.1f}ms "
+                      f"p95={summary['p95_ms']:>9.1f}ms p99={summary['p99_ms']:>9.1f}ms "
+                      f"rps={summary['throughput_rps']:>7.2f} err={summary['errors']}")
+    finally:
+        if app_process is not None:
+            app_process.terminate()
+            app_process.wait(timeout=30)
+        mock_server.shutdown()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "workers": args.workers,
+            "mock_latency_ms": args.latency_ms,
+            "mock_jitter_ms": args.jitter_ms,
+            "requests_per_level": args.requests,
+            "concurrency": levels,
+        },
+        "results": results,
+    }
+    if args.baseline:
+        report["regressions"] = compare_with_baseline(results, args.baseline, args.max_regression)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"e2e_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Hasil disimpan ke {output}")
+
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"[REGRESI] {r['scenario']} c={r['concurrency']}: p95 {r['baseline_p95_ms']}ms -> {r['p95_ms']}ms",
+                  file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
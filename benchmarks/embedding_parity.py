@@ -0,0 +1,139 @@
+"""
+Cek paritas akurasi backend embedding (int8 / onnx / onnx-int8) terhadap fp32 pada index yang sudah ada:
+- cosine antara embedding backend kandidat dan encode fp32 dengan metode yang sama (per dokumen), plus
+  terhadap vektor yang tersimpan di index sebagai informasi (index_stale jika index dibangun dengan encoding lama),
+- overlap top-k hasil index.search untuk query fp32 vs query backend kandidat,
+- waktu encode per teks untuk kedua backend.
+
+Exit code 1 jika cosine rata-rata atau overlap top-k di bawah ambang.
+
+Contoh:
+    python -m benchmarks.embedding_parity --backend int8 --corpus asuransi,rag
+    python -m benchmarks.embedding_parity --backend onnx-int8 --min-cosine 0.98 --min-overlap 0.9
+"""
+import os
+import sys
+import json
+import time
+import pickle
+import argparse
+import numpy as np
+
+from benchmarks import fixtures
+from benchmarks.e2e import RESULTS_DIR
+from benchmarks.retrieval import (HOSPITAL_MODEL_PATH, ASURANSI_MODEL_PATH, ASURANSI_DATA_PATH, ASURANSI_INDEX_PATH,
+                                  asuransi_labeled_queries)
+from core.embeddings import load_sentence_model, BACKENDS
+from daftar_rumah_sakit.preprocessing import preprocessing_id
+from daftar_rumah_sakit.data_processing import normalize, load_json, load_faiss_index
+
+HOSPITAL_DATA_PATH = os.path.join(fixtures.ROOT, "daftar_rumah_sakit", "preprocessed", "daftar_rumah_sakit_all.json")
+HOSPITAL_INDEX_PATH = os.path.join(fixtures.ROOT, "daftar_rumah_sakit", "app", "embeddings", "hospital_st.index")
+RAG_INDEX_DIR = os.path.join(fixtures.ROOT, "rag", "index")
+RAG_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def load_corpus(name: str, limit: int, queries: int, seed: int):
+    """Kembalikan (model_path, index, teks dokumen yang sudah dipreproses, teks query) atau None jika index belum ada."""
+    if name == "hospital":
+        if not os.path.exists(HOSPITAL_INDEX_PATH) or not os.path.exists(HOSPITAL_DATA_PATH):
+            return None
+        data = load_json(HOSPITAL_DATA_PATH)[:limit]
+        texts = [preprocessing_id(d["text"]) for d in data]
+        query_texts = [preprocessing_id(d.get("alamat", "") + " " + d.get("nama_rumah_sakit", "")) for d in data[:queries]]
+        return HOSPITAL_MODEL_PATH, load_faiss_index(HOSPITAL_INDEX_PATH), texts, query_texts
+    if name == "asuransi":
+        data = load_json(ASURANSI_DATA_PATH)[:limit]
+        query_texts = [preprocessing_id(q["query"]) for q in asuransi_labeled_queries(queries, seed)]
+        return ASURANSI_MODEL_PATH, load_faiss_index(ASURANSI_INDEX_PATH), [d["text"] for d in data], query_texts
+    if name == "rag":
+        index_file = os.path.join(RAG_INDEX_DIR, "faiss_index.bin")
+        metadata_file = os.path.join(RAG_INDEX_DIR, "metadata.pkl")
+        if not os.path.exists(index_file) or not os.path.exists(metadata_file):
+            return None
+        with open(metadata_file, "rb") as f:
+            documents = pickle.load(f)["documents"]
+        texts = [d.page_content.strip() for d in documents[:limit]]
+        query_texts = [t.replace("\n", " ")[:200] for t in texts[:queries]]
+        return RAG_MODEL, load_faiss_index(index_file), texts, query_texts
+    raise ValueError(f"Korpus tidak dikenali: {name}")
+
+
+def encode(model, texts: list) -> tuple:
+    t0 = time.perf_counter()
+    emb = normalize(model.encode(texts, batch_size=32, show_progress_bar=False)).astype("float32")
+    return emb, (time.perf_counter() - t0) / max(1, len(texts))
+
+
+def topk_overlap(a: np.ndarray, b: np.ndarray, k: int) -> float:
+    return float(np.mean([len(set(x[:k]) & set(y[:k])) / k for x, y in zip(a, b)]))
+
+
+def check_corpus(name: str, backend: str, args) -> dict:
+    loaded = load_corpus(name, args.limit, args.queries, args.seed)
+    if loaded is None:
+        return {"skipped": "index belum ada"}
+    model_path, index, texts, query_texts = loaded
+    reference = load_sentence_model(model_path, backend="torch")
+    candidate = load_sentence_model(model_path, backend=backend)
+
+    stored = index.reconstruct_n(0, len(texts))
+    fp32_docs, fp32_ms = encode(reference, texts)
+    cand_docs, cand_ms = encode(candidate, texts)
+    cos_stored = np.sum(cand_docs * stored, axis=1)
+    cos_fp32 = np.sum(cand_docs * fp32_docs, axis=1)
+
+    k = min(args.k, index.ntotal)
+    fp32_queries, _ = encode(reference, query_texts)
+    cand_queries, _ = encode(candidate, query_texts)
+    _, I_ref = index.search(fp32_queries, k)
+    _, I_cand = index.search(cand_queries, k)
+
+    return {
+        "documents": len(texts),
+        "queries": len(query_texts),
+        # Sanity: model fp32 saat ini harus identik dengan vektor di index; jauh di bawah 1 berarti index
+        # dibangun dengan encoding lama (misal asuransi sebelum chunking) dan perlu dibangun ulang
+        "fp32_vs_index_mean_cosine": round(float(np.mean(np.sum(fp32_docs * stored, axis=1))), 5),
+        "index_stale": bool(np.mean(np.sum(fp32_docs * stored, axis=1)) < 0.999),
+        "mean_cosine_vs_index": round(float(np.mean(cos_stored)), 5),
+        "min_cosine_vs_index": round(float(np.min(cos_stored)), 5),
+        "mean_cosine_vs_fp32": round(float(np.mean(cos_fp32)), 5),
+        f"top{k}_overlap": round(topk_overlap(I_ref, I_cand, k), 4),
+        "top1_agreement": round(float(np.mean(I_ref[:, 0] == I_cand[:, 0])), 4),
+        "fp32_encode_ms_per_text": round(1000 * fp32_ms, 3),
+        "candidate_encode_ms_per_text": round(1000 * cand_ms, 3),
+        # Dibandingkan dengan encode fp32 yang sama (bukan vektor tersimpan) agar index lama tidak membuat gagal palsu
+        "passed": bool(np.mean(cos_fp32) >= args.min_cosine and topk_overlap(I_ref, I_cand, k) >= args.min_overlap),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek paritas akurasi backend embedding terhadap fp32")
+    parser.add_argument("--backend", default="int8", choices=[b for b in BACKENDS if b != "torch"])
+    parser.add_argument("--corpus", default="hospital,asuransi,rag")
+    parser.add_argument("--limit", type=int, default=500, help="Jumlah dokumen index yang dicek")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--min-overlap", type=float, default=0.9)
+    args = parser.parse_args()
+
+    report = {"backend": args.backend, "corpora": {}}
+    for name in [c.strip() for c in args.corpus.split(",") if c.strip()]:
+        report["corpora"][name] = check_corpus(name, args.backend, args)
+        print(name, json.dumps(report["corpora"][name], indent=2))
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    out_path = os.path.join(RESULTS_DIR, f"embedding_parity_{args.backend}_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Hasil disimpan di {out_path}")
+
+    if not all(r.get("passed", True) for r in report["corpora"].values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Fixture untuk benchmark: audio, PDF, dan gambar dari repo.
+Repo belum menyimpan foto KTP/polis/slip, jadi gambar dokumen dibuat sekali (teks dirender ke PNG)
+dan disimpan di benchmarks/fixtures/ supaya OCR tetap mendapat input yang realistis.
+"""
+import os
+import glob
+import random
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURE_DIR = os.path.join(ROOT, "benchmarks", "fixtures")
+
+KTP_TEXT = """PROVINSI JAWA BARAT
+KOTA BANDUNG
+NIK : 3273010101900001
+Nama : BUDI SANTOSO
+Tempat/Tgl Lahir : BANDUNG, 01-01-1990
+Alamat : JL. MERDEKA NO. 10
+RT/RW : 001/002
+Kel/Desa : SUKAMAJU
+Kecamatan : CIBEUNYING"""
+
+POLIS_TEXT = """POLIS ASURANSI KESEHATAN
+AXA MANDIRI KESEHATAN PRIMA
+Nomor Polis : 1234567890
+Tertanggung : BUDI SANTOSO
+Masa Berlaku : 01-01-2025 s/d 31-12-2025
+Manfaat Rawat Inap : Rp 1.000.000 / hari"""
+
+SLIP_TEXT = """RUMAH SAKIT UMUM BANDUNG
+SLIP PELAYANAN
+Jenis Layanan : Rawat Jalan
+Deskripsi : Konsultasi Dokter Umum
+Status Pertanggungan : Ditanggung
+Limit Maksimum : Rp 5.000.000
+Sisa Kuota : Rp 3.500.000
+Estimasi Biaya Keluar : Rp 0"""
+
+DIAGNOSIS_TEXT = """SURAT KETERANGAN DOKTER
+Diagnosis : Demam Berdarah Dengue (A90)
+Tindakan : Rawat inap 3 hari, observasi trombosit
+Dokter : dr. Sari Wulandari"""
+
+KELUHAN_SAMPLES = [
+    "Saya demam tinggi tiga hari disertai sakit kepala dan mual",
+    "Batuk berdahak lebih dari seminggu dan sesak napas di malam hari",
+    "Nyeri perut bagian kanan bawah sejak kemarin",
+    "Diare dan muntah setelah makan di luar",
+    "Nyeri dada saat naik tangga dan mudah lelah",
+]
+
+PROVINSI_SAMPLES = ["Jawa Barat", "DKI Jakarta", "Jawa Timur", "Bali", "Sumatera Utara"]
+
+KTP_POLIS_SAMPLE = {
+    "ktp": {"nama": "Budi Santoso", "kelurahan_desa": "Sukamaju", "kecamatan": "Cibeunying",
+            "nama_provinsi": "Jawa Barat", "nama_daerah": "Bandung"},
+    "polis": {"nama_asuransi": "AXA Mandiri"},
+}
+
+
+def _render_text_png(text: str, path: str):
+    from PIL import Image, ImageDraw, ImageFont
+    try:
+        font = ImageFont.truetype("DejaVuSans.ttf", 28)
+    except OSError:
+        font = ImageFont.load_default()
+    lines = text.splitlines()
+    image = Image.new("L", (1200, 60 + 44 * len(lines)), color=255)
+    draw = ImageDraw.Draw(image)
+    for i, line in enumerate(lines):
+        draw.text((40, 30 + 44 * i), line, fill=0, font=font)
+    image.save(path)
+
+
+def image_fixture(name: str) -> bytes:
+    """Bytes PNG untuk 'ktp', 'polis', 'slip', atau 'diagnosis' (dibuat sekali lalu dipakai ulang)."""
+    texts = {"ktp": KTP_TEXT, "polis": POLIS_TEXT, "slip": SLIP_TEXT, "diagnosis": DIAGNOSIS_TEXT}
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    path = os.path.join(FIXTURE_DIR, f"{name}.png")
+    if not os.path.exists(path):
+        _render_text_png(texts[name], path)
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def audio_fixtures() -> list:
+    """Semua file audio di root repo dan benchmarks/fixtures/audio."""
+    paths = []
+    for pattern in ("*.mp3", "*.wav", "*.m4a", "*.ogg", "*.webm", "*.flac"):
+        paths.extend(glob.glob(os.path.join(ROOT, pattern)))
+        paths.extend(glob.glob(os.path.join(FIXTURE_DIR, "audio", pattern)))
+    return sorted(paths)
+
+
+def pdf_fixtures() -> list:
+    """PDF polis dari rag/documents dan daftar_asuransi/data."""
+    paths = glob.glob(os.path.join(ROOT, "rag", "documents", "*.pdf"))
+    paths += glob.glob(os.path.join(ROOT, "daftar_asuransi", "data", "*.pdf"))
+    return sorted(paths)
+
+
+def random_keluhan(rng: random.Random = random) -> str:
+    return rng.choice(KELUHAN_SAMPLES)
+
+
+def surat_payload(i: int = 0) -> dict:
+    return {
+        "nama": "Budi Santoso",
+        "nomor_polis": f"POL-{1000 + i}",
+        "alamat": "Jl. Merdeka No. 10, Bandung",
+        "nomor_hp": "081234567890",
+        "tanggal_pengajuan": "1 Agustus 2025",
+        "nomor_klaim": f"KLM-{2000 + i}",
+        "perihal_klaim": "rawat inap demam berdarah",
+        "alasan_penolakan": "Penyakit termasuk masa tunggu polis.",
+        "alasan_banding": "Masa tunggu 30 hari sudah terlewati sesuai tanggal efektif polis.",
+        "nama_asuransi": "AXA Mandiri",
+    }
+
+
+def hospital_payload(rng: random.Random = random) -> dict:
+    return {
+        "nama": "Budi Santoso",
+        "kelurahan_desa": "Sukamaju",
+        "kecamatan": "Cibeunying",
+        "jenis_layanan": rng.choice(["rawat inap", "rawat jalan"]),
+        "keluhan": random_keluhan(rng),
+        "nama_asuransi": rng.choice(["AXA Mandiri", "Allianz", "Prudential", "AIA"]),
+        "nama_provinsi": rng.choice(PROVINSI_SAMPLES),
+        "nama_daerah": "Bandung",
+        "top_n": 5,
+    }
+
+
+def isi_data_payload() -> dict:
+    return {
+        "ktp": KTP_POLIS_SAMPLE["ktp"],
+        "polis": KTP_POLIS_SAMPLE["polis"],
+        "raw_text": f"{KTP_TEXT}\n{POLIS_TEXT}",
+        "nomor_polis": "1234567890",
+        "layanan": "rawat inap",
+        "nomor_hp": "081234567890",
+        "keluhan": KELUHAN_SAMPLES[0],
+    }
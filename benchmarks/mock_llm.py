@@ -0,0 +1,168 @@
+"""
+Stand-in lokal untuk Gemini generateContent dan HF Inference API (chat completion & text generation)
+dengan latency yang bisa diatur. Dipakai oleh benchmark agar hasil tidak bergantung pada jaringan/kuota.
+
+Jalankan sendiri:
+    python -m benchmarks.mock_llm --port 8765 --latency-ms 800 --jitter-ms 200
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+KELUHAN_JSON = {
+    "persentase_klaim": 80,
+    "kemungkinan_diagnosis": ["Infeksi virus", "Flu"],
+    "rekomendasi_tindakan": ["Konsultasi dengan dokter umum", "Istirahat yang cukup"],
+    "tingkat_urgensi": "sedang",
+    "dokumen_pendukung": ["Surat rujukan dokter", "Resep obat"]
+}
+
+SLIP_JSON = {
+    "jenis_layanan": "rawat jalan",
+    "deskripsi_layanan": "konsultasi dokter umum",
+    "status_pertanggungan": "ditanggung",
+    "limit_maksimum": "5000000",
+    "sisa_kuota": "3500000",
+    "estimasi_biaya_keluar": "0",
+    "alasan_status": None,
+    "tanggal_efektif_pertanggungan": "2025-01-01",
+    "catatan_tambahan": None
+}
+
+KTP_POLIS_JSON = {
+    "ktp": {"nama": "Budi Santoso", "kelurahan_desa": "Sukamaju", "kecamatan": "Cibeunying",
+            "nama_provinsi": "Jawa Barat", "nama_daerah": "Bandung"},
+    "polis": {"nama_asuransi": "AXA Mandiri"}
+}
+
+
+class MockConfig:
+    def __init__(self, latency_ms: float = 500.0, jitter_ms: float = 100.0, tokens_per_s: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_s = tokens_per_s
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def sleep(self, output_tokens: int = 0):
+        delay = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        if self.tokens_per_s > 0:
+            delay += 1000.0 * output_tokens / self.tokens_per_s
+        time.sleep(max(0.0, delay) / 1000.0)
+
+
+def _answer_for(prompt: str) -> str:
+    """Pilih jawaban tiruan sesuai jenis prompt, supaya parsing di fitur ikut terukur."""
+    if "slip rumah sakit" in prompt:
+        return json.dumps(SLIP_JSON, ensure_ascii=False)
+    if "KTP" in prompt:
+        return json.dumps(KTP_POLIS_JSON, ensure_ascii=False)
+    if "keluhan" in prompt.lower():
+        return json.dumps(KELUHAN_JSON, ensure_ascii=False)
+    return ("Berdasarkan informasi polis, biaya rawat inap ditanggung sesuai limit manfaat. "
+            "Silakan hubungi customer service untuk detail lebih lanjut.")
+
+
+def make_handler(config: MockConfig):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, payload, status=200):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            self._send_json({"status": "ok", "requests": config.requests})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                payload = {}
+            with config.lock:
+                config.requests += 1
+
+            if ":generateContent" in self.path:
+                prompt = " ".join(p.get("text", "") for c in payload.get("contents", []) for p in c.get("parts", []))
+                answer = _answer_for(prompt)
+                config.sleep(len(answer) // 4)
+                self._send_json({
+                    "candidates": [{"content": {"parts": [{"text": answer}], "role": "model"}, "finishReason": "STOP"}],
+                    "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(answer) // 4}
+                })
+            elif self.path.rstrip("/").endswith("/chat/completions"):
+                prompt = " ".join(str(m.get("content", "")) for m in payload.get("messages", []))
+                answer = _answer_for(prompt)
+                config.sleep(len(answer) // 4)
+                self._send_json({
+                    "id": "mock-chat",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": payload.get("model") or "mock",
+                    "system_fingerprint": "mock",
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": answer},
+                                 "finish_reason": "stop", "logprobs": None}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(answer) // 4,
+                              "total_tokens": (len(prompt) + len(answer)) // 4}
+                })
+            else:
+                # HF text_generation
+                prompt = payload.get("inputs", "")
+                answer = _answer_for(prompt)
+                config.sleep(len(answer) // 4)
+                self._send_json([{"generated_text": answer}])
+
+    return Handler
+
+
+def start_mock_server(host: str = "127.0.0.1", port: int = 0, latency_ms: float = 500.0,
+                      jitter_ms: float = 100.0, tokens_per_s: float = 0.0):
+    """Jalankan server mock di thread background. Mengembalikan (server, base_url)."""
+    config = MockConfig(latency_ms, jitter_ms, tokens_per_s)
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    server.config = config
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def mock_env(base_url: str) -> dict:
+    """Environment variable yang mengarahkan semua fitur ke server mock."""
+    return {
+        "GEMINI_API_URL": f"{base_url}/v1beta/models/gemini-1.5-flash-latest:generateContent",
+        "GEMINI_API_KEY": "mock",
+        "HF_CHAT_MODEL": f"{base_url}/hf",
+        "TANGGUNGAN_AI_MODEL": f"{base_url}/hf",
+        "HF_TOKEN": "mock",
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Gemini & HF Inference API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=100.0)
+    parser.add_argument("--tokens-per-s", type=float, default=0.0)
+    args = parser.parse_args()
+    server, base_url = start_mock_server(args.host, args.port, args.latency_ms, args.jitter_ms, args.tokens_per_s)
+    print(f"Mock LLM running at {base_url}")
+    for key, value in mock_env(base_url).items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
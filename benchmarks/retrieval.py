@@ -0,0 +1,348 @@
+"""
+Micro-benchmark retrieval: waktu preprocessing, encoding, dan search diukur terpisah untuk
+recommend_hospitals, recommend_asuransi, dan SimpleRAGRetriever.retrieve, plus sweep jenis index FAISS,
+batch size, dan jumlah thread dengan recall@k terhadap ground truth IndexFlat.
+
+Query berlabel dibangun dari CSV rumah sakit (daftar_rumah_sakit/xlsx, from_scrapping) dan
+teks PDF asuransi (daftar_asuransi/data).
+
+Contoh:
+    python -m benchmarks.retrieval --corpus hospital --corpus-limit 5000 --queries 200
+    python -m benchmarks.retrieval --corpus asuransi --index-types flat,hnsw32,sq8 --threads 1,2,4
+"""
+import os
+import csv
+import glob
+import json
+import time
+import random
+import argparse
+import numpy as np
+import faiss
+
+from benchmarks import fixtures
+from benchmarks.e2e import percentile, RESULTS_DIR
+from daftar_rumah_sakit.preprocessing import preprocessing_id
+from daftar_rumah_sakit.data_processing import build_model, normalize, load_json, load_faiss_index
+
+HOSPITAL_CSV_GLOBS = [
+    os.path.join(fixtures.ROOT, "daftar_rumah_sakit", "xlsx", "*_fixed.csv"),
+    os.path.join(fixtures.ROOT, "daftar_rumah_sakit", "from_scrapping", "*_fixed.csv"),
+]
+HOSPITAL_MODEL_PATH = os.path.join(fixtures.ROOT, "daftar_rumah_sakit", "app", "models", "st_model")
+ASURANSI_MODEL_PATH = os.path.join(fixtures.ROOT, "daftar_asuransi", "app", "models", "st_model")
+ASURANSI_DATA_PATH = os.path.join(fixtures.ROOT, "daftar_asuransi", "preprocessed", "daftar_asuransi_all.json")
+ASURANSI_INDEX_PATH = os.path.join(fixtures.ROOT, "daftar_asuransi", "app", "embeddings", "asuransi_st.index")
+ASURANSI_PDF_DIR = os.path.join(fixtures.ROOT, "daftar_asuransi", "data")
+
+
+def stage_stats(seconds: list) -> dict:
+    values = sorted(seconds)
+    return {
+        "mean_ms": round(1000 * sum(values) / len(values), 3) if values else 0.0,
+        "p50_ms": round(1000 * percentile(values, 0.50), 3),
+        "p95_ms": round(1000 * percentile(values, 0.95), 3),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Korpus dan query berlabel
+# ---------------------------------------------------------------------------
+
+def load_hospital_corpus(limit: int = 0, seed: int = 42) -> list:
+    """Gabungkan CSV rumah sakit menjadi list record {nama_rumah_sakit, alamat, telp, text, sumber}."""
+    records = []
+    for pattern in HOSPITAL_CSV_GLOBS:
+        for path in sorted(glob.glob(pattern)):
+            sumber = os.path.basename(path).replace("daftar_rumah_sakit_", "").replace("_fixed.csv", "")
+            with open(path, "r", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    if row.get("text"):
+                        records.append({**row, "sumber": sumber})
+    if limit and len(records) > limit:
+        records = random.Random(seed).sample(records, limit)
+    return records
+
+
+def hospital_labeled_queries(records: list, n: int, seed: int = 42) -> list:
+    """
+    Query dibentuk seperti input recommend_hospitals dari field baris CSV (alamat, wilayah, layanan, asuransi).
+    Label = semua baris dengan teks terpreproses yang sama dengan baris sumber.
+    """
+    rng = random.Random(seed)
+    groups = {}
+    for i, r in enumerate(records):
+        groups.setdefault(r["_processed"], []).append(i)
+    queries = []
+    for i in rng.sample(range(len(records)), min(n, len(records))):
+        r = records[i]
+        parts = [p.strip() for p in r["text"].split("|") if p.strip()]
+        wilayah = " ".join(parts[:2])
+        layanan = rng.choice(["rawat inap", "rawat jalan"])
+        query = (f"{r['alamat']} layanan:{layanan} keluhan:{fixtures.random_keluhan(rng)} "
+                 f"asuransi:{r['sumber']} {wilayah}")
+        queries.append({"query": query, "relevant": groups[r["_processed"]]})
+    return queries
+
+
+def _pdf_sentences(path: str) -> list:
+    from PyPDF2 import PdfReader
+    text = ""
+    try:
+        for page in PdfReader(path).pages:
+            text += (page.extract_text() or "") + "\n"
+    except Exception:
+        return []
+    sentences = [s.strip() for s in text.replace("\n", " ").split(".")]
+    return [s for s in sentences if 60 <= len(s) <= 400]
+
+
+def asuransi_labeled_queries(n: int, seed: int = 42) -> list:
+    """Kalimat acak dari tiap PDF asuransi; label = indeks PDF yang sama di daftar_asuransi_all.json."""
+    rng = random.Random(seed)
+    pdfs = sorted(f for f in os.listdir(ASURANSI_PDF_DIR) if f.endswith(".pdf"))
+    # JSON tidak menyimpan nama file, jadi label dicocokkan lewat potongan teks terpreproses
+    data = load_json(ASURANSI_DATA_PATH)
+    queries = []
+    per_pdf = max(1, n // max(1, len(pdfs)))
+    for filename in pdfs:
+        sentences = _pdf_sentences(os.path.join(ASURANSI_PDF_DIR, filename))
+        if not sentences:
+            continue
+        for sentence in rng.sample(sentences, min(per_pdf, len(sentences))):
+            processed = preprocessing_id(sentence)
+            head = processed[:40]
+            relevant = [i for i, d in enumerate(data) if head and head in d["text"]]
+            if relevant:
+                queries.append({"query": sentence, "relevant": relevant, "source": filename})
+    return queries[:n]
+
+
+# ---------------------------------------------------------------------------
+# Index sweep
+# ---------------------------------------------------------------------------
+
+def build_index(spec: str, embeddings: np.ndarray):
+    """spec: flat, hnsw32, ivf, ivfpq, sq8, sqfp16 (nlist/m menyesuaikan ukuran korpus)."""
+    n, dim = embeddings.shape
+    nlist = max(1, min(4096, int(4 * np.sqrt(n))))
+    factory = {
+        "flat": "Flat",
+        "hnsw32": "HNSW32",
+        "ivf": f"IVF{nlist},Flat",
+        "ivfpq": f"IVF{nlist},PQ{dim // 8 if dim % 8 == 0 else 16}",
+        "sq8": "SQ8",
+        "sqfp16": "SQfp16",
+    }[spec]
+    if spec.startswith("ivf") and n < 39 * nlist:
+        return None, factory
+    if spec == "ivfpq" and n < 256 * 4:
+        return None, factory
+    index = faiss.index_factory(dim, factory, faiss.METRIC_L2)
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    if spec.startswith("ivf"):
+        faiss.extract_index_ivf(index).nprobe = max(1, nlist // 16)
+    return index, factory
+
+
+def recall_at_k(approx: np.ndarray, exact: np.ndarray, k: int) -> float:
+    hits = [len(set(a[:k]) & set(e[:k])) / k for a, e in zip(approx, exact)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def label_hit_at_k(indices: np.ndarray, queries: list, k: int) -> float:
+    hits = [bool(set(row[:k].tolist()) & set(q["relevant"])) for row, q in zip(indices, queries)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def time_search(index, query_emb: np.ndarray, k: int, batch_size: int) -> tuple:
+    per_query, all_indices = [], []
+    for start in range(0, len(query_emb), batch_size):
+        batch = query_emb[start:start + batch_size]
+        t0 = time.perf_counter()
+        _, indices = index.search(batch, k)
+        elapsed = time.perf_counter() - t0
+        per_query.extend([elapsed / len(batch)] * len(batch))
+        all_indices.append(indices)
+    return per_query, np.vstack(all_indices)
+
+
+def sweep(corpus_emb: np.ndarray, query_emb: np.ndarray, queries: list, index_types: list,
+          batch_sizes: list, thread_counts: list, k: int) -> list:
+    flat, _ = build_index("flat", corpus_emb)
+    _, exact = flat.search(query_emb, k)
+    rows = []
+    for spec in index_types:
+        t0 = time.perf_counter()
+        index, factory = build_index(spec, corpus_emb)
+        build_s = time.perf_counter() - t0
+        if index is None:
+            print(f"[skip] {spec} ({factory}): korpus terlalu kecil untuk training")
+            continue
+        memory_bytes = len(faiss.serialize_index(index))
+        for threads in thread_counts:
+            faiss.omp_set_num_threads(threads)
+            for batch_size in batch_sizes:
+                per_query, approx = time_search(index, query_emb, k, batch_size)
+                total = sum(per_query)
+                row = {
+                    "index": spec, "factory": factory, "threads": threads, "batch_size": batch_size,
+                    "build_s": round(build_s, 3), "index_bytes": memory_bytes,
+                    f"recall@{k}": round(recall_at_k(approx, exact, k), 4),
+                    f"label_hit@{k}": round(label_hit_at_k(approx, queries, k), 4),
+                    "qps": round(len(per_query) / total, 1) if total else 0.0,
+                    **{f"search_{key}": v for key, v in stage_stats(per_query).items()},
+                }
+                rows.append(row)
+                print(f"{spec:7s} t={threads:<2d} b={batch_size:<4d} recall@{k}={row[f'recall@{k}']:.3f} "
+                      f"hit@{k}={row[f'label_hit@{k}']:.3f} search_p50={row['search_p50_ms']:.3f}ms qps={row['qps']}")
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Timing per tahap untuk fungsi produksi
+# ---------------------------------------------------------------------------
+
+def time_stages(model, index, texts: list, k: int, do_preprocess: bool = True) -> dict:
+    prep, enc, search = [], [], []
+    for text in texts:
+        t0 = time.perf_counter()
+        processed = preprocessing_id(text) if do_preprocess else text.strip()
+        t1 = time.perf_counter()
+        emb = normalize(model.encode([processed])).astype("float32")
+        t2 = time.perf_counter()
+        index.search(emb, k)
+        t3 = time.perf_counter()
+        prep.append(t1 - t0)
+        enc.append(t2 - t1)
+        search.append(t3 - t2)
+    return {"preprocess": stage_stats(prep), "encode": stage_stats(enc), "search": stage_stats(search)}
+
+
+def time_encode_batches(model, texts: list, batch_sizes: list, thread_counts: list) -> list:
+    import torch
+    rows = []
+    for threads in thread_counts:
+        torch.set_num_threads(threads)
+        for batch_size in batch_sizes:
+            t0 = time.perf_counter()
+            model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            elapsed = time.perf_counter() - t0
+            rows.append({"threads": threads, "batch_size": batch_size,
+                         "per_text_ms": round(1000 * elapsed / len(texts), 3),
+                         "texts_per_s": round(len(texts) / elapsed, 1)})
+    return rows
+
+
+def bench_hospital(args) -> dict:
+    records = load_hospital_corpus(args.corpus_limit, args.seed)
+    t0 = time.perf_counter()
+    for r in records:
+        r["_processed"] = preprocessing_id(r["text"])
+    preprocess_s = time.perf_counter() - t0
+    model = build_model(HOSPITAL_MODEL_PATH)
+    t0 = time.perf_counter()
+    corpus_emb = normalize(model.encode([r["_processed"] for r in records], batch_size=64,
+                                        show_progress_bar=False)).astype("float32")
+    corpus_encode_s = time.perf_counter() - t0
+    queries = hospital_labeled_queries(records, args.queries, args.seed)
+    query_texts = [q["query"] for q in queries]
+    query_emb = normalize(model.encode([preprocessing_id(t) for t in query_texts])).astype("float32")
+    flat, _ = build_index("flat", corpus_emb)
+    return {
+        "corpus_size": len(records),
+        "corpus_preprocess_s": round(preprocess_s, 3),
+        "corpus_encode_s": round(corpus_encode_s, 3),
+        "stages": time_stages(model, flat, query_texts[:args.stage_queries], args.k),
+        "encode_batches": time_encode_batches(model, query_texts, args.batch_sizes, args.threads),
+        "sweep": sweep(corpus_emb, query_emb, queries, args.index_types, args.batch_sizes, args.threads, args.k),
+    }
+
+
+def bench_asuransi(args) -> dict:
+    data = load_json(ASURANSI_DATA_PATH)
+    model = build_model(ASURANSI_MODEL_PATH)
+    index = load_faiss_index(ASURANSI_INDEX_PATH)
+    queries = asuransi_labeled_queries(args.queries, args.seed)
+    query_texts = [q["query"] for q in queries]
+    corpus_emb = np.vstack([index.reconstruct(i) for i in range(index.ntotal)]).astype("float32")
+    query_emb = normalize(model.encode([preprocessing_id(t) for t in query_texts])).astype("float32")
+    k = min(args.k, len(data))
+    return {
+        "corpus_size": len(data),
+        "stages": time_stages(model, index, query_texts[:args.stage_queries], k),
+        "encode_batches": time_encode_batches(model, query_texts, args.batch_sizes, args.threads),
+        "sweep": sweep(corpus_emb, query_emb, queries, args.index_types, args.batch_sizes, args.threads, k),
+    }
+
+
+def bench_rag(args) -> dict:
+    from rag.retriever import SimpleRAGRetriever
+    retriever = SimpleRAGRetriever(index_path=os.path.join(fixtures.ROOT, "rag", "index"),
+                                   documents_path=os.path.join(fixtures.ROOT, "rag", "documents"))
+    rng = random.Random(args.seed)
+    docs = retriever.documents
+    sampled = rng.sample(range(len(docs)), min(args.queries, len(docs)))
+    queries = []
+    for i in sampled:
+        sentences = [s.strip() for s in docs[i].page_content.replace("\n", " ").split(".") if len(s.strip()) > 40]
+        if sentences:
+            source = docs[i].metadata.get("source")
+            relevant = [j for j, d in enumerate(docs) if d.metadata.get("source") == source]
+            queries.append({"query": rng.choice(sentences), "relevant": relevant})
+    query_texts = [q["query"] for q in queries]
+    retrieve_times = []
+    for text in query_texts[:args.stage_queries]:
+        t0 = time.perf_counter()
+        retriever.retrieve(text, top_k=args.k)
+        retrieve_times.append(time.perf_counter() - t0)
+    model = retriever.embeddings_model
+    corpus_emb = np.vstack([retriever.index.reconstruct(i) for i in range(retriever.index.ntotal)]).astype("float32")
+    query_emb = model.encode(query_texts).astype("float32")
+    faiss.normalize_L2(query_emb)
+    return {
+        "corpus_size": len(docs),
+        "retrieve": stage_stats(retrieve_times),
+        "stages": time_stages(model, retriever.index, query_texts[:args.stage_queries], args.k, do_preprocess=False),
+        "encode_batches": time_encode_batches(model, query_texts, args.batch_sizes, args.threads),
+        "sweep": sweep(corpus_emb, query_emb, queries, args.index_types, args.batch_sizes, args.threads, args.k),
+    }
+
+
+def _int_list(value: str) -> list:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark retrieval & recall FAISS")
+    parser.add_argument("--corpus", default="hospital,asuransi,rag", help="hospital, asuransi, rag (dipisah koma)")
+    parser.add_argument("--corpus-limit", type=int, default=0, help="Batasi jumlah baris rumah sakit (0 = semua)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--stage-queries", type=int, default=50, help="Jumlah query untuk timing per tahap")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--index-types", default="flat,hnsw32,ivf,ivfpq,sq8,sqfp16")
+    parser.add_argument("--batch-sizes", type=_int_list, default=[1, 8, 32, 128])
+    parser.add_argument("--threads", type=_int_list, default=[1, 2, 4])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="")
+    args = parser.parse_args()
+    args.index_types = [t.strip() for t in args.index_types.split(",") if t.strip()]
+
+    benches = {"hospital": bench_hospital, "asuransi": bench_asuransi, "rag": bench_rag}
+    report = {"meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "cpu_count": os.cpu_count(),
+                       "k": args.k, "faiss": getattr(faiss, "__version__", "unknown")}}
+    for name in [c.strip() for c in args.corpus.split(",") if c.strip()]:
+        print(f"=== {name}")
+        report[name] = benches[name](args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"retrieval_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Hasil disimpan ke {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Core infrastructure package (result store, execution, observability)
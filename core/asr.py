@@ -0,0 +1,197 @@
+"""
+Backend ASR untuk model Whisper fine-tuned Indonesia (ayaayaa/whisper-finetuned-id).
+
+ASR_BACKEND:
+- transformers : pipeline transformers fp32 (default, perilaku lama)
+- int8         : model transformers dengan dynamic int8 quantization (nn.Linear) untuk CPU
+- ctranslate2  : model hasil konversi CTranslate2 via faster-whisper (compute type int8)
+
+Konversi model ke CTranslate2:
+    python -m core.asr convert --output ./data/whisper-ct2
+"""
+import os
+import sys
+import logging
+import argparse
+import threading
+import numpy as np
+from dotenv import load_dotenv
+from core.metrics import timer
+from core.audio import SAMPLE_RATE, ffmpeg_available, decode_audio
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "ayaayaa/whisper-finetuned-id")
+ASR_BACKEND = os.getenv("ASR_BACKEND", "transformers")
+ASR_THREADS = int(os.getenv("ASR_THREADS", "0"))
+ASR_CT2_MODEL_PATH = os.getenv("ASR_CT2_MODEL_PATH", "./data/whisper-ct2")
+ASR_CT2_COMPUTE_TYPE = os.getenv("ASR_CT2_COMPUTE_TYPE", "int8")
+ASR_LANGUAGE = os.getenv("ASR_LANGUAGE", "id")
+# Transkripsi streaming: audio belum di-commit maksimal STREAM_COMMIT_SECONDS (< 30 detik jendela Whisper)
+STREAM_COMMIT_SECONDS = float(os.getenv("STREAM_COMMIT_SECONDS", "20"))
+
+BACKENDS = ("transformers", "int8", "ctranslate2")
+
+
+def load_audio_16k(audio_file_path: str) -> np.ndarray:
+    """Baca file audio menjadi float32 mono 16 kHz lewat satu proses ffmpeg (lihat core.audio)."""
+    if ffmpeg_available():
+        return decode_audio(audio_file_path)
+    # Fallback tanpa ffmpeg: hanya format yang didukung libsndfile (wav, flac, ogg)
+    logger.warning("ffmpeg not found, falling back to soundfile + librosa")
+    import soundfile as sf
+    import librosa
+    audio, sr = sf.read(audio_file_path, dtype="float32")
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=SAMPLE_RATE)
+    return audio
+
+
+class TransformersWhisper:
+    """Whisper lewat transformers; quantize=True menerapkan dynamic int8 quantization pada layer Linear."""
+
+    def __init__(self, model_name: str = WHISPER_MODEL, quantize: bool = False):
+        import torch
+        from transformers import pipeline
+        if ASR_THREADS:
+            torch.set_num_threads(ASR_THREADS)
+        self.pipe = pipeline("automatic-speech-recognition", model=model_name, device="cpu")
+        self.pipe.model.eval()
+        if quantize:
+            torch.quantization.quantize_dynamic(self.pipe.model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+            logger.info(f"Loaded {model_name} with dynamic int8 quantization")
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        import torch
+        with torch.inference_mode():
+            with timer("whisper_features"):
+                inputs = self.pipe.feature_extractor(audio, sampling_rate=SAMPLE_RATE, return_tensors="pt").input_features
+            with timer("whisper_decode"):
+                result = self.pipe.model.generate(inputs)
+            text = self.pipe.tokenizer.batch_decode(result, skip_special_tokens=True)
+        return text[0] if text else ""
+
+
+class CTranslate2Whisper:
+    """Whisper hasil konversi CTranslate2 (faster-whisper), int8 di CPU."""
+
+    def __init__(self, model_path: str = ASR_CT2_MODEL_PATH, compute_type: str = ASR_CT2_COMPUTE_TYPE):
+        from faster_whisper import WhisperModel
+        if not os.path.isdir(model_path):
+            raise Exception(f"Model CTranslate2 tidak ditemukan di {model_path}; jalankan `python -m core.asr convert`")
+        self.model = WhisperModel(model_path, device="cpu", compute_type=compute_type, cpu_threads=ASR_THREADS)
+
+    def transcribe(self, audio: np.ndarray) -> str:
+        with timer("whisper_decode"):
+            segments, _ = self.model.transcribe(audio, language=ASR_LANGUAGE, beam_size=1)
+            return " ".join(segment.text.strip() for segment in segments)
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_asr_backend(name: str = None):
+    """Backend ASR dimuat sekali per proses dan dipakai bersama."""
+    name = name or ASR_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"ASR_BACKEND tidak dikenali: {name} (pilihan: {', '.join(BACKENDS)})")
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            with timer("whisper_load"):
+                if name == "ctranslate2":
+                    backend = CTranslate2Whisper()
+                else:
+                    backend = TransformersWhisper(quantize=name == "int8")
+            _backends[name] = backend
+        return backend
+
+
+def transcribe_file(audio_file_path: str, backend=None) -> str:
+    """
+    Transkripsi satu file audio dengan backend ASR_BACKEND (model di-cache per proses). Audio lebih panjang
+    dari jendela Whisper dipotong di titik hening seperti transkripsi streaming, bukan terpotong diam-diam.
+    """
+    with timer("audio_decode"):
+        audio = load_audio_16k(audio_file_path)
+    transcriber = StreamingTranscriber(backend)
+    transcriber.add(audio)
+    return transcriber.finish()
+
+
+class StreamingTranscriber:
+    """
+    Transkripsi inkremental dengan jendela geser: partial() men-decode audio yang belum di-commit,
+    dan jika panjangnya melewati commit_seconds, potong di titik paling hening lalu commit bagian awalnya.
+    """
+
+    def __init__(self, backend=None, commit_seconds: float = STREAM_COMMIT_SECONDS):
+        self.backend = backend or get_asr_backend()
+        self.commit_samples = int(commit_seconds * SAMPLE_RATE)
+        self.committed = []
+        self.buffer = np.zeros(0, dtype=np.float32)
+
+    def add(self, samples: np.ndarray):
+        if len(samples):
+            self.buffer = np.concatenate([self.buffer, samples])
+
+    def _split_point(self, search_seconds: float = 3.0, frame_ms: int = 20) -> int:
+        # Cari di ujung jendela commit agar potongan yang di-decode tidak melebihi jendela Whisper
+        frame = SAMPLE_RATE * frame_ms // 1000
+        end = min(len(self.buffer), self.commit_samples)
+        start = max(0, end - int(search_seconds * SAMPLE_RATE))
+        tail = self.buffer[start:end]
+        n_frames = len(tail) // frame
+        if n_frames == 0:
+            return end
+        energy = np.square(tail[:n_frames * frame].reshape(n_frames, frame)).mean(axis=1)
+        return start + int(np.argmin(energy)) * frame
+
+    def _commit(self, end: int):
+        text = self.backend.transcribe(self.buffer[:end]).strip()
+        if text:
+            self.committed.append(text)
+        self.buffer = self.buffer[end:]
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self.committed)
+
+    def partial(self) -> str:
+        """Transkrip sementara (teks ter-commit + hipotesis jendela saat ini). Blocking."""
+        if len(self.buffer) >= self.commit_samples:
+            self._commit(self._split_point())
+        hypothesis = self.backend.transcribe(self.buffer).strip() if len(self.buffer) else ""
+        return " ".join(t for t in (self.committed_text, hypothesis) if t)
+
+    def finish(self) -> str:
+        """Commit sisa audio dan kembalikan transkrip final. Blocking."""
+        while len(self.buffer) > self.commit_samples:
+            self._commit(self._split_point())
+        if len(self.buffer):
+            self._commit(len(self.buffer))
+        return self.committed_text
+
+
+def convert_to_ctranslate2(output_dir: str, quantization: str = "int8", model_name: str = WHISPER_MODEL):
+    import ctranslate2
+    converter = ctranslate2.converters.TransformersConverter(
+        model_name, copy_files=["tokenizer.json", "preprocessor_config.json"]
+    )
+    converter.convert(output_dir, quantization=quantization, force=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Utilitas backend ASR Whisper")
+    sub = parser.add_subparsers(dest="command", required=True)
+    convert = sub.add_parser("convert", help="Konversi model Whisper transformers ke CTranslate2")
+    convert.add_argument("--output", default=ASR_CT2_MODEL_PATH)
+    convert.add_argument("--quantization", default="int8")
+    convert.add_argument("--model", default=WHISPER_MODEL)
+    args = parser.parse_args()
+    convert_to_ctranslate2(args.output, args.quantization, args.model)
+    print(f"Model CTranslate2 disimpan di {args.output}", file=sys.stderr)
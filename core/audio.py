@@ -0,0 +1,142 @@
+"""
+Front-end audio: decode file apa pun (mp3, m4a, webm, mp4, ogg, wav, flac) lewat satu proses ffmpeg
+langsung ke PCM float32 mono 16 kHz, tanpa decode float64 / resample terpisah.
+"""
+import os
+import shutil
+import logging
+import subprocess
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+FFMPEG_BIN = os.getenv("FFMPEG_BIN", "ffmpeg")
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 4  # float32
+# Format input StreamingDecoder yang diizinkan. Jangan izinkan demuxer seperti hls/concat: keduanya membaca
+# stdin sebagai playlist dan bisa membuka URL atau file lokal sembarang.
+STREAM_FORMATS = ("auto", "webm", "ogg", "mp3", "wav", "pcm_s16le", "pcm_f32le")
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which(FFMPEG_BIN) is not None
+
+
+def ffmpeg_command(source: str = "pipe:0") -> list:
+    """ffmpeg: ambil hanya track audio pertama (video di .mp4 diabaikan), downmix ke mono, resample ke 16 kHz."""
+    return [
+        FFMPEG_BIN, "-nostdin", "-hide_banner", "-loglevel", "error", "-threads", "0",
+        "-i", source,
+        "-map", "0:a:0", "-vn", "-sn", "-dn",
+        "-ac", "1", "-ar", str(SAMPLE_RATE),
+        "-f", "f32le", "-acodec", "pcm_f32le", "pipe:1",
+    ]
+
+
+def decode_audio(path: str) -> np.ndarray:
+    """Decode seluruh file ke float32 mono 16 kHz (buffer stdout ffmpeg dipakai langsung tanpa salinan)."""
+    proc = subprocess.run(ffmpeg_command(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=False)
+    if proc.returncode != 0:
+        raise Exception(f"ffmpeg gagal decode audio: {proc.stderr.decode('utf-8', 'ignore').strip()}")
+    return np.frombuffer(proc.stdout, dtype=np.float32)
+
+
+def iter_audio_frames(path: str, frame_seconds: float = 1.0):
+    """Generator frame float32 mono 16 kHz selagi ffmpeg masih men-decode (untuk audio panjang)."""
+    frame_bytes = int(frame_seconds * SAMPLE_RATE) * BYTES_PER_SAMPLE
+    proc = subprocess.Popen(ffmpeg_command(path), stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finished = False
+    try:
+        while True:
+            chunk = proc.stdout.read(frame_bytes)
+            if not chunk:
+                break
+            yield np.frombuffer(chunk, dtype=np.float32, count=len(chunk) // BYTES_PER_SAMPLE)
+        finished = True
+    finally:
+        proc.stdout.close()
+        if not finished:
+            proc.kill()
+        stderr = proc.stderr.read()
+        proc.stderr.close()
+        if proc.wait() != 0 and finished:
+            raise Exception(f"ffmpeg gagal decode audio: {stderr.decode('utf-8', 'ignore').strip()}")
+
+
+class StreamingDecoder:
+    """
+    Decoder inkremental: byte audio (webm/ogg/mp3 dari MediaRecorder, dsb.) ditulis ke stdin ffmpeg,
+    PCM float32 mono 16 kHz dibaca thread terpisah dan diambil lewat read().
+    input_format="pcm_s16le"/"pcm_f32le" berarti client sudah mengirim PCM 16 kHz mono (tanpa ffmpeg).
+    """
+
+    def __init__(self, input_format: str = "auto"):
+        if input_format not in STREAM_FORMATS:
+            raise ValueError(f"Format audio tidak didukung: {input_format} (pilihan: {', '.join(STREAM_FORMATS)})")
+        self.input_format = input_format
+        self._chunks = []
+        self._pending = b""
+        self._lock = threading.Lock()
+        self._proc = None
+        self._reader = None
+        if input_format not in ("pcm_s16le", "pcm_f32le"):
+            command = ffmpeg_command("pipe:0")
+            if input_format != "auto":
+                command[command.index("-i"):command.index("-i")] = ["-f", input_format]
+            self._proc = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                          stderr=subprocess.DEVNULL)
+            self._reader = threading.Thread(target=self._read_stdout, daemon=True)
+            self._reader.start()
+
+    def _read_stdout(self):
+        while True:
+            chunk = self._proc.stdout.read1(64 * 1024)
+            if not chunk:
+                break
+            self._append(chunk, np.float32)
+
+    def _append(self, data: bytes, dtype):
+        width = np.dtype(dtype).itemsize
+        with self._lock:
+            data = self._pending + data
+            usable = len(data) - len(data) % width
+            self._pending = data[usable:]
+            if usable:
+                samples = np.frombuffer(data, dtype=dtype, count=usable // width)
+                if dtype == np.int16:
+                    samples = samples.astype(np.float32) / 32768.0
+                self._chunks.append(samples)
+
+    def feed(self, data: bytes):
+        """Tulis byte audio (blocking; panggil dari thread, bukan event loop)."""
+        if self._proc is None:
+            self._append(data, np.int16 if self.input_format == "pcm_s16le" else np.float32)
+            return
+        self._proc.stdin.write(data)
+        self._proc.stdin.flush()
+
+    def read(self) -> np.ndarray:
+        """Sampel baru sejak panggilan read() sebelumnya."""
+        with self._lock:
+            chunks, self._chunks = self._chunks, []
+        if not chunks:
+            return np.zeros(0, dtype=np.float32)
+        return chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+
+    def close(self):
+        """Tutup stdin dan tunggu ffmpeg mengeluarkan sisa sampel."""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        self._proc.wait()
+
+    def kill(self):
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
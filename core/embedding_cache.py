@@ -0,0 +1,148 @@
+"""
+Cache embedding persisten (content-addressed) untuk build index.
+
+Kunci: (fingerprint model, hash teks ternormalisasi). Per model disimpan di EMBEDDING_CACHE_DIR/<fingerprint>/:
+- vectors.f32 : vektor float32 append-only, dibaca lewat np.memmap
+- keys.bin    : digest 16 byte per baris, urutan sama dengan vectors.f32
+Vektor ditulis (dan di-fsync) sebelum kuncinya, jadi proses yang mati di tengah append hanya
+meninggalkan baris tanpa kunci yang diabaikan saat dibaca.
+"""
+import os
+import re
+import json
+import fcntl
+import hashlib
+import logging
+import threading
+import unicodedata
+from typing import List
+import numpy as np
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", "./data/embedding_cache")
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "1") == "1"
+
+KEY_BYTES = 16
+# Kalimat uji untuk fingerprint: bobot, backend (fp32/int8/onnx) atau tokenizer yang berubah menghasilkan vektor berbeda
+_PROBE = "Rumah sakit rujukan BPJS untuk rawat inap dan klaim asuransi kesehatan."
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def text_key(text: str) -> bytes:
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=KEY_BYTES).digest()
+
+
+def model_fingerprint(model) -> str:
+    probe = np.round(np.asarray(model.encode([_PROBE]), dtype=np.float32)[0], 4)
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"{type(model).__name__}:{getattr(model, 'max_seq_length', '')}:{probe.shape[0]}".encode("utf-8"))
+    h.update(probe.tobytes())
+    return h.hexdigest()
+
+
+class EmbeddingCache:
+    """Cache embedding satu model; encode() hanya meng-encode teks yang belum ada di cache."""
+
+    def __init__(self, model, cache_dir: str = EMBEDDING_CACHE_DIR):
+        self.model = model
+        self.dir = os.path.join(cache_dir, model_fingerprint(model))
+        self.vectors_path = os.path.join(self.dir, "vectors.f32")
+        self.keys_path = os.path.join(self.dir, "keys.bin")
+        self.lock_path = os.path.join(self.dir, "lock")
+        self.dim = None
+        self.rows = {}
+        self._n_keys = 0  # jumlah kunci yang sudah dibaca dari keys.bin
+        self._vectors = None
+        self._lock = threading.Lock()
+        os.makedirs(self.dir, exist_ok=True)
+        self._refresh()
+
+    def _load_dim(self):
+        meta_path = os.path.join(self.dir, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+
+    def _refresh(self):
+        """Baca hanya kunci yang di-append sejak refresh terakhir (juga dari proses lain) lalu petakan ulang vektor."""
+        if self.dim is None:
+            # Cache bisa dibuat proses/instance lain setelah instance ini dibuka
+            self._load_dim()
+        if self.dim is None or not os.path.exists(self.keys_path):
+            return
+        n_vectors = os.path.getsize(self.vectors_path) // (4 * self.dim)
+        n = min(os.path.getsize(self.keys_path) // KEY_BYTES, n_vectors)
+        if n < self._n_keys:
+            # File cache diganti/dipotong dari luar: baca ulang dari awal
+            self.rows, self._n_keys = {}, 0
+        if n > self._n_keys:
+            with open(self.keys_path, "rb") as f:
+                f.seek(self._n_keys * KEY_BYTES)
+                keys = f.read((n - self._n_keys) * KEY_BYTES)
+            self.rows.update((keys[j * KEY_BYTES:(j + 1) * KEY_BYTES], self._n_keys + j) for j in range(n - self._n_keys))
+            self._n_keys = n
+        if self._vectors is None or self._vectors.shape[0] != n_vectors:
+            self._vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n_vectors, self.dim)) if n_vectors else None
+
+    def _append(self, keys: List[bytes], vectors: np.ndarray):
+        with open(self.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                if self.dim is None:
+                    self.dim = int(vectors.shape[1])
+                    with open(os.path.join(self.dir, "meta.json"), "w", encoding="utf-8") as f:
+                        json.dump({"dim": self.dim}, f)
+                # Sejajarkan dulu: baris vektor tanpa kunci (sisa append yang gagal) dipotong
+                n_keys = os.path.getsize(self.keys_path) // KEY_BYTES if os.path.exists(self.keys_path) else 0
+                with open(self.vectors_path, "ab") as f:
+                    f.truncate(n_keys * 4 * self.dim)
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+                with open(self.keys_path, "ab") as f:
+                    f.truncate(n_keys * KEY_BYTES)
+                    f.write(b"".join(keys))
+                    f.flush()
+                    os.fsync(f.fileno())
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def encode(self, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+        """Embedding float32 (belum dinormalisasi, sama seperti model.encode) untuk semua teks."""
+        keys = [text_key(t) for t in texts]
+        with self._lock:
+            self._refresh()
+            missing = {}
+            for key, text in zip(keys, texts):
+                if key not in self.rows and key not in missing:
+                    missing[key] = text
+            if missing:
+                logger.info(f"Embedding cache: {len(texts) - len(missing)} hit, {len(missing)} to encode")
+                new = np.asarray(self.model.encode(list(missing.values()), batch_size=batch_size,
+                                                   show_progress_bar=show_progress_bar), dtype=np.float32)
+                self._append(list(missing), new)
+                self._refresh()
+            return np.array(self._vectors[[self.rows[key] for key in keys]], dtype=np.float32)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def cached_encode(model, texts: List[str], batch_size: int = 32, show_progress_bar: bool = False) -> np.ndarray:
+    """model.encode lewat cache persisten (EMBEDDING_CACHE_ENABLED=0 untuk menonaktifkan)."""
+    if not EMBEDDING_CACHE_ENABLED or not texts:
+        return np.asarray(model.encode(texts, batch_size=batch_size, show_progress_bar=show_progress_bar), dtype=np.float32)
+    with _caches_lock:
+        cache = _caches.get(id(model))
+        if cache is None or cache.model is not model:
+            cache = EmbeddingCache(model)
+            _caches[id(model)] = cache
+    return cache.encode(texts, batch_size, show_progress_bar)
@@ -0,0 +1,63 @@
+import os
+import re
+import logging
+from dotenv import load_dotenv
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Backend encoder: torch (fp32, default), int8 (dynamic quantization PyTorch), onnx, onnx-int8 (ONNX Runtime)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+# Target instruksi untuk kuantisasi ONNX: arm64, avx2, avx512, avx512_vnni
+ONNX_QUANT_CONFIG = os.getenv("ONNX_QUANT_CONFIG", "avx2")
+# Model dari Hub disalin ke sini sebelum diekspor ke ONNX (cache Hub tidak untuk ditulis)
+EMBEDDING_EXPORT_DIR = os.getenv("EMBEDDING_EXPORT_DIR", "./data/embedding_models")
+
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+
+def _local_model_dir(name_or_path: str) -> str:
+    if os.path.isdir(name_or_path):
+        return name_or_path
+    local_dir = os.path.join(EMBEDDING_EXPORT_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", name_or_path))
+    if not os.path.isdir(local_dir):
+        SentenceTransformer(name_or_path, device="cpu").save(local_dir)
+    return local_dir
+
+
+def _load_onnx_int8(name_or_path: str) -> SentenceTransformer:
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+    model_dir = _local_model_dir(name_or_path)
+    file_name = f"model_qint8_{ONNX_QUANT_CONFIG}.onnx"
+    if not os.path.exists(os.path.join(model_dir, "onnx", file_name)):
+        logger.info(f"Exporting int8 ONNX model to {model_dir}/onnx/{file_name}")
+        onnx_model = SentenceTransformer(model_dir, device="cpu", backend="onnx")
+        export_dynamic_quantized_onnx_model(onnx_model, ONNX_QUANT_CONFIG, model_dir)
+    return SentenceTransformer(model_dir, device="cpu", backend="onnx", model_kwargs={"file_name": f"onnx/{file_name}"})
+
+
+def load_sentence_model(name_or_path: str, backend: str = None) -> SentenceTransformer:
+    """
+    Muat SentenceTransformer dengan backend sesuai EMBEDDING_BACKEND. Semua backend memakai
+    API encode() yang sama sehingga bisa dipakai untuk query maupun build index.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"EMBEDDING_BACKEND tidak dikenali: {backend} (pilihan: {', '.join(BACKENDS)})")
+    if EMBEDDING_THREADS:
+        import torch
+        torch.set_num_threads(EMBEDDING_THREADS)
+
+    if backend == "torch":
+        return SentenceTransformer(name_or_path)
+    if backend == "int8":
+        import torch
+        model = SentenceTransformer(name_or_path, device="cpu")
+        torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        logger.info(f"Loaded {name_or_path} with dynamic int8 quantization")
+        return model
+    if backend == "onnx":
+        return SentenceTransformer(_local_model_dir(name_or_path), device="cpu", backend="onnx")
+    return _load_onnx_int8(name_or_path)
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+import logging
+import functools
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+from dotenv import load_dotenv
+from core.metrics import register_collector, gauge_lines, record_stage
+from core.profiling import PROFILING_ENABLED, track_thread
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Format: "embedding:2,ocr:2,asr:1,pdf:2,default:8" — jumlah thread per pool
+EXECUTOR_POOL_SIZES = os.getenv("EXECUTOR_POOL_SIZES", "embedding:2,ocr:2,asr:1,pdf:2,default:8")
+
+POOL_EMBEDDING = "embedding"
+POOL_OCR = "ocr"
+POOL_ASR = "asr"
+POOL_PDF = "pdf"
+POOL_DEFAULT = "default"
+
+
+def parse_pool_sizes(spec: str) -> dict:
+    sizes = {}
+    for part in spec.split(","):
+        if ":" in part:
+            name, value = part.split(":", 1)
+            sizes[name.strip()] = max(1, int(value))
+    sizes.setdefault(POOL_DEFAULT, 8)
+    return sizes
+
+
+class MeteredPool:
+    """ThreadPoolExecutor dengan metrik antrian (queue depth, wait time, run time)."""
+
+    def __init__(self, name: str, size: int, window: int = 512):
+        self.name = name
+        self.size = size
+        self.executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"pool-{name}")
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+        self._recent_waits = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _wrap(self, func: Callable, submitted_at: float) -> Callable:
+        def runner():
+            started_at = time.perf_counter()
+            wait = started_at - submitted_at
+            with self._lock:
+                self.queued -= 1
+                self.active += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                self._recent_waits.append(wait)
+            record_stage(f"{self.name}_queue", wait)
+            ok = False
+            try:
+                if PROFILING_ENABLED:
+                    # Thread ikut disampling jika request pemanggil sedang diprofil
+                    with track_thread():
+                        result = func()
+                else:
+                    result = func()
+                ok = True
+                return result
+            finally:
+                elapsed = time.perf_counter() - started_at
+                with self._lock:
+                    self.active -= 1
+                    self.total_run += elapsed
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+        return runner
+
+    def submit(self, func: Callable):
+        with self._lock:
+            self.queued += 1
+        # Bawa context (misal pengumpul Server-Timing) ke thread pool
+        context = contextvars.copy_context()
+        return self.executor.submit(context.run, self._wrap(func, time.perf_counter()))
+
+    def stats(self) -> dict:
+        with self._lock:
+            finished = self.completed + self.failed
+            waits = sorted(self._recent_waits)
+            p95 = waits[int(0.95 * (len(waits) - 1))] if waits else 0.0
+            return {
+                "size": self.size,
+                "queue_depth": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": round(1000 * self.total_wait / finished, 2) if finished else 0.0,
+                "p95_wait_ms": round(1000 * p95, 2),
+                "max_wait_ms": round(1000 * self.max_wait, 2),
+                "avg_run_ms": round(1000 * self.total_run / finished, 2) if finished else 0.0,
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+pools = {name: MeteredPool(name, size) for name, size in parse_pool_sizes(EXECUTOR_POOL_SIZES).items()}
+
+
+def get_pool(name: str) -> MeteredPool:
+    return pools.get(name) or pools[POOL_DEFAULT]
+
+
+async def run_in_pool(pool_name: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Jalankan fungsi blocking (encode, FAISS, OCR, Whisper, ReportLab, HTTP ke LLM)
+    di pool khusus agar event loop tidak tertahan.
+    """
+    future = get_pool(pool_name).submit(functools.partial(func, *args, **kwargs))
+    return await asyncio.wrap_future(future)
+
+
+def pool_stats() -> dict:
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+@register_collector
+def _pool_metrics() -> list:
+    stats = pool_stats()
+    lines = []
+    for field, help_text in [
+        ("queue_depth", "Jumlah tugas yang menunggu di pool executor"),
+        ("active", "Jumlah tugas yang sedang berjalan di pool executor"),
+        ("size", "Jumlah thread pool executor"),
+        ("p95_wait_ms", "p95 waktu tunggu tugas di pool executor (ms)"),
+    ]:
+        lines.extend(gauge_lines(f"bisacare_executor_{field}", help_text,
+                                 {(("pool", name),): s[field] for name, s in stats.items()}))
+    return lines
+
+
+def shutdown_pools():
+    for pool in pools.values():
+        pool.shutdown()
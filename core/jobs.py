@@ -0,0 +1,160 @@
+import os
+import time
+import uuid
+import asyncio
+import logging
+import itertools
+from collections import deque
+from typing import Any, Callable, Optional
+from dotenv import load_dotenv
+from core.result_store import ResultStore
+from core.executors import run_in_pool, POOL_ASR, POOL_OCR, POOL_DEFAULT
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_PENDING = int(os.getenv("JOB_MAX_PENDING", "200"))
+JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))
+# Format: "audio:1,ocr:2,llm:4" — batas job yang berjalan bersamaan per jenis
+JOB_TYPE_LIMITS = os.getenv("JOB_TYPE_LIMITS", "audio:1,ocr:2,llm:4")
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+FINISHED_STATUSES = ("done", "error")
+
+# Pool executor yang dipakai untuk setiap jenis job
+JOB_TYPE_POOLS = {
+    "audio": POOL_ASR,
+    "ocr": POOL_OCR,
+    "llm": POOL_DEFAULT,
+}
+
+
+class QueueFullError(Exception):
+    pass
+
+
+def parse_type_limits(spec: str) -> dict:
+    limits = {}
+    for part in spec.split(","):
+        if ":" in part:
+            name, value = part.split(":", 1)
+            limits[name.strip()] = max(1, int(value))
+    return limits
+
+
+class JobQueue:
+    """
+    Antrian job di background dengan prioritas dan batas konkurensi per jenis job.
+    Status job disimpan di ResultStore sehingga bisa di-poll dari worker mana pun.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, max_pending: int = JOB_MAX_PENDING,
+                 type_limits: dict = None, store: ResultStore = None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.type_limits = type_limits if type_limits is not None else parse_type_limits(JOB_TYPE_LIMITS)
+        # Tanpa tier memori: status job berubah di worker yang menjalankannya, worker lain harus membaca backend
+        self.store = store or ResultStore("jobs", ttl=JOB_RESULT_TTL, memory=None)
+        self._queue = None
+        self._tasks = []
+        self._jobs = {}  # job_id -> (job_type, func, args, kwargs)
+        self._running = {}  # job_type -> jumlah job berjalan
+        self._deferred = {}  # job_type -> deque entri yang menunggu slot
+        self._counter = itertools.count()
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.PriorityQueue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Job queue started with {self.workers} workers, limits={self.type_limits}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, job_type: str, func: Callable, *args, priority: int = PRIORITY_NORMAL, **kwargs) -> str:
+        if self._queue is None:
+            raise RuntimeError("Job queue belum dijalankan")
+        if len(self._jobs) >= self.max_pending:
+            raise QueueFullError("Antrian job penuh, coba lagi nanti")
+        job_id = uuid.uuid4().hex[:12]
+        self._jobs[job_id] = (job_type, func, args, kwargs)
+        self._update(job_id, {
+            "job_id": job_id,
+            "type": job_type,
+            "priority": priority,
+            "status": "queued",
+            "created_at": time.time(),
+        })
+        self._queue.put_nowait((priority, next(self._counter), job_id))
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        return self.store.get(job_id)
+
+    async def wait_for_change(self, job_id: str, last_status: str = None, timeout: float = 30.0,
+                              interval: float = 0.5) -> Optional[dict]:
+        """Tunggu sampai status job berubah dari last_status (dipakai untuk subscribe/SSE)."""
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["status"] != last_status or time.monotonic() >= deadline:
+                return job
+            await asyncio.sleep(interval)
+
+    def _update(self, job_id: str, fields: dict):
+        job = self.store.get(job_id) or {}
+        job.update(fields)
+        self.store.set(job_id, job)
+
+    def _has_slot(self, job_type: str) -> bool:
+        limit = self.type_limits.get(job_type)
+        return limit is None or self._running.get(job_type, 0) < limit
+
+    def _release(self, job_type: str):
+        self._running[job_type] -= 1
+        deferred = self._deferred.get(job_type)
+        if deferred:
+            self._queue.put_nowait(deferred.popleft())
+
+    async def _worker(self, worker_id: int):
+        while True:
+            entry = await self._queue.get()
+            job_id = entry[2]
+            job_type, func, args, kwargs = self._jobs[job_id]
+            if not self._has_slot(job_type):
+                # Jenis job ini sedang penuh; tunda tanpa memblokir job lain
+                self._deferred.setdefault(job_type, deque()).append(entry)
+                continue
+            self._running[job_type] = self._running.get(job_type, 0) + 1
+            started_at = time.time()
+            try:
+                self._update(job_id, {"status": "running", "started_at": started_at})
+                result = await self._run(job_type, func, args, kwargs)
+                self._update(job_id, {"status": "done", "result": result, "finished_at": time.time()})
+            except Exception as e:
+                logger.error(f"Job {job_id} ({job_type}) failed: {str(e)}")
+                detail = getattr(e, "detail", None) or str(e)
+                self._update(job_id, {"status": "error", "error": detail, "finished_at": time.time()})
+            finally:
+                self._jobs.pop(job_id, None)
+                self._release(job_type)
+            logger.info(f"Job {job_id} ({job_type}) finished in {time.time() - started_at:.2f}s on worker {worker_id}")
+
+    async def _run(self, job_type: str, func: Callable, args: tuple, kwargs: dict) -> Any:
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args, **kwargs)
+        return await run_in_pool(JOB_TYPE_POOLS.get(job_type, POOL_DEFAULT), func, *args, **kwargs)
+
+
+job_queue = JobQueue()
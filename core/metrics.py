@@ -0,0 +1,192 @@
+import time
+import threading
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Callable
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Daftar (stage, detik) untuk request yang sedang berjalan, dipakai untuk header Server-Timing
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple) -> str:
+    if not key:
+        return ""
+    escaped = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in key]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._values = {}  # key -> [bucket_counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in self._values.items():
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram("bisacare_stage_seconds", "Durasi per tahap pemrosesan (OCR, encode, FAISS, LLM, Whisper, PDF)")
+REQUEST_SECONDS = Histogram("bisacare_request_seconds", "Durasi request HTTP per endpoint")
+CACHE_EVENTS = Counter("bisacare_cache_events_total", "Cache hit/miss per cache")
+LLM_TOKENS = Counter("bisacare_llm_tokens_total", "Jumlah token LLM (prompt/completion) per provider")
+LLM_CALLS = Counter("bisacare_llm_calls_total", "Jumlah panggilan LLM per provider dan status")
+PROMPT_TOKENS = Histogram("bisacare_prompt_tokens", "Ukuran prompt LLM (token, dihitung sebelum dikirim) per prompt",
+                          buckets=(64, 128, 256, 512, 1024, 2048, 4096, 8192))
+
+_metrics = [STAGE_SECONDS, REQUEST_SECONDS, CACHE_EVENTS, LLM_TOKENS, LLM_CALLS, PROMPT_TOKENS]
+_collectors = []  # fungsi tanpa argumen yang mengembalikan list baris eksposisi Prometheus
+
+
+def register_collector(func: Callable):
+    """Daftarkan fungsi yang menghasilkan baris metrik saat /metrics di-scrape (misal gauge pool)."""
+    _collectors.append(func)
+    return func
+
+
+def gauge_lines(name: str, help_text: str, values: dict) -> list:
+    """values: {tuple label (key, value) -> angka}."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+    for key, value in values.items():
+        lines.append(f"{name}{_format_labels(key)} {value}")
+    return lines
+
+
+def record_stage(stage: str, seconds: float, **labels):
+    STAGE_SECONDS.observe(seconds, stage=stage, **labels)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timer(stage: str, **labels):
+    """Context manager untuk mengukur satu tahap: `with timer("ocr"): ...`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start, **labels)
+
+
+def timed(stage: str, **labels):
+    """Decorator versi timer()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def llm_call(provider: str, stage: str = None):
+    """timer() untuk panggilan LLM; exception dihitung di bisacare_llm_calls_total{status="error"} lalu diteruskan."""
+    with timer(stage or provider):
+        try:
+            yield
+        except Exception:
+            record_llm_usage(provider, status="error")
+            raise
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_EVENTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_llm_usage(provider: str, prompt_tokens: int = 0, completion_tokens: int = 0, status: str = "ok"):
+    LLM_CALLS.inc(provider=provider, status=status)
+    if prompt_tokens:
+        LLM_TOKENS.inc(prompt_tokens, provider=provider, kind="prompt")
+    if completion_tokens:
+        LLM_TOKENS.inc(completion_tokens, provider=provider, kind="completion")
+
+
+def record_prompt_tokens(prompt: str, tokens: int):
+    PROMPT_TOKENS.observe(tokens, prompt=prompt)
+
+
+def record_gemini_response(response_json: dict):
+    usage = response_json.get("usageMetadata") or {}
+    record_llm_usage("gemini", usage.get("promptTokenCount", 0), usage.get("candidatesTokenCount", 0))
+
+
+def record_hf_response(response, provider: str = "hf_inference"):
+    usage = getattr(response, "usage", None)
+    record_llm_usage(provider, getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0)
+
+
+def start_request_timing():
+    """Mulai pengumpulan Server-Timing untuk request saat ini; kembalikan token untuk reset."""
+    return _request_timings.set([])
+
+
+def finish_request_timing(token) -> str:
+    """Kembalikan nilai header Server-Timing (durasi per tahap dijumlahkan) lalu reset context."""
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={1000 * seconds:.1f}" for stage, seconds in totals.items())
+
+
+def render_prometheus() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            lines.extend(collector())
+        except Exception:
+            continue
+    return "\n".join(lines) + "\n"
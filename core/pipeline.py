@@ -0,0 +1,131 @@
+"""
+Orkestrator pipeline berbentuk DAG: tiap tahap berjalan di pool executor-nya segera setelah semua
+dependensinya selesai, sehingga tahap yang independen berjalan bersamaan dan total latensi mendekati
+critical path. Hasil tiap tahap dimemo per run_id (misal ID klaim) beserta fingerprint input-nya:
+menjalankan ulang run yang sama hanya mengeksekusi tahap yang inputnya berubah.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from core.executors import run_in_pool, POOL_DEFAULT
+from core.metrics import timer
+from core.result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+STATUS_DONE = "done"
+STATUS_CACHED = "cached"
+STATUS_SKIPPED = "skipped"
+STATUS_ERROR = "error"
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    func(ctx) dijalankan di pool; ctx berisi input run (hanya yang disebut di inputs) dan hasil deps.
+    when(ctx) -> False membuat tahap dilewati (hasil None). version diganti saat logika tahap berubah
+    agar hasil memo lama tidak dipakai.
+    """
+    name: str
+    func: Callable[[dict], Any]
+    deps: Tuple[str, ...] = ()
+    inputs: Tuple[str, ...] = ()
+    pool: str = POOL_DEFAULT
+    when: Optional[Callable[[dict], bool]] = None
+    version: str = "1"
+
+
+def _digest(value: Any) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    if isinstance(value, (bytes, bytearray)):
+        h.update(value)
+    else:
+        h.update(json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+@dataclass
+class Pipeline:
+    name: str
+    stages: Dict[str, Stage] = field(default_factory=dict)
+    store: ResultStore = None
+
+    def __post_init__(self):
+        self.store = self.store or ResultStore(f"pipeline:{self.name}")
+
+    def add(self, stage: Stage) -> "Pipeline":
+        missing = [dep for dep in stage.deps if dep not in self.stages]
+        if missing:
+            raise ValueError(f"Tahap {stage.name} bergantung pada tahap yang belum didefinisikan: {', '.join(missing)}")
+        self.stages[stage.name] = stage
+        return self
+
+    def fingerprint(self, stage: Stage, inputs: dict, dep_fingerprints: dict) -> str:
+        return _digest([stage.name, stage.version,
+                        {key: _digest(inputs.get(key)) for key in stage.inputs},
+                        [dep_fingerprints[dep] for dep in stage.deps]])
+
+    def memo(self, run_id: str) -> dict:
+        """Hasil tahap yang tersimpan untuk run_id: {tahap: {"fingerprint", "status", "result"}}."""
+        return {name: entry for name in self.stages
+                if (entry := self.store.get(f"{run_id}:{name}")) is not None}
+
+    async def stream(self, run_id: str, inputs: dict) -> AsyncIterator[dict]:
+        """
+        Jalankan semua tahap dan yield event per tahap begitu selesai:
+        {"stage", "status": done|cached|skipped|error, "result"/"error", "seconds"}.
+        Tahap yang dependensinya error ikut berstatus error (tanpa dijalankan).
+        """
+        events = asyncio.Queue()
+        results, fingerprints, statuses = {}, {}, {}
+        finished = {name: asyncio.Event() for name in self.stages}
+
+        async def run_stage(stage: Stage):
+            for dep in stage.deps:
+                await finished[dep].wait()
+            fingerprints[stage.name] = self.fingerprint(stage, inputs, fingerprints)
+            ctx = {key: inputs.get(key) for key in stage.inputs}
+            ctx.update({dep: results.get(dep) for dep in stage.deps})
+            event = {"stage": stage.name}
+            t0 = time.perf_counter()
+            try:
+                if any(statuses[dep] == STATUS_ERROR for dep in stage.deps):
+                    status, result = STATUS_ERROR, None
+                    event["error"] = "dependensi gagal"
+                elif stage.when is not None and not stage.when(ctx):
+                    status, result = STATUS_SKIPPED, None
+                else:
+                    cached = self.store.get(f"{run_id}:{stage.name}")
+                    if cached is not None and cached["fingerprint"] == fingerprints[stage.name]:
+                        status, result = STATUS_CACHED, cached["result"]
+                    else:
+                        with timer(f"pipeline_{stage.name}"):
+                            result = await run_in_pool(stage.pool, stage.func, ctx)
+                        status = STATUS_DONE
+                        self.store.set(f"{run_id}:{stage.name}", {
+                            "fingerprint": fingerprints[stage.name], "status": status, "result": result
+                        })
+            except Exception as e:
+                logger.error(f"Pipeline {self.name} stage {stage.name} failed: {str(e)}")
+                status, result = STATUS_ERROR, None
+                event["error"] = str(e)
+            results[stage.name], statuses[stage.name] = result, status
+            finished[stage.name].set()
+            event.update({"status": status, "result": result, "seconds": round(time.perf_counter() - t0, 3)})
+            await events.put(event)
+
+        tasks = [asyncio.create_task(run_stage(stage)) for stage in self.stages.values()]
+        try:
+            for _ in tasks:
+                yield await events.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def run(self, run_id: str, inputs: dict) -> dict:
+        """Versi non-streaming: tunggu semua tahap, kembalikan {tahap: event}."""
+        return {event["stage"]: event async for event in self.stream(run_id, inputs)}
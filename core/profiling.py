@@ -0,0 +1,183 @@
+import os
+import sys
+import hmac
+import time
+import threading
+import contextvars
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+load_dotenv()
+# Profiling hanya aktif jika PROFILING_ENABLED=1 dan ADMIN_TOKEN diisi; selain itu tidak ada hook yang dipasang
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1" and bool(ADMIN_TOKEN)
+PROFILE_HEADER = "X-Debug-Profile"
+ADMIN_HEADER = "X-Admin-Token"
+MAX_SAMPLE_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+
+# Path file yang dianggap bagian dari jalur embedding / Whisper untuk laporan tracemalloc
+TRACEMALLOC_PATHS = {
+    "embedding": ("sentence_transformers", "transformers", "torch", "faiss", "tokenizers",
+                  "hospital_recommender", "insurance_recommender", "rag/retriever"),
+    "whisper": ("whisper", "transformers", "torch", "librosa", "soundfile", "keluhanmu_bisa_diklaim",
+                "hasil_diagnosis_dokter"),
+}
+
+# Kumpulan thread id yang sedang mengerjakan request yang diprofil
+_profile_threads = contextvars.ContextVar("profile_threads", default=None)
+
+
+def is_admin_token(token: str) -> bool:
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token or "", ADMIN_TOKEN)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for marker in ("site-packages/", "dist-packages/"):
+        if marker in filename:
+            filename = filename.split(marker, 1)[1]
+            break
+    else:
+        filename = os.path.relpath(filename) if os.path.isabs(filename) else filename
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+def _folded_stack(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class StackSampler:
+    """
+    Sampling stack semua thread (atau subset thread) secara periodik dan hasilkan
+    format folded stacks yang bisa langsung dipakai flamegraph.pl / speedscope.
+    """
+
+    def __init__(self, interval: float = 0.01, thread_filter=None):
+        self.interval = interval
+        self.thread_filter = thread_filter
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self):
+        own_ident = threading.get_ident()
+        names = {}
+        while not self._stop.is_set():
+            allowed = self.thread_filter() if self.thread_filter else None
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident or (allowed is not None and ident not in allowed):
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                self.samples[f"{names.get(ident, ident)};{_folded_stack(frame)}"] += 1
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+
+def sample_process(seconds: float, interval: float = 0.01) -> str:
+    """Sampling seluruh proses selama `seconds` detik (blocking; jalankan di luar event loop)."""
+    sampler = StackSampler(interval)
+    sampler.start()
+    time.sleep(min(seconds, MAX_SAMPLE_SECONDS))
+    return sampler.stop()
+
+
+@contextmanager
+def track_thread():
+    """Daftarkan thread saat ini ke request yang sedang diprofil (no-op jika tidak diprofil)."""
+    threads = _profile_threads.get()
+    if threads is None:
+        yield
+        return
+    ident = threading.get_ident()
+    threads.add(ident)
+    try:
+        yield
+    finally:
+        threads.discard(ident)
+
+
+class RequestProfile:
+    """Sampling stack khusus thread yang mengerjakan satu request (event loop + pool executor)."""
+
+    def __init__(self, interval: float = 0.005):
+        self.threads = {threading.get_ident()}
+        self.sampler = StackSampler(interval, thread_filter=lambda: set(self.threads))
+        self._token = None
+
+    def start(self):
+        self._token = _profile_threads.set(self.threads)
+        self.sampler.start()
+
+    def stop(self) -> str:
+        _profile_threads.reset(self._token)
+        return self.sampler.stop()
+
+
+# ---------------------------------------------------------------------------
+# tracemalloc
+# ---------------------------------------------------------------------------
+
+_baseline_snapshot = None
+
+
+def tracemalloc_start(nframes: int = 25):
+    global _baseline_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(nframes)
+    _baseline_snapshot = tracemalloc.take_snapshot()
+
+
+def tracemalloc_stop():
+    global _baseline_snapshot
+    _baseline_snapshot = None
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def tracemalloc_report(path: str = "", top: int = 30) -> dict:
+    """Top alokasi (dan selisih terhadap baseline saat start) untuk jalur embedding/whisper atau semua."""
+    if not tracemalloc.is_tracing():
+        return {"tracing": False}
+    snapshot = tracemalloc.take_snapshot()
+    patterns = TRACEMALLOC_PATHS.get(path)
+    if patterns:
+        filters = [tracemalloc.Filter(True, f"*{p}*") for p in patterns]
+        snapshot = snapshot.filter_traces(filters)
+    current, peak = tracemalloc.get_traced_memory()
+    stats = snapshot.statistics("traceback")[:top]
+    report = {
+        "tracing": True,
+        "path": path or "all",
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "top": [{
+            "size_bytes": stat.size,
+            "count": stat.count,
+            "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+        } for stat in stats],
+    }
+    if _baseline_snapshot is not None:
+        baseline = _baseline_snapshot.filter_traces(filters) if patterns else _baseline_snapshot
+        report["diff_since_start"] = [{
+            "size_diff_bytes": stat.size_diff,
+            "count_diff": stat.count_diff,
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+        } for stat in snapshot.compare_to(baseline, "lineno")[:top]]
+    return report
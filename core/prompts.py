@@ -0,0 +1,95 @@
+"""
+Penyusun prompt LLM yang hemat token: hanya field yang dibutuhkan analisis, field kosong dibuang,
+spasi dipadatkan, dan teks panjang (OCR, transkrip, riwayat chat) dipotong ke budget token.
+Jumlah token per bagian dicatat ke log dan metrik bisacare_prompt_tokens.
+"""
+import os
+import logging
+from dotenv import load_dotenv
+from core.metrics import record_prompt_tokens
+from core.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Budget token untuk teks OCR mentah (dipakai hanya jika hasil parsing KTP/polis kosong)
+PROMPT_OCR_TOKENS = int(os.getenv("PROMPT_OCR_TOKENS", "300"))
+# Budget token per nilai teks panjang lain (hasil OCR/transkrip diagnosis, pesan chat)
+PROMPT_TEXT_TOKENS = int(os.getenv("PROMPT_TEXT_TOKENS", "400"))
+
+EMPTY_VALUES = (None, "", "null", "None")
+
+
+def compact_text(text) -> str:
+    """Padatkan semua whitespace (baris baru, tab, spasi ganda) menjadi satu spasi."""
+    return " ".join(str(text).split())
+
+
+def is_empty(value) -> bool:
+    if isinstance(value, (dict, list)):
+        return not value
+    return value in EMPTY_VALUES or (isinstance(value, str) and not value.strip())
+
+
+def slim(data, fields: tuple = None):
+    """Salin data dengan hanya fields (jika diberikan), tanpa nilai kosong, secara rekursif."""
+    if isinstance(data, dict):
+        items = ((key, data.get(key)) for key in fields) if fields else data.items()
+        slimmed = {key: slim(value) for key, value in items}
+        return {key: value for key, value in slimmed.items() if not is_empty(value)}
+    if isinstance(data, list):
+        return [value for value in (slim(v) for v in data) if not is_empty(value)]
+    return data
+
+
+def render_fields(data, max_tokens: int = PROMPT_TEXT_TOKENS, prefix: str = "") -> str:
+    """
+    Render dict sebagai baris "kunci: nilai" (dict bersarang jadi kunci.anak), jauh lebih ringkas
+    daripada json.dumps(indent=2). Nilai teks dipadatkan dan dipotong ke max_tokens.
+    """
+    if not isinstance(data, dict):
+        return truncate_to_tokens(compact_text(data), max_tokens) if not is_empty(data) else ""
+    lines = []
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            lines.append(render_fields(value, max_tokens, prefix=f"{name}."))
+        elif isinstance(value, list):
+            lines.append(f"{name}: " + "; ".join(truncate_to_tokens(compact_text(v), max_tokens) for v in value))
+        else:
+            lines.append(f"{name}: {truncate_to_tokens(compact_text(value), max_tokens)}")
+    return "\n".join(line for line in lines if line)
+
+
+class PromptBuilder:
+    """
+    Susun prompt per bagian: builder.add("Judul", teks) lalu builder.build(instruksi).
+    Setelah build, builder.tokens berisi jumlah token per bagian dan total ("prompt").
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.sections = []
+        self.tokens = {}
+
+    def add(self, title: str, text, max_tokens: int = None) -> "PromptBuilder":
+        if is_empty(text):
+            return self
+        text = text if isinstance(text, str) else render_fields(text)
+        if max_tokens is not None:
+            text = truncate_to_tokens(compact_text(text), max_tokens)
+        if text:
+            self.sections.append((title, text))
+        return self
+
+    def add_fields(self, title: str, data, fields: tuple = None) -> "PromptBuilder":
+        return self.add(title, render_fields(slim(data, fields)))
+
+    def build(self, instruction: str) -> str:
+        blocks = [f"{title}:\n{text}" for title, text in self.sections]
+        prompt = "\n\n".join(blocks + [instruction.strip()])
+        self.tokens = {title: count_tokens(text) for title, text in self.sections}
+        self.tokens["prompt"] = count_tokens(prompt)
+        record_prompt_tokens(self.name, self.tokens["prompt"])
+        logger.info(f"Prompt {self.name}: {self.tokens['prompt']} tokens ({self.tokens})")
+        return prompt
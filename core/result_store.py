@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+from dotenv import load_dotenv
+from core.metrics import register_collector, gauge_lines, record_cache
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+RESULT_STORE_URL = os.getenv("RESULT_STORE_URL", "sqlite:///./data/result_store.db")
+RESULT_STORE_TTL = int(os.getenv("RESULT_STORE_TTL", "86400"))
+RESULT_STORE_MAX_ITEMS = int(os.getenv("RESULT_STORE_MAX_ITEMS", "1000"))
+RESULT_STORE_MAX_BYTES = int(os.getenv("RESULT_STORE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Interval pembersihan baris kedaluwarsa di backend SQLite (Redis menangani TTL sendiri)
+RESULT_STORE_PURGE_SECONDS = int(os.getenv("RESULT_STORE_PURGE_SECONDS", "600"))
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, (bytes, bytearray)):
+        return b"B" + bytes(value)
+    return b"J" + json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _decode(raw: bytes) -> Any:
+    if raw[:1] == b"B":
+        return raw[1:]
+    return json.loads(raw[1:].decode("utf-8"))
+
+
+class MemoryTier:
+    """LRU cache in-process dengan TTL dan batas jumlah item serta ukuran (bytes)."""
+
+    def __init__(self, max_items: int = RESULT_STORE_MAX_ITEMS, max_bytes: int = RESULT_STORE_MAX_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._items = OrderedDict()  # key -> (raw, expires_at)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            raw, expires_at = item
+            if expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return raw
+
+    def set(self, key: str, raw: bytes, expires_at: float):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            if len(raw) > self.max_bytes:
+                return
+            self._items[key] = (raw, expires_at)
+            self.current_bytes += len(raw)
+            self._evict()
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+
+    def _remove(self, key: str):
+        raw, _ = self._items.pop(key)
+        self.current_bytes -= len(raw)
+
+    def _evict(self):
+        now = time.time()
+        for key in [k for k, (_, exp) in self._items.items() if exp <= now]:
+            self._remove(key)
+            self.evictions += 1
+        while self._items and (len(self._items) > self.max_items or self.current_bytes > self.max_bytes):
+            key = next(iter(self._items))
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self.current_bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class SQLiteBackend:
+    """Backend durable berbasis SQLite (WAL mode) yang bisa dipakai bersama oleh beberapa worker."""
+
+    def __init__(self, path: str):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL, expires_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS results_expires ON results (expires_at)")
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM results WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return bytes(row[0]), row[1]
+
+    def set(self, namespace: str, key: str, raw: bytes, expires_at: float):
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO results (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, sqlite3.Binary(raw), expires_at),
+        )
+        conn.commit()
+
+    def delete(self, namespace: str, key: str):
+        conn = self._conn()
+        conn.execute("DELETE FROM results WHERE namespace = ? AND key = ?", (namespace, key))
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        cur = conn.execute("DELETE FROM results WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+        return cur.rowcount
+
+
+class RedisBackend:
+    """Backend Redis; TTL ditangani oleh Redis (PEXPIREAT)."""
+
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+
+    def get(self, namespace: str, key: str):
+        name = f"{namespace}:{key}"
+        pipe = self.client.pipeline()
+        pipe.get(name)
+        pipe.pttl(name)
+        raw, pttl = pipe.execute()
+        if raw is None:
+            return None
+        expires_at = time.time() + pttl / 1000 if pttl and pttl > 0 else time.time() + RESULT_STORE_TTL
+        return raw, expires_at
+
+    def set(self, namespace: str, key: str, raw: bytes, expires_at: float):
+        self.client.set(f"{namespace}:{key}", raw, pxat=int(expires_at * 1000))
+
+    def delete(self, namespace: str, key: str):
+        self.client.delete(f"{namespace}:{key}")
+
+    def purge_expired(self) -> int:
+        return 0
+
+
+def build_backend(url: str = RESULT_STORE_URL):
+    """Bangun backend dari URL: sqlite:///path/ke/file.db, redis://host:port/db, atau memory://"""
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBackend(url)
+    if url.startswith("memory://"):
+        return None
+    raise ValueError(f"RESULT_STORE_URL tidak dikenali: {url}")
+
+
+_shared_backend = None
+_shared_backend_lock = threading.Lock()
+
+
+def get_shared_backend():
+    global _shared_backend
+    with _shared_backend_lock:
+        if _shared_backend is None:
+            try:
+                _shared_backend = build_backend()
+            except Exception as e:
+                logger.error(f"Failed to initialize result store backend: {str(e)}")
+                _shared_backend = False
+        return _shared_backend or None
+
+
+class ResultStore:
+    """
+    Penyimpanan hasil per namespace: tier memori LRU+TTL di depan backend durable bersama.
+    """
+
+    def __init__(self, namespace: str, ttl: int = RESULT_STORE_TTL, memory: MemoryTier = ..., backend=...):
+        """
+        memory=None: tanpa tier memori, setiap get membaca backend (untuk data yang berubah di worker lain,
+        misal status job); tetap memakai MemoryTier jika tidak ada backend bersama.
+        """
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = get_shared_backend() if backend is ... else backend
+        if memory is ... or (memory is None and self.backend is None):
+            memory = MemoryTier()
+        self.memory = memory
+        _stores.append(self)
+
+    def set(self, key: str, value: Any, ttl: int = None):
+        raw = _encode(value)
+        expires_at = time.time() + (ttl or self.ttl)
+        if self.backend is not None:
+            try:
+                self.backend.set(self.namespace, key, raw, expires_at)
+            except Exception as e:
+                logger.error(f"Result store backend error on set: {str(e)}")
+        if self.memory is not None:
+            self.memory.set(key, raw, expires_at)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raw = self.memory.get(key) if self.memory is not None else None
+        if self.memory is not None:
+            record_cache(f"result_store_{self.namespace}", raw is not None)
+        if raw is None and self.backend is not None:
+            try:
+                found = self.backend.get(self.namespace, key)
+            except Exception as e:
+                logger.error(f"Result store backend error on get: {str(e)}")
+                found = None
+            if found is not None:
+                raw, expires_at = found
+                if self.memory is not None:
+                    self.memory.set(key, raw, expires_at)
+        if raw is None:
+            return default
+        return _decode(raw)
+
+    def delete(self, key: str):
+        if self.memory is not None:
+            self.memory.delete(key)
+        if self.backend is not None:
+            try:
+                self.backend.delete(self.namespace, key)
+            except Exception as e:
+                logger.error(f"Result store backend error on delete: {str(e)}")
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def stats(self) -> dict:
+        return {
+            "namespace": self.namespace,
+            "ttl": self.ttl,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "memory": self.memory.stats() if self.memory is not None else None,
+        }
+
+
+_stores = []
+
+
+def purge_expired() -> int:
+    """Hapus baris kedaluwarsa dari backend bersama; kembalikan jumlah baris yang dihapus."""
+    backend = get_shared_backend()
+    if backend is None:
+        return 0
+    try:
+        return backend.purge_expired()
+    except Exception as e:
+        logger.error(f"Result store backend error on purge: {str(e)}")
+        return 0
+
+
+@register_collector
+def _store_metrics() -> list:
+    stats = [store.stats() for store in _stores if store.memory is not None]
+    items = {(("namespace", s["namespace"]),): s["memory"]["items"] for s in stats}
+    size = {(("namespace", s["namespace"]),): s["memory"]["bytes"] for s in stats}
+    return (gauge_lines("bisacare_result_store_items", "Jumlah item di cache memori result store", items)
+            + gauge_lines("bisacare_result_store_bytes", "Ukuran cache memori result store (bytes)", size))
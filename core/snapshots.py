@@ -0,0 +1,383 @@
+"""
+Snapshot index berversi dengan hot-swap tanpa downtime.
+
+Tiap korpus (hospital, asuransi, rag) dibangun di proses terpisah ke direktori versi baru:
+    SNAPSHOT_ROOT/<korpus>/<versi>/   (index, metadata, manifest.json ditulis paling akhir)
+Versi aktif dicatat di SNAPSHOT_ROOT/<korpus>/state.json (ditulis atomik, dengan riwayat untuk rollback).
+
+Di dalam worker, SnapshotRegistry memegang satu objek CorpusSnapshot per korpus (read-copy-update):
+request mengambil referensi snapshot sekali di awal, snapshot baru dimuat penuh di background lalu
+referensinya ditukar. Request yang sedang berjalan tetap memakai snapshot lama sampai selesai.
+
+CLI:
+    python -m core.snapshots build hospital --activate
+    python -m core.snapshots list hospital
+    python -m core.snapshots activate hospital <versi>
+    python -m core.snapshots rollback hospital
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import shutil
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+SNAPSHOT_ROOT = os.getenv("SNAPSHOT_ROOT", "./data/snapshots")
+# Seberapa sering worker memeriksa state.json untuk versi aktif baru
+SNAPSHOT_POLL_SECONDS = float(os.getenv("SNAPSHOT_POLL_SECONDS", "5"))
+# Jumlah snapshot terbaru yang disimpan saat prune (versi aktif dan riwayat rollback tidak dihapus)
+SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", "5"))
+
+HOSPITAL_DATA_PATH = "daftar_rumah_sakit/preprocessed/daftar_rumah_sakit_all.json"
+HOSPITAL_MODEL_PATH = "daftar_rumah_sakit/app/models/st_model"
+ASURANSI_DATA_PATH = "daftar_asuransi/preprocessed/daftar_asuransi_all.json"
+ASURANSI_MODEL_PATH = "daftar_asuransi/app/models/st_model"
+RAG_DOCUMENTS_PATH = "./rag/documents"
+
+MANIFEST_FILE = "manifest.json"
+STATE_FILE = "state.json"
+
+
+@dataclass(frozen=True)
+class CorpusSnapshot:
+    """Satu versi korpus yang sudah dimuat; tidak pernah diubah setelah dibuat (aman dibaca bersamaan)."""
+    name: str
+    version: str
+    index: Any = None
+    model: Any = None
+    data: Any = None
+    columns: Optional[dict] = None
+    retriever: Any = None
+    manifest: dict = field(default_factory=dict)
+
+
+def corpus_dir(name: str) -> str:
+    return os.path.join(SNAPSHOT_ROOT, name)
+
+
+def snapshot_path(name: str, version: str) -> str:
+    return os.path.join(corpus_dir(name), version)
+
+
+def _write_json_atomic(path: str, payload: dict):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_manifest(name: str, version: str) -> Optional[dict]:
+    path = os.path.join(snapshot_path(name, version), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def list_snapshots(name: str) -> list:
+    """Manifest semua snapshot lengkap (yang punya manifest.json), terlama dulu."""
+    if not os.path.isdir(corpus_dir(name)):
+        return []
+    manifests = [read_manifest(name, v) for v in os.listdir(corpus_dir(name))
+                 if os.path.isdir(snapshot_path(name, v))]
+    return sorted((m for m in manifests if m), key=lambda m: m["created_at"])
+
+
+def read_state(name: str) -> dict:
+    path = os.path.join(corpus_dir(name), STATE_FILE)
+    if not os.path.exists(path):
+        return {"current": None, "history": []}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def activate(name: str, version: str) -> dict:
+    """Jadikan versi aktif (semua worker mengikuti dalam SNAPSHOT_POLL_SECONDS)."""
+    if read_manifest(name, version) is None:
+        raise ValueError(f"Snapshot {name}/{version} tidak ditemukan atau belum selesai dibangun")
+    state = read_state(name)
+    if state["current"] and state["current"] != version:
+        state["history"] = (state["history"] + [state["current"]])[-SNAPSHOT_KEEP:]
+    state["current"] = version
+    state["activated_at"] = time.time()
+    _write_json_atomic(os.path.join(corpus_dir(name), STATE_FILE), state)
+    logger.info(f"Snapshot {name}/{version} activated")
+    return state
+
+
+def rollback(name: str) -> dict:
+    """Kembali ke versi aktif sebelumnya."""
+    state = read_state(name)
+    history = [v for v in state["history"] if read_manifest(name, v) is not None]
+    if not history:
+        raise ValueError(f"Tidak ada versi sebelumnya untuk {name}")
+    state["current"] = history.pop()
+    state["history"] = history
+    state["activated_at"] = time.time()
+    _write_json_atomic(os.path.join(corpus_dir(name), STATE_FILE), state)
+    logger.info(f"Snapshot {name} rolled back to {state['current']}")
+    return state
+
+
+def prune(name: str, keep: int = SNAPSHOT_KEEP):
+    """Hapus snapshot lama. File yang masih di-mmap worker tetap valid sampai di-unmap (unlink di Linux)."""
+    state = read_state(name)
+    protected = {state["current"], *state["history"]}
+    for manifest in list_snapshots(name)[:-keep]:
+        if manifest["version"] not in protected:
+            shutil.rmtree(snapshot_path(name, manifest["version"]), ignore_errors=True)
+
+
+# --- Build & load per korpus (import di dalam fungsi: model dan index hanya dimuat saat dibutuhkan) ---
+
+_models = {}
+
+
+def _load_model(manifest: dict):
+    """Model yang sama (path + fingerprint) dipakai bersama antar snapshot, tidak dimuat ulang tiap swap."""
+    from core.embedding_cache import model_fingerprint
+    from daftar_rumah_sakit.data_processing import build_model
+    key = (manifest["model_path"], manifest["model_hash"])
+    model = _models.get(key)
+    if model is None:
+        model = build_model(manifest["model_path"])
+        if model_fingerprint(model) != manifest["model_hash"]:
+            raise ValueError(f"Model {manifest['model_path']} berbeda dengan model saat snapshot "
+                             f"{manifest['name']}/{manifest['version']} dibangun")
+        _models[key] = model
+    return model
+
+
+def build_hospital(path: str) -> dict:
+    from core.embedding_cache import model_fingerprint
+    from core.vector_index import build_vector_index, save_vector_index
+    from daftar_rumah_sakit.preprocessing import preprocessing_id
+    from daftar_rumah_sakit.data_processing import load_json, build_model, generate_embeddings, normalize
+    from daftar_rumah_sakit.columnar_store import build_columnar_store
+    from features.hospital_recommender.hospital_recommender import HOSPITAL_FIELDS
+    data = load_json(HOSPITAL_DATA_PATH)
+    model = build_model(HOSPITAL_MODEL_PATH)
+    embeddings = normalize(generate_embeddings([preprocessing_id(d["text"]) for d in data], model)).astype("float32")
+    save_vector_index(build_vector_index(embeddings), os.path.join(path, "index.faiss"), embeddings)
+    build_columnar_store(data, HOSPITAL_FIELDS, os.path.join(path, "columnar"))
+    return {"model_path": HOSPITAL_MODEL_PATH, "model_hash": model_fingerprint(model), "rows": len(data)}
+
+
+def load_hospital(path: str, manifest: dict) -> CorpusSnapshot:
+    from core.vector_index import load_vector_index
+    from daftar_rumah_sakit.columnar_store import load_columnar_store
+    store = load_columnar_store(os.path.join(path, "columnar"))
+    return CorpusSnapshot("hospital", manifest["version"], index=load_vector_index(os.path.join(path, "index.faiss")),
+                          model=_load_model(manifest), data=store, columns=store.columns, manifest=manifest)
+
+
+def build_asuransi(path: str) -> dict:
+    from core.embedding_cache import model_fingerprint
+    from core.vector_index import build_vector_index, save_vector_index
+    from daftar_rumah_sakit.data_processing import load_json, normalize
+    from daftar_asuransi.data_preprocessing import build_model, generate_embeddings, save_json
+    data = load_json(ASURANSI_DATA_PATH)
+    model = build_model(ASURANSI_MODEL_PATH)
+    embeddings = normalize(generate_embeddings([d["text"] for d in data], model)).astype("float32")
+    save_vector_index(build_vector_index(embeddings), os.path.join(path, "index.faiss"), embeddings)
+    save_json(data, os.path.join(path, "data.json"))
+    return {"model_path": ASURANSI_MODEL_PATH, "model_hash": model_fingerprint(model), "rows": len(data)}
+
+
+def load_asuransi(path: str, manifest: dict) -> CorpusSnapshot:
+    from core.vector_index import load_vector_index
+    from daftar_rumah_sakit.data_processing import load_json, to_columns
+    from features.insurance_recommender.insurance_recommender import ASURANSI_FIELDS
+    data = load_json(os.path.join(path, "data.json"))
+    return CorpusSnapshot("asuransi", manifest["version"], index=load_vector_index(os.path.join(path, "index.faiss")),
+                          model=_load_model(manifest), data=data, columns=to_columns(data, ASURANSI_FIELDS),
+                          manifest=manifest)
+
+
+def build_rag(path: str) -> dict:
+    from core.embedding_cache import model_fingerprint
+    from rag.retriever import SimpleRAGRetriever
+    retriever = SimpleRAGRetriever(documents_path=RAG_DOCUMENTS_PATH, index_path=os.path.join(path, "rag"))
+    if not retriever.is_available():
+        raise ValueError("Index RAG gagal dibangun (model atau dokumen tidak tersedia)")
+    return {"model_path": retriever.embeddings_model_name, "model_hash": model_fingerprint(retriever.embeddings_model),
+            "rows": len(retriever.documents)}
+
+
+def load_rag(path: str, manifest: dict) -> CorpusSnapshot:
+    from core.embedding_cache import model_fingerprint
+    from rag.retriever import SimpleRAGRetriever
+    # read_only: snapshot yang rusak/kedaluwarsa ditolak (ValueError), tidak dibangun ulang di worker
+    retriever = SimpleRAGRetriever(documents_path=RAG_DOCUMENTS_PATH, index_path=os.path.join(path, "rag"),
+                                   embeddings_model=manifest["model_path"], read_only=True)
+    if not retriever.is_available() or model_fingerprint(retriever.embeddings_model) != manifest["model_hash"]:
+        raise ValueError(f"Snapshot rag/{manifest['version']} tidak bisa dimuat atau model berbeda")
+    return CorpusSnapshot("rag", manifest["version"], retriever=retriever, model=retriever.embeddings_model,
+                          manifest=manifest)
+
+
+CORPORA = {
+    "hospital": (build_hospital, load_hospital),
+    "asuransi": (build_asuransi, load_asuransi),
+    "rag": (build_rag, load_rag),
+}
+
+
+def build_snapshot(name: str, activate_after: bool = False) -> str:
+    """Bangun snapshot baru (dipanggil dari proses builder terpisah, bukan dari worker API)."""
+    if name not in CORPORA:
+        raise ValueError(f"Korpus tidak dikenali: {name} (pilihan: {', '.join(CORPORA)})")
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    path = snapshot_path(name, version)
+    os.makedirs(path)
+    t0 = time.perf_counter()
+    try:
+        extra = CORPORA[name][0](path)
+    except Exception:
+        shutil.rmtree(path, ignore_errors=True)
+        raise
+    manifest = {"name": name, "version": version, "created_at": time.time(),
+                "build_seconds": round(time.perf_counter() - t0, 2), **extra}
+    # Manifest ditulis terakhir: snapshot tanpa manifest dianggap belum selesai
+    _write_json_atomic(os.path.join(path, MANIFEST_FILE), manifest)
+    logger.info(f"Snapshot {name}/{version} built in {manifest['build_seconds']}s")
+    if activate_after:
+        activate(name, version)
+        prune(name)
+    return version
+
+
+class SnapshotRegistry:
+    """
+    Pemegang snapshot aktif per korpus di satu worker (read-copy-update).
+    get() tidak pernah memblokir karena reload: versi baru dimuat di thread background lalu ditukar.
+    """
+
+    def __init__(self):
+        self._current: Dict[str, CorpusSnapshot] = {}
+        self._fallbacks: Dict[str, Callable[[], CorpusSnapshot]] = {}
+        self._checked_at: Dict[str, float] = {}
+        self._failed: Dict[str, str] = {}
+        self._loading = set()
+        self._lock = threading.Lock()
+        # Satu lock per korpus: reload dari background, admin endpoint, dan get() pertama tidak memuat bersamaan
+        self._reload_locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, fallback: Callable[[], CorpusSnapshot]):
+        """fallback dipakai jika belum ada snapshot aktif (file index lama di repo)."""
+        self._fallbacks[name] = fallback
+        self._reload_locks[name] = threading.Lock()
+
+    def _load(self, name: str, version: Optional[str]) -> CorpusSnapshot:
+        if version is None:
+            return self._fallbacks[name]()
+        manifest = read_manifest(name, version)
+        if manifest is None:
+            raise ValueError(f"Snapshot {name}/{version} tidak ditemukan")
+        return CORPORA[name][1](snapshot_path(name, version), manifest)
+
+    def reload(self, name: str) -> CorpusSnapshot:
+        """Muat versi aktif (blocking) lalu tukar referensinya. Gagal muat = snapshot lama tetap dipakai."""
+        with self._reload_locks[name]:
+            version = read_state(name)["current"]
+            current = self._current.get(name)
+            if current is not None and current.version == (version or "legacy"):
+                return current
+            t0 = time.perf_counter()
+            snapshot = self._load(name, version)
+            self._current[name] = snapshot
+            logger.info(f"Index {name} swapped to {snapshot.version} (loaded in {time.perf_counter() - t0:.1f}s)")
+            return snapshot
+
+    def _load_fallback(self, name: str) -> CorpusSnapshot:
+        with self._reload_locks[name]:
+            snapshot = self._current.get(name)
+            if snapshot is None:
+                snapshot = self._fallbacks[name]()
+                self._current[name] = snapshot
+            return snapshot
+
+    def _reload_in_background(self, name: str):
+        try:
+            self.reload(name)
+        except Exception as e:
+            self._failed[name] = read_state(name)["current"] or "legacy"
+            logger.error(f"Failed to load snapshot for {name}, keeping {self.version(name)}: {str(e)}")
+        finally:
+            with self._lock:
+                self._loading.discard(name)
+
+    def _maybe_refresh(self, name: str):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked_at.get(name, 0) < SNAPSHOT_POLL_SECONDS or name in self._loading:
+                return
+            self._checked_at[name] = now
+            version = read_state(name)["current"] or "legacy"
+            if version == self.version(name) or version == self._failed.get(name):
+                return
+            self._loading.add(name)
+        threading.Thread(target=self._reload_in_background, args=(name,), daemon=True).start()
+
+    def get(self, name: str) -> CorpusSnapshot:
+        """Snapshot aktif; ambil sekali per request dan pakai referensi yang sama sampai selesai."""
+        snapshot = self._current.get(name)
+        if snapshot is None:
+            with self._lock:
+                self._checked_at[name] = time.monotonic()
+            try:
+                return self.reload(name)
+            except Exception as e:
+                version = read_state(name)["current"]
+                if version is None:
+                    # Yang gagal adalah index lama itu sendiri; jangan dicoba dua kali
+                    raise
+                # Snapshot aktif rusak/tidak cocok: layani dari index lama daripada gagal start
+                self._failed[name] = version
+                logger.error(f"Failed to load active snapshot for {name}, using legacy index: {str(e)}")
+                return self._load_fallback(name)
+        self._maybe_refresh(name)
+        return snapshot
+
+    def version(self, name: str) -> Optional[str]:
+        snapshot = self._current.get(name)
+        return snapshot.version if snapshot else None
+
+
+index_registry = SnapshotRegistry()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Snapshot index berversi")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Bangun snapshot baru")
+    build.add_argument("corpus", choices=list(CORPORA))
+    build.add_argument("--activate", action="store_true", help="Aktifkan setelah selesai dibangun")
+    for command in ("list", "rollback"):
+        sub.add_parser(command).add_argument("corpus", choices=list(CORPORA))
+    activate_cmd = sub.add_parser("activate")
+    activate_cmd.add_argument("corpus", choices=list(CORPORA))
+    activate_cmd.add_argument("version")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        print(build_snapshot(args.corpus, args.activate))
+    elif args.command == "list":
+        print(json.dumps({"state": read_state(args.corpus), "snapshots": list_snapshots(args.corpus)}, indent=2))
+    elif args.command == "activate":
+        print(json.dumps(activate(args.corpus, args.version), indent=2))
+    else:
+        print(json.dumps(rollback(args.corpus), indent=2))
+    sys.exit(0)
@@ -0,0 +1,61 @@
+import os
+import logging
+from functools import lru_cache
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Tokenizer HF untuk menghitung budget prompt (misal repo Gemma yang vocab-nya sama dengan Gemini; model gated
+# butuh HF_TOKEN yang sudah menyetujui lisensinya). Kosong (default) = perkiraan CHARS_PER_TOKEN, tanpa unduhan.
+LLM_TOKENIZER = os.getenv("LLM_TOKENIZER", "")
+# Perkiraan jika tokenizer tidak bisa dimuat (teks Indonesia rata-rata ~3.5 karakter per token)
+CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "3.5"))
+
+
+@lru_cache(maxsize=8)
+def get_tokenizer(name: str = None):
+    """Tokenizer HF (fast) untuk nama model; None jika tidak dikonfigurasi atau gagal dimuat (misal model gated tanpa HF_TOKEN)."""
+    name = name or LLM_TOKENIZER
+    if not name:
+        return None
+    try:
+        from transformers import AutoTokenizer
+        return AutoTokenizer.from_pretrained(name, token=os.getenv("HF_TOKEN"))
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer {name}, using character estimate: {str(e)}")
+        return None
+
+
+def load_tokenizer():
+    """Muat LLM_TOKENIZER saat startup agar tidak diunduh di dalam request pertama."""
+    if LLM_TOKENIZER:
+        get_tokenizer(LLM_TOKENIZER)
+
+
+def count_tokens(text: str, tokenizer_name: str = None) -> int:
+    if not text:
+        return 0
+    tokenizer = get_tokenizer(tokenizer_name or LLM_TOKENIZER)
+    if tokenizer is None:
+        return int(len(text) / CHARS_PER_TOKEN) + 1
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, tokenizer_name: str = None) -> str:
+    """Potong teks agar maksimal max_tokens token, di batas spasi terdekat sebelum titik potong."""
+    if max_tokens <= 0 or not text:
+        return ""
+    tokenizer = get_tokenizer(tokenizer_name or LLM_TOKENIZER)
+    if tokenizer is None:
+        cut = int(max_tokens * CHARS_PER_TOKEN)
+    else:
+        encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+        offsets = encoded["offset_mapping"]
+        if len(offsets) <= max_tokens:
+            return text
+        cut = offsets[max_tokens][0]
+    if cut >= len(text):
+        return text
+    space = text.rfind(" ", 0, cut)
+    return text[:space if space > cut // 2 else cut].rstrip()
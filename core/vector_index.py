@@ -0,0 +1,237 @@
+"""
+Build/load index FAISS dengan penyimpanan vektor ringkas (SQ fp16/int8 atau PQ) plus re-ranking
+eksak opsional dari vektor fp32 yang disimpan di file samping (`<index>.fp32.npy`, dibuka via mmap).
+
+INDEX_STORAGE menentukan jenis index saat build: flat (default), sqfp16, sq8, pq.
+INDEX_RERANK_FACTOR: kandidat yang diambil = k * faktor lalu diurutkan ulang dengan jarak fp32 (0 = nonaktif).
+
+Laporan trade-off dan konversi index yang sudah ada (tanpa encode ulang):
+    python -m core.vector_index report daftar_asuransi/app/embeddings/asuransi_st.index
+    python -m core.vector_index convert daftar_asuransi/app/embeddings/asuransi_st.index --storage sq8
+"""
+import os
+import sys
+import time
+import json
+import logging
+import argparse
+import numpy as np
+import faiss
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+INDEX_STORAGE = os.getenv("INDEX_STORAGE", "flat")
+INDEX_RERANK_FACTOR = int(os.getenv("INDEX_RERANK_FACTOR", "4"))
+# Muat index via mmap agar semua worker uvicorn berbagi satu salinan fisik (page cache)
+INDEX_MMAP = os.getenv("INDEX_MMAP", "1") == "1"
+
+STORAGES = ("flat", "sqfp16", "sq8", "pq")
+FP32_SUFFIX = ".fp32.npy"
+
+
+def storage_factory(storage: str, dim: int, n: int) -> str:
+    if storage == "flat":
+        return "Flat"
+    if storage == "sqfp16":
+        return "SQfp16"
+    if storage == "sq8":
+        return "SQ8"
+    if storage == "pq":
+        # PQ butuh minimal 256 vektor per centroid (nbits=8); korpus kecil turun ke SQ8
+        if n < 256 * 39:
+            logger.warning(f"Korpus {n} vektor terlalu kecil untuk PQ, memakai SQ8")
+            return "SQ8"
+        m = next(m for m in (dim // 8, dim // 4, dim // 2, dim) if m and dim % m == 0)
+        return f"PQ{m}"
+    raise ValueError(f"INDEX_STORAGE tidak dikenali: {storage} (pilihan: {', '.join(STORAGES)})")
+
+
+def build_vector_index(embeddings: np.ndarray, storage: str = None, metric: int = faiss.METRIC_L2):
+    """Bangun index dari embedding fp32 dengan jenis penyimpanan sesuai storage/INDEX_STORAGE."""
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n, dim = embeddings.shape
+    index = faiss.index_factory(dim, storage_factory(storage or INDEX_STORAGE, dim, n), metric)
+    if not index.is_trained:
+        index.train(embeddings)
+    index.add(embeddings)
+    return index
+
+
+def is_flat(index) -> bool:
+    return isinstance(faiss.downcast_index(index), faiss.IndexFlat)
+
+
+def save_vector_index(index, output_path: str, embeddings: np.ndarray = None):
+    """Simpan index; untuk index terkompresi, vektor fp32 disimpan di samping untuk re-ranking."""
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    # Tulis ke file sementara lalu os.replace: worker yang sedang me-mmap file lama tetap aman
+    faiss.write_index(index, output_path + ".tmp")
+    fp32_path = output_path + FP32_SUFFIX
+    if embeddings is not None and not is_flat(index):
+        np.save(fp32_path + ".tmp.npy", np.ascontiguousarray(embeddings, dtype="float32"))
+        os.replace(fp32_path + ".tmp.npy", fp32_path)
+    os.replace(output_path + ".tmp", output_path)
+    if (embeddings is None or is_flat(index)) and os.path.exists(fp32_path):
+        os.remove(fp32_path)
+
+
+class RerankIndex:
+    """
+    Index terkompresi + re-ranking eksak: ambil k * rerank_factor kandidat dari index,
+    hitung ulang jaraknya dari vektor fp32 (mmap, hanya baris kandidat yang dibaca), lalu ambil top-k.
+    Atribut lain (ntotal, d, metric_type, ...) diteruskan ke index asli.
+    """
+
+    def __init__(self, index, vectors: np.ndarray, rerank_factor: int = INDEX_RERANK_FACTOR):
+        self.index = index
+        self.vectors = vectors
+        self.rerank_factor = rerank_factor
+        self.inner_product = index.metric_type == faiss.METRIC_INNER_PRODUCT
+
+    def __getattr__(self, name):
+        return getattr(self.index, name)
+
+    def search(self, queries: np.ndarray, k: int):
+        queries = np.ascontiguousarray(queries, dtype="float32")
+        n_candidates = min(self.index.ntotal, k * self.rerank_factor)
+        _, I = self.index.search(queries, n_candidates)
+        valid = I >= 0
+        candidates = self.vectors[np.where(valid, I, 0).ravel()].reshape(I.shape + (-1,))
+        if self.inner_product:
+            scores = np.einsum("qd,qcd->qc", queries, candidates)
+            scores[~valid] = -np.inf
+            order = np.argsort(-scores, axis=1)[:, :k]
+        else:
+            diff = candidates - queries[:, None, :]
+            scores = np.einsum("qcd,qcd->qc", diff, diff)
+            scores[~valid] = np.inf
+            order = np.argsort(scores, axis=1)[:, :k]
+        D = np.take_along_axis(scores, order, axis=1).astype("float32")
+        I = np.take_along_axis(I, order, axis=1)
+        # Padding sama dengan faiss: index -1 dengan jarak terburuk yang masih finite (bukan NaN/inf, aman di JSON)
+        worst = -np.finfo("float32").max if self.inner_product else np.finfo("float32").max
+        D[I < 0] = worst
+        if D.shape[1] < k:
+            D = np.pad(D, ((0, 0), (0, k - D.shape[1])), constant_values=worst)
+            I = np.pad(I, ((0, 0), (0, k - I.shape[1])), constant_values=-1)
+        return D, I
+
+    def reconstruct(self, i: int) -> np.ndarray:
+        return np.array(self.vectors[i])
+
+    def reconstruct_n(self, i0: int, n: int) -> np.ndarray:
+        return np.array(self.vectors[i0:i0 + n])
+
+
+def mmap_flags() -> int:
+    # IO_FLAG_MMAP_IFC (faiss >= 1.10) juga me-mmap kode IndexFlat/SQ/PQ; versi lama hanya inverted list IVF
+    if not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        logger.warning(f"faiss {faiss.__version__} has no IO_FLAG_MMAP_IFC: flat/SQ/PQ codes are loaded "
+                       "into each worker's memory instead of being shared (requires faiss-cpu>=1.10)")
+        return faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP
+    return faiss.IO_FLAG_READ_ONLY | faiss.IO_FLAG_MMAP_IFC
+
+
+def read_index(input_path: str, mmap: bool = None):
+    """faiss.read_index dengan mmap (read-only) jika INDEX_MMAP aktif; kembali ke pembacaan biasa jika gagal."""
+    if INDEX_MMAP if mmap is None else mmap:
+        try:
+            return faiss.read_index(input_path, mmap_flags())
+        except RuntimeError as e:
+            logger.warning(f"Failed to mmap {input_path}, reading into memory: {str(e)}")
+    return faiss.read_index(input_path)
+
+
+def load_vector_index(input_path: str, rerank: bool = True, mmap: bool = None):
+    """Muat index (mmap); jika terkompresi dan file fp32 tersedia, bungkus dengan RerankIndex."""
+    index = read_index(input_path, mmap)
+    fp32_path = input_path + FP32_SUFFIX
+    if rerank and INDEX_RERANK_FACTOR > 0 and not is_flat(index) and os.path.exists(fp32_path):
+        return RerankIndex(index, np.load(fp32_path, mmap_mode="r"))
+    return index
+
+
+def index_vectors(path: str) -> tuple:
+    """Vektor fp32 dari index yang ada (file samping jika ada, selain itu rekonstruksi dari index flat)."""
+    index = faiss.read_index(path)
+    fp32_path = path + FP32_SUFFIX
+    if os.path.exists(fp32_path):
+        return np.load(fp32_path), index.metric_type
+    if not is_flat(index):
+        raise ValueError(f"{path} sudah terkompresi dan tidak punya {fp32_path}; build ulang dari embedding")
+    return index.reconstruct_n(0, index.ntotal), index.metric_type
+
+
+def storage_report(path: str, storages: list = STORAGES, queries: int = 200, k: int = 10, seed: int = 42) -> list:
+    """Bandingkan ukuran, waktu build/load/search, dan recall@k (dengan/tanpa re-rank) tiap jenis penyimpanan."""
+    vectors, metric = index_vectors(path)
+    rng = np.random.default_rng(seed)
+    query_vectors = vectors[rng.choice(len(vectors), min(queries, len(vectors)), replace=False)]
+    k = min(k, len(vectors))
+    exact = build_vector_index(vectors, "flat", metric)
+    _, truth = exact.search(query_vectors, k)
+    tmp_dir = os.path.join(os.path.dirname(path) or ".", ".storage_report")
+    os.makedirs(tmp_dir, exist_ok=True)
+    rows = []
+    for storage in storages:
+        t0 = time.perf_counter()
+        index = build_vector_index(vectors, storage, metric)
+        build_s = time.perf_counter() - t0
+        tmp_path = os.path.join(tmp_dir, f"{storage}.index")
+        save_vector_index(index, tmp_path, vectors)
+        t0 = time.perf_counter()
+        faiss.read_index(tmp_path)
+        load_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        loaded = read_index(tmp_path, mmap=True)
+        load_mmap_s = time.perf_counter() - t0
+        row = {"storage": storage, "factory": storage_factory(storage, vectors.shape[1], len(vectors)),
+               "index_bytes": os.path.getsize(tmp_path), "build_s": round(build_s, 3),
+               "load_s": round(load_s, 4), "load_mmap_s": round(load_mmap_s, 4)}
+        variants = [("", loaded)]
+        if not is_flat(loaded):
+            variants.append(("_rerank", RerankIndex(loaded, np.load(tmp_path + FP32_SUFFIX, mmap_mode="r"))))
+        for suffix, candidate in variants:
+            t0 = time.perf_counter()
+            _, I = candidate.search(query_vectors, k)
+            search_s = time.perf_counter() - t0
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(I, truth)])
+            row[f"recall@{k}{suffix}"] = round(float(recall), 4)
+            row[f"search_ms_per_query{suffix}"] = round(1000 * search_s / len(query_vectors), 4)
+        rows.append(row)
+        del loaded, variants
+        for f in (tmp_path, tmp_path + FP32_SUFFIX):
+            if os.path.exists(f):
+                os.remove(f)
+    os.rmdir(tmp_dir)
+    return rows
+
+
+def convert_index(path: str, storage: str):
+    """Ubah index yang ada ke jenis penyimpanan lain di tempat (vektor fp32 disimpan di file samping)."""
+    vectors, metric = index_vectors(path)
+    save_vector_index(build_vector_index(vectors, storage, metric), path, vectors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build/laporan penyimpanan index FAISS")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="Laporan trade-off ukuran/recall/latensi per jenis penyimpanan")
+    report.add_argument("path")
+    report.add_argument("--storages", default=",".join(STORAGES))
+    report.add_argument("--queries", type=int, default=200)
+    report.add_argument("--k", type=int, default=10)
+    convert = sub.add_parser("convert", help="Konversi index yang ada ke jenis penyimpanan lain")
+    convert.add_argument("path")
+    convert.add_argument("--storage", required=True, choices=STORAGES)
+    args = parser.parse_args()
+
+    if args.command == "report":
+        rows = storage_report(args.path, [s for s in args.storages.split(",") if s], args.queries, args.k)
+        print(json.dumps(rows, indent=2))
+    else:
+        convert_index(args.path, args.storage)
+        print(f"{args.path} dikonversi ke {args.storage}", file=sys.stderr)
@@ -2,7 +2,6 @@ import os
 import numpy as np
 import json
 from sentence_transformers import SentenceTransformer
-import faiss
 from tqdm import tqdm
 from dotenv import load_dotenv
 
@@ -10,6 +9,9 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from daftar_rumah_sakit.preprocessing import preprocessing_id
+from core.embeddings import load_sentence_model
+from core.embedding_cache import cached_encode
+from core.vector_index import build_vector_index, save_vector_index
 
 from PyPDF2 import PdfReader  # pastikan sudah install: pip install PyPDF2
 
@@ -47,26 +49,24 @@ def save_json(data, output_path):
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 def generate_embeddings(texts, model):
-    embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
-    return embeddings
+    # Hanya teks baru/berubah yang di-encode; sisanya diambil dari cache embedding
+    return cached_encode(model, texts, batch_size=32, show_progress_bar=True)
 
 def build_model(model_path=None):
     if model_path and os.path.exists(model_path):
-        return SentenceTransformer(model_path)
+        return load_sentence_model(model_path)
     model = SentenceTransformer("all-MiniLM-L6-v2")
     if model_path:
         model.save(model_path)
+        return load_sentence_model(model_path)
     return model
 
 def build_faiss_index(embeddings):
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
-    return index
+    # Jenis penyimpanan (flat/sqfp16/sq8/pq) mengikuti INDEX_STORAGE
+    return build_vector_index(embeddings)
 
-def save_faiss_index(index, output_path):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    faiss.write_index(index, output_path)
+def save_faiss_index(index, output_path, embeddings=None):
+    save_vector_index(index, output_path, embeddings)
 
 def process_asuransi_data(folder_path, output_json, output_index, model_path=None):
     data = load_asuransi_json(folder_path)
@@ -76,7 +76,7 @@ def process_asuransi_data(folder_path, output_json, output_index, model_path=Non
     embeddings = generate_embeddings(text_list, model)
     embeddings = normalize(embeddings)
     index = build_faiss_index(embeddings)
-    save_faiss_index(index, output_index)
+    save_faiss_index(index, output_index, embeddings)
     print(f"Index saved to {output_index}")
     return data, index
 
@@ -0,0 +1,114 @@
+"""
+Penyimpanan metadata rumah sakit berbentuk kolom: tiap field disimpan sebagai tabel string
+unik (di-intern) dalam satu blob UTF-8 + array offset, dan array kode per baris.
+File dibuka dengan memory-map sehingga halaman dibagi antar worker dan startup tidak perlu parse JSON.
+
+Build:
+    python -m daftar_rumah_sakit.columnar_store preprocessed/daftar_rumah_sakit_all.json app/columnar/hospital
+"""
+import os
+import sys
+import json
+import numpy as np
+from daftar_rumah_sakit.data_processing import load_json
+
+META_FILE = "meta.json"
+
+
+def _intern(values: list):
+    """Kembalikan (codes int32, blob bytes, offsets int64); None disimpan sebagai kode -1."""
+    table = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        if value is None:
+            codes[i] = -1
+            continue
+        codes[i] = table.setdefault(str(value), len(table))
+    encoded = [s.encode("utf-8") for s in table]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return codes, b"".join(encoded), offsets
+
+
+def build_columnar_store(data: list, fields: dict, output_dir: str):
+    """Tulis store kolom dari list of dict. fields: {nama_field: nilai_default}."""
+    os.makedirs(output_dir, exist_ok=True)
+    for field, default in fields.items():
+        codes, blob, offsets = _intern([d.get(field, default) for d in data])
+        np.save(os.path.join(output_dir, f"{field}.codes.npy"), codes)
+        np.save(os.path.join(output_dir, f"{field}.offsets.npy"), offsets)
+        with open(os.path.join(output_dir, f"{field}.blob"), "wb") as f:
+            f.write(blob)
+    with open(os.path.join(output_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump({"rows": len(data), "fields": list(fields)}, f)
+
+
+class StringColumn:
+    """Satu kolom string: column[ids] mengembalikan object array dengan bentuk yang sama dengan ids."""
+
+    def __init__(self, codes: np.ndarray, blob: np.ndarray, offsets: np.ndarray):
+        self.codes = codes
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def _string(self, code: int):
+        # Sengaja tanpa cache: string di-decode dari halaman mmap bersama per lookup (np.unique di __getitem__
+        # sudah mencegah decode ganda dalam satu batch), jadi worker tidak menyimpan salinan tabel string sendiri
+        if code < 0:
+            return None
+        return bytes(self.blob[self.offsets[code]:self.offsets[code + 1]]).decode("utf-8")
+
+    def __getitem__(self, ids):
+        if np.isscalar(ids):
+            return self._string(int(self.codes[ids]))
+        codes = self.codes[np.asarray(ids)]
+        unique, inverse = np.unique(codes, return_inverse=True)
+        strings = np.empty(len(unique), dtype=object)
+        strings[:] = [self._string(int(c)) for c in unique]
+        return strings[inverse].reshape(codes.shape)
+
+
+class ColumnarStore:
+    """
+    Store metadata read-only hasil build_columnar_store. store.columns bisa langsung dipakai
+    gather_results; store[idx] mengembalikan dict sehingga kompatibel dengan kode yang memakai data[idx].get(...).
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.rows = meta["rows"]
+        self.columns = {}
+        for field in meta["fields"]:
+            codes = np.load(os.path.join(path, f"{field}.codes.npy"), mmap_mode="r")
+            offsets = np.load(os.path.join(path, f"{field}.offsets.npy"), mmap_mode="r")
+            blob_path = os.path.join(path, f"{field}.blob")
+            if os.path.getsize(blob_path):
+                blob = np.memmap(blob_path, dtype=np.uint8, mode="r")
+            else:
+                blob = np.zeros(0, dtype=np.uint8)
+            self.columns[field] = StringColumn(codes, blob, offsets)
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, idx: int) -> dict:
+        return {field: column[idx] for field, column in self.columns.items()}
+
+    def take(self, ids) -> dict:
+        """Fancy-index lookup untuk batch ID: {field: object array}."""
+        return {field: column[ids] for field, column in self.columns.items()}
+
+
+def load_columnar_store(path: str) -> ColumnarStore:
+    return ColumnarStore(path)
+
+
+if __name__ == "__main__":
+    from features.hospital_recommender.hospital_recommender import HOSPITAL_FIELDS
+    input_path, output_dir = sys.argv[1], sys.argv[2]
+    build_columnar_store(load_json(input_path), HOSPITAL_FIELDS, output_dir)
+    print(f"Columnar store saved to {output_dir}")
@@ -1,11 +1,14 @@
 import pandas as pd
 import numpy as np
 from sentence_transformers import SentenceTransformer
-import faiss
 import os
 import json
+from itertools import repeat
 from tqdm import tqdm
 from daftar_rumah_sakit.preprocessing import preprocessing_id
+from core.embeddings import load_sentence_model
+from core.embedding_cache import cached_encode
+from core.vector_index import build_vector_index, save_vector_index, load_vector_index
 
 def normalize(vectors):
     return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
@@ -15,30 +18,54 @@ def load_json(input_path: str) -> list:
         data = json.load(f)
     return data
 
+def to_columns(data: list, fields: dict) -> dict:
+    """
+    Ubah list of dict menjadi kolom NumPy (object array) per field agar hasil pencarian
+    bisa dirakit dengan fancy indexing. fields: {nama_field: nilai_default}.
+    """
+    columns = {}
+    for field, default in fields.items():
+        column = np.empty(len(data), dtype=object)
+        column[:] = [d.get(field, default) for d in data]
+        columns[field] = column
+    return columns
+
+def gather_results(columns: dict, I: np.ndarray, D: np.ndarray, top_ns: list) -> list:
+    """
+    Rakit hasil untuk banyak query sekaligus dari hasil index.search (I, D berbentuk [n_query, k]).
+    Index -1 (hasil kurang dari k) dibuang; top_ns membatasi jumlah hasil per query.
+    """
+    valid = I >= 0
+    safe = np.where(valid, I, 0)
+    keys = list(columns) + ['score']
+    picked = [columns[field][safe].tolist() for field in columns] + [D.astype(float).tolist()]
+    counts = valid.sum(axis=1).tolist()
+    # Per query: potongan kolom di-zip menjadi baris lewat dict(zip(keys, values)), tanpa loop per field di Python
+    return [list(map(dict, map(zip, repeat(keys), zip(*(column[q][:min(top_n, counts[q])] for column in picked)))))
+            for q, top_n in enumerate(top_ns)]
+
 def generate_embeddings(texts: list, model: SentenceTransformer) -> np.ndarray:
-    embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
-    return embeddings
+    # Hanya teks baru/berubah yang di-encode; sisanya diambil dari cache embedding
+    return cached_encode(model, texts, batch_size=32, show_progress_bar=True)
 
 def build_model(model_path: str = None):
     if model_path and os.path.exists(model_path):
-        return SentenceTransformer(model_path)
+        return load_sentence_model(model_path)
     model = SentenceTransformer("all-MiniLM-L6-v2")
     if model_path:
         model.save(model_path)
+        return load_sentence_model(model_path)
     return model
 
 def build_faiss_index(embeddings: np.ndarray):
-    dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
-    index.add(embeddings)
-    return index
+    # Jenis penyimpanan (flat/sqfp16/sq8/pq) mengikuti INDEX_STORAGE
+    return build_vector_index(embeddings)
 
-def save_faiss_index(index, output_path: str):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    faiss.write_index(index, output_path)
+def save_faiss_index(index, output_path: str, embeddings: np.ndarray = None):
+    save_vector_index(index, output_path, embeddings)
 
 def load_faiss_index(input_path: str):
-    return faiss.read_index(input_path)
+    return load_vector_index(input_path)
 
 def process_hospital_data(input_path: str, output_path: str, model_path: str = None):
     data = load_json(input_path)
@@ -53,7 +80,7 @@ def process_hospital_data(input_path: str, output_path: str, model_path: str = N
         embeddings = generate_embeddings(text_list, model)
         embeddings = normalize(embeddings)
         index = build_faiss_index(embeddings)
-        save_faiss_index(index, output_path)
+        save_faiss_index(index, output_path, embeddings)
         print(f"Index saved to {output_path}")
     return data, index
 
@@ -0,0 +1,41 @@
+"""
+Server satu shard index rumah sakit (lihat daftar_rumah_sakit/sharding.py).
+Shard hanya melakukan index.search atas vektor query yang sudah di-encode koordinator; tidak memuat model.
+
+    python -m daftar_rumah_sakit.shard_server daftar_rumah_sakit/app/shards/shard-0 --port 8101
+"""
+import argparse
+from fastapi import FastAPI
+from pydantic import BaseModel
+from daftar_rumah_sakit.sharding import LocalShard, decode_vectors
+
+
+class ShardSearchRequest(BaseModel):
+    vectors: str  # float32 little-endian, base64
+    dim: int
+    k: int = 5
+
+
+def create_app(shard_dir: str) -> FastAPI:
+    shard = LocalShard(shard_dir)
+    app = FastAPI(title=f"BISAcare hospital shard {shard.manifest['shard']}")
+
+    @app.get("/info")
+    def info():
+        return shard.manifest
+
+    @app.post("/search")
+    def search(request: ShardSearchRequest):
+        return shard.search(decode_vectors(request.vectors, request.dim), request.k)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+    parser = argparse.ArgumentParser(description="Jalankan satu shard index rumah sakit")
+    parser.add_argument("shard_dir")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8101)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.shard_dir), host=args.host, port=args.port)
@@ -0,0 +1,262 @@
+"""
+Pencarian rumah sakit ter-shard (scatter-gather).
+
+Index dipartisi per hash (default) atau per field SHARD_KEY_FIELD, tiap shard dilayani proses/node
+terpisah (daftar_rumah_sakit/shard_server.py). Koordinator di worker API hanya meng-encode query, mengirim
+vektor ke semua shard secara paralel, lalu menggabungkan top-k. Shard yang melewati SHARD_TIMEOUT dilewati
+dan hasil parsial tetap dikembalikan.
+
+Data rumah sakit saat ini tidak punya field provinsi (provinsi hanya tercampur di kolom text), jadi shard
+dibangun per hash dan setiap query dikirim ke semua shard. --by provinsi hanya untuk data yang setiap
+barisnya punya SHARD_KEY_FIELD; hanya shard seperti itu yang membuat query di-route ke sebagian shard.
+
+Mode shard tidak memakai snapshot index (core/snapshots.py): model query dimuat sekali saat startup dari
+MODEL_PATH, jadi shard harus dibangun ulang dengan model yang sama setiap kali model berganti.
+
+Build shard dari index dan data yang sudah ada (tanpa encode ulang):
+    python -m daftar_rumah_sakit.sharding daftar_rumah_sakit/app/embeddings/hospital_st.index \
+        daftar_rumah_sakit/preprocessed/daftar_rumah_sakit_all.json daftar_rumah_sakit/app/shards --shards 4
+"""
+import os
+import sys
+import json
+import zlib
+import time
+import base64
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import numpy as np
+import requests
+from dotenv import load_dotenv
+from daftar_rumah_sakit.data_processing import load_json
+from daftar_rumah_sakit.columnar_store import build_columnar_store, load_columnar_store
+from core.vector_index import build_vector_index, save_vector_index, load_vector_index, index_vectors
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# URL shard server, dipisah koma; kosong = pencarian in-process seperti biasa
+HOSPITAL_SHARDS = [url.strip().rstrip("/") for url in os.getenv("HOSPITAL_SHARDS", "").split(",") if url.strip()]
+# Deadline per potongan batch (SHARD_BATCH_QUERIES query); batch besar mendapat deadline kelipatannya
+SHARD_TIMEOUT = float(os.getenv("SHARD_TIMEOUT", "0.5"))
+SHARD_BATCH_QUERIES = int(os.getenv("SHARD_BATCH_QUERIES", "256"))
+# Interval refresh key provinsi tiap shard (/info) di thread background
+SHARD_INFO_REFRESH_SECONDS = float(os.getenv("SHARD_INFO_REFRESH_SECONDS", "60"))
+SHARD_KEY_FIELD = os.getenv("SHARD_KEY_FIELD", "provinsi")
+
+MANIFEST_FILE = "shard.json"
+
+
+def normalize_key(value) -> str:
+    return " ".join(str(value or "").lower().split())
+
+
+def assign_shards(data: list, num_shards: int, by: str = "hash") -> tuple:
+    """
+    Kembalikan (nomor shard per baris, daftar key per shard). by="provinsi": satu provinsi utuh di satu shard,
+    provinsi terbesar ditempatkan dulu ke shard teringan. by="hash": crc32 nama + alamat.
+    """
+    if by == "hash":
+        assignments = np.array([zlib.crc32(f"{d.get('nama_rumah_sakit', '')}|{d.get('alamat', '')}".encode("utf-8")) % num_shards
+                                for d in data], dtype=np.int32)
+        return assignments, [[] for _ in range(num_shards)]
+    keys = [normalize_key(d.get(SHARD_KEY_FIELD)) for d in data]
+    sizes = {}
+    for key in keys:
+        sizes[key] = sizes.get(key, 0) + 1
+    loads = [0] * num_shards
+    shard_keys = [[] for _ in range(num_shards)]
+    shard_of = {}
+    for key, size in sorted(sizes.items(), key=lambda kv: -kv[1]):
+        target = loads.index(min(loads))
+        shard_of[key] = target
+        shard_keys[target].append(key)
+        loads[target] += size
+    return np.array([shard_of[key] for key in keys], dtype=np.int32), shard_keys
+
+
+def build_shards(index_path: str, data_path: str, output_dir: str, num_shards: int, by: str = "hash"):
+    from features.hospital_recommender.hospital_recommender import HOSPITAL_FIELDS
+    vectors, metric = index_vectors(index_path)
+    data = load_json(data_path)
+    if len(data) != len(vectors):
+        raise ValueError(f"Jumlah data ({len(data)}) tidak sama dengan jumlah vektor ({len(vectors)})")
+    missing = 0 if by == "hash" else sum(1 for d in data if not normalize_key(d.get(SHARD_KEY_FIELD)))
+    if missing:
+        raise ValueError(f"{missing} dari {len(data)} baris tidak punya field '{SHARD_KEY_FIELD}'; pakai --by hash")
+    assignments, shard_keys = assign_shards(data, num_shards, by)
+    for shard in range(num_shards):
+        ids = np.flatnonzero(assignments == shard)
+        if len(ids) == 0:
+            raise ValueError(f"Shard {shard} kosong; kurangi jumlah shard")
+        shard_dir = os.path.join(output_dir, f"shard-{shard}")
+        os.makedirs(shard_dir, exist_ok=True)
+        embeddings = np.ascontiguousarray(vectors[ids], dtype="float32")
+        save_vector_index(build_vector_index(embeddings, metric=metric), os.path.join(shard_dir, "index.faiss"), embeddings)
+        build_columnar_store([data[i] for i in ids], HOSPITAL_FIELDS, os.path.join(shard_dir, "columnar"))
+        np.save(os.path.join(shard_dir, "ids.npy"), ids.astype(np.int64))
+        with open(os.path.join(shard_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+            json.dump({"shard": shard, "num_shards": num_shards, "by": by, "keys": sorted(shard_keys[shard]),
+                       "rows": int(len(ids)), "metric": int(metric)}, f, ensure_ascii=False)
+        logger.info(f"Shard {shard}: {len(ids)} rows")
+
+
+class LocalShard:
+    """Satu shard yang dimuat di proses ini (dipakai shard server)."""
+
+    def __init__(self, shard_dir: str):
+        with open(os.path.join(shard_dir, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.index = load_vector_index(os.path.join(shard_dir, "index.faiss"))
+        self.store = load_columnar_store(os.path.join(shard_dir, "columnar"))
+        self.ids = np.load(os.path.join(shard_dir, "ids.npy"), mmap_mode="r")
+        # faiss.METRIC_INNER_PRODUCT == 0: skor lebih besar lebih baik; L2 sebaliknya
+        self.higher_is_better = self.manifest["metric"] == 0
+
+    def search(self, queries: np.ndarray, k: int) -> dict:
+        D, I = self.index.search(np.ascontiguousarray(queries, dtype="float32"), min(k, self.index.ntotal))
+        valid = I >= 0
+        safe = np.where(valid, I, 0)
+        return {
+            "shard": self.manifest["shard"],
+            "higher_is_better": self.higher_is_better,
+            "scores": D.astype(float).tolist(),
+            "ids": np.where(valid, np.asarray(self.ids)[safe], -1).tolist(),
+            "rows": {field: column.tolist() for field, column in self.store.take(safe).items()},
+        }
+
+
+def encode_vectors(queries: np.ndarray) -> str:
+    return base64.b64encode(np.ascontiguousarray(queries, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_vectors(payload: str, dim: int) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(payload), dtype="<f4").reshape(-1, dim)
+
+
+class ShardedHospitalSearch:
+    """
+    Koordinator scatter-gather: query dikirim paralel ke shard yang relevan, top-k digabung per query.
+    Batch dipotong per SHARD_BATCH_QUERIES query. Shard yang timeout/gagal dilaporkan di info dan hasilnya
+    dianggap kosong (hasil parsial).
+    """
+
+    def __init__(self, urls: list, timeout: float = SHARD_TIMEOUT, batch_queries: int = SHARD_BATCH_QUERIES):
+        self.urls = list(urls)
+        self.timeout = timeout
+        self.batch_queries = batch_queries
+        self.pool = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.urls)), thread_name_prefix="shard")
+        self._local = threading.local()
+        self._keys = {}
+        threading.Thread(target=self._refresh_keys_loop, daemon=True, name="shard-info").start()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def refresh_keys(self):
+        """Ambil key provinsi tiap shard dari /info; shard yang tidak bisa dihubungi mempertahankan key lamanya."""
+        for url in self.urls:
+            try:
+                response = self._session().get(f"{url}/info", timeout=max(self.timeout, 2.0))
+                response.raise_for_status()
+                self._keys[url] = frozenset(response.json()["keys"])
+            except Exception as e:
+                logger.warning(f"Shard {url} info unavailable: {str(e)}")
+
+    def _refresh_keys_loop(self):
+        while True:
+            self.refresh_keys()
+            time.sleep(SHARD_INFO_REFRESH_SECONDS)
+
+    def route(self, provinsi: str = None) -> list:
+        """
+        Shard yang memuat provinsi query; semua shard jika provinsi kosong/tidak dikenali.
+        Shard hasil --by hash tidak punya key, jadi query selalu dikirim ke semua shard.
+        Tanpa I/O: key diambil thread background (refresh_keys); sebelum tersedia, semua shard dipakai.
+        """
+        key = normalize_key(provinsi)
+        if key:
+            matched = [url for url in self.urls if key in self._keys.get(url, ())]
+            if matched:
+                return matched
+        return self.urls
+
+    def _query(self, url: str, queries: np.ndarray, k: int, timeout: float) -> dict:
+        response = self._session().post(f"{url}/search", timeout=timeout, json={
+            "k": k, "dim": int(queries.shape[1]), "vectors": encode_vectors(queries)
+        })
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, queries: np.ndarray, k: int, routes: list = None) -> tuple:
+        """
+        queries: [n, dim] float32; routes: daftar URL shard per query (default semua shard).
+        Batch dipotong per batch_queries query dan deadline-nya timeout x jumlah potongan, sehingga batch
+        besar tidak otomatis timeout. Kembalikan (hasil per query: list of dict field + score, info shard);
+        info["partial"] True jika ada shard yang gagal/timeout, beserta jumlah query yang terdampak.
+        """
+        routes = routes or [self.urls] * len(queries)
+        n_chunks = max(1, -(-len(queries) // self.batch_queries))
+        deadline = self.timeout * n_chunks
+        futures = {}
+        for url in self.urls:
+            positions = [q for q, urls in enumerate(routes) if url in urls]
+            for start in range(0, len(positions), self.batch_queries):
+                chunk = positions[start:start + self.batch_queries]
+                futures[self.pool.submit(self._query, url, queries[chunk], k, deadline)] = (url, chunk)
+        done, not_done = wait(futures, timeout=deadline)
+
+        candidates = [[] for _ in range(len(queries))]
+        failed, timed_out, missing = set(), set(), set()
+        higher_is_better = False
+        for future in not_done:
+            # Hanya membatalkan potongan yang belum dikirim; request yang sudah jalan tetap selesai di shard
+            future.cancel()
+            url, positions = futures[future]
+            timed_out.add(url)
+            missing.update(positions)
+        for future in done:
+            url, positions = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                logger.warning(f"Shard {url} failed: {str(e)}")
+                failed.add(url)
+                missing.update(positions)
+                continue
+            higher_is_better = result["higher_is_better"]
+            fields = list(result["rows"])
+            for j, q in enumerate(positions):
+                for r, (score, idx) in enumerate(zip(result["scores"][j], result["ids"][j])):
+                    if idx < 0:
+                        continue
+                    row = {field: result["rows"][field][j][r] for field in fields}
+                    row["score"] = score
+                    candidates[q].append(row)
+
+        results = [sorted(rows, key=lambda row: row["score"], reverse=higher_is_better)[:k] for rows in candidates]
+        info = {"shards": len({url for url, _ in futures.values()}), "partial": bool(failed or timed_out),
+                "failed_shards": sorted(failed), "timed_out_shards": sorted(timed_out),
+                "partial_queries": len(missing)}
+        if timed_out:
+            logger.warning(f"Shard timeout after {deadline}s: {', '.join(sorted(timed_out))}")
+        return results, info
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Bangun shard index rumah sakit")
+    parser.add_argument("index_path")
+    parser.add_argument("data_path")
+    parser.add_argument("output_dir")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--by", choices=["provinsi", "hash"], default="hash",
+                        help="provinsi: butuh field SHARD_KEY_FIELD di setiap baris data")
+    args = parser.parse_args()
+    build_shards(args.index_path, args.data_path, args.output_dir, args.shards, args.by)
+    print(f"{args.shards} shard disimpan di {args.output_dir}", file=sys.stderr)
@@ -1,14 +1,31 @@
 from huggingface_hub import InferenceClient
 from dotenv import load_dotenv
+from core.metrics import llm_call, record_hf_response
+from core.prompts import PromptBuilder, PROMPT_TEXT_TOKENS, is_empty
 import os
 from features.bisabot.bisabot import get_chat_history
 
 load_dotenv()
 client = InferenceClient(
-    model="meta-llama/Llama-3.2-3B-Instruct",
+    model=os.getenv("HF_CHAT_MODEL", "meta-llama/Llama-3.2-3B-Instruct"),
     token=os.getenv("HF_TOKEN")
 )
 
+# Field isi_data yang relevan untuk saran kelengkapan (raw_text OCR tidak dikirim)
+ISI_DATA_FIELDS = ("ktp", "polis", "nomor_polis", "layanan", "nomor_hp", "keluhan")
+
+
+def _missing_fields(data_isi: dict) -> list:
+    missing = []
+    for field in ISI_DATA_FIELDS:
+        value = data_isi.get(field)
+        if isinstance(value, dict) and value:
+            missing += [f"{field}.{key}" for key, v in value.items() if is_empty(v)]
+        elif is_empty(value):
+            missing.append(field)
+    return missing
+
+
 def cek_data_isi_data(data_isi):
     """
     Mengecek data hasil isi_data dan memberi saran jika ada field yang masih kosong/null.
@@ -35,22 +52,25 @@ def cek_data_isi_data(data_isi):
     history = get_chat_history()
     last_message = history[-1]["message"] if history else ""
 
-    prompt = f"""
-Data user:
-{data_isi}
-
-Riwayat chat BISAbot terakhir:
-{last_message}
-
-Berdasarkan data di atas, berikan saran langkah selanjutnya yang harus dilakukan user agar proses klaim asuransi bisa berjalan lancar. Jika ada data yang kurang, beri tahu dokumen/form apa yang perlu dilengkapi. Jawab singkat dan jelas.
-"""
+    builder = PromptBuilder("bantu_proses_ai")
+    builder.add_fields("Data user", data_isi, ISI_DATA_FIELDS)
+    builder.add("Data yang belum diisi", ", ".join(_missing_fields(data_isi)))
+    builder.add("Riwayat chat BISAbot terakhir", last_message, max_tokens=PROMPT_TEXT_TOKENS)
+    prompt = builder.build(
+        "Berdasarkan data di atas, berikan saran langkah selanjutnya yang harus dilakukan user agar proses klaim "
+        "asuransi bisa berjalan lancar. Jika ada data yang kurang, beri tahu dokumen/form apa yang perlu dilengkapi. "
+        "Jawab singkat dan jelas."
+    )
     messages = [{"role": "user", "content": prompt}]
-    ai_response = client.chat_completion(
-        messages=messages,
-        max_tokens=256,
-        temperature=0,
-        stream=False
-    ).choices[0].message.content
+    with llm_call("hf_inference"):
+        response = client.chat_completion(
+            messages=messages,
+            max_tokens=256,
+            temperature=0,
+            stream=False
+        )
+    record_hf_response(response)
+    ai_response = response.choices[0].message.content
 
     saran.append(f"{ai_response}")
 
@@ -61,5 +81,6 @@ Berdasarkan data di atas, berikan saran langkah selanjutnya yang harus dilakukan
         "status": "cek_data",
         "saran": saran,
         "data_isi": data_isi,
-        "chat_history": history
+        "chat_history": history,
+        "prompt_tokens": builder.tokens
     }
\ No newline at end of file
@@ -1,4 +1,4 @@
 # BISAbot package
-from .bisabot import ask_bisabot, get_chat_history, clear_chat_history
+from .bisabot import ask_bisabot, retrieve_context, get_chat_history, clear_chat_history
 
-__all__ = ["ask_bisabot", "get_chat_history", "clear_chat_history"]
+__all__ = ["ask_bisabot", "retrieve_context", "get_chat_history", "clear_chat_history"]
@@ -2,6 +2,8 @@ import os
 import logging
 import requests
 from dotenv import load_dotenv
+from core.metrics import timer, llm_call, record_gemini_response
+from core.snapshots import CorpusSnapshot, index_registry
 
 try:
     from rag.retriever import SimpleRAGRetriever
@@ -12,28 +14,29 @@ except ImportError as e:
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent")
 
-rag_retriever = None
-rag_initialized = False
+def load_legacy_rag() -> CorpusSnapshot:
+    """Index RAG di ./rag/index, dipakai selama belum ada snapshot RAG aktif (lihat core/snapshots.py)."""
+    retriever = SimpleRAGRetriever()
+    return CorpusSnapshot("rag", "legacy", retriever=retriever, model=retriever.embeddings_model)
 
-def initialize_rag():
-    global rag_retriever, rag_initialized
-    if rag_initialized:
-        return
-    rag_initialized = True
+if RAG_AVAILABLE:
+    index_registry.register("rag", load_legacy_rag)
+
+def get_rag_retriever():
+    """Retriever dari snapshot RAG aktif; None jika RAG tidak tersedia. Ambil sekali per pertanyaan."""
     if not RAG_AVAILABLE:
-        logging.warning("RAG not available - continuing without document retrieval")
-        return
+        return None
     try:
-        rag_retriever = SimpleRAGRetriever()
-        if rag_retriever.is_available():
-            logging.info("RAG retriever initialized successfully")
-        else:
-            logging.warning("RAG retriever initialized but no documents available")
-            rag_retriever = None
+        retriever = index_registry.get("rag").retriever
     except Exception as e:
         logging.error(f"Failed to initialize RAG retriever: {str(e)}")
-        rag_retriever = None
+        return None
+    if retriever is None or not retriever.is_available():
+        logging.warning("RAG retriever initialized but no documents available")
+        return None
+    return retriever
 
 SYSTEM_PROMPT = """Anda adalah BISAbot, asisten AI yang membantu pengguna memahami produk asuransi.
 
@@ -49,15 +52,29 @@ Jika Anda tidak yakin tentang informasi tertentu, katakan dengan jujur dan saran
 
 chat_history = []
 
-def ask_bisabot(user_message):
+def retrieve_context(user_message) -> str:
+    """Context RAG untuk pertanyaan (CPU-bound: encode query + FAISS); string kosong jika RAG tidak tersedia."""
+    rag_retriever = get_rag_retriever()
+    if not rag_retriever:
+        return ""
+    try:
+        with timer("rag_context"):
+            return rag_retriever.get_context_for_query(user_message)
+    except Exception as e:
+        logging.error(f"Error retrieving RAG context: {str(e)}")
+        return ""
+
+def ask_bisabot(user_message, context=None):
+    """
+    context: hasil retrieve_context() jika sudah diambil terpisah (main.py menjalankannya di pool embedding,
+    sedangkan panggilan Gemini di pool default); None = ambil di sini.
+    """
     global chat_history
-    initialize_rag()
+    if context is None:
+        context = retrieve_context(user_message)
     chat_history.append({"role": "user", "content": user_message})
 
     try:
-        context = ""
-        if rag_retriever and rag_retriever.is_available():
-            context = rag_retriever.get_context_for_query(user_message)
         # Prompt selalu gabungkan context RAG (jika ada) dan instruksi umum
         if context.strip():
             prompt = f"{SYSTEM_PROMPT}\n\nBerikut adalah informasi dari dokumen asuransi yang relevan:\n{context}\n\n---\nPertanyaan pengguna: {user_message}\nBerikan jawaban berdasarkan informasi di atas. Jika informasi tidak lengkap, tambahkan saran untuk menghubungi customer service."
@@ -65,7 +82,7 @@ def ask_bisabot(user_message):
             prompt = f"{SYSTEM_PROMPT}\n\nPertanyaan pengguna: {user_message}\nBerikan jawaban umum tentang asuransi berdasarkan pengetahuan Anda dan sarankan untuk menghubungi customer service untuk informasi detail dan terkini."
 
         # Ganti ke Gemini 1.5 Flash seperti di test_gemini.py
-        url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+        url = GEMINI_API_URL
         headers = {"Content-Type": "application/json"}
         payload = {
             "contents": [
@@ -73,9 +90,12 @@ def ask_bisabot(user_message):
             ]
         }
         params = {"key": GEMINI_API_KEY}
-        response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
-        response.raise_for_status()
-        result_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
+        with llm_call("gemini"):
+            response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+            response.raise_for_status()
+            response_json = response.json()
+        record_gemini_response(response_json)
+        result_text = response_json["candidates"][0]["content"]["parts"][0]["text"]
         assistant_message = result_text.strip()
 
         chat_history.append({"role": "assistant", "content": assistant_message})
@@ -4,24 +4,28 @@ import io
 import os
 import requests
 from dotenv import load_dotenv
+from core.metrics import timer, llm_call, record_gemini_response
 import pytesseract
 from PIL import Image
 import io
 
 load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+GEMINI_API_URL = os.getenv("GEMINI_API_URL", "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent")
 
 def extract_text(image_bytes):
-    image = Image.open(io.BytesIO(image_bytes))
-    text = pytesseract.image_to_string(image, lang="ind")
+    with timer("ocr"):
+        image = Image.open(io.BytesIO(image_bytes))
+        text = pytesseract.image_to_string(image, lang="ind")
     return text
 
 def extract_slip_text(image_bytes):
     """
     Ekstrak teks dari foto slip rumah sakit menggunakan OCR.
     """
-    image = Image.open(io.BytesIO(image_bytes))
-    text = pytesseract.image_to_string(image, lang="ind")
+    with timer("ocr"):
+        image = Image.open(io.BytesIO(image_bytes))
+        text = pytesseract.image_to_string(image, lang="ind")
     return text
 
 def parse_with_ai(text):
@@ -35,7 +39,7 @@ Formatkan ke JSON dengan field:
 - Polis: nama_asuransi
 Jawab hanya JSON saja.
 """
-    url = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
+    url = GEMINI_API_URL
     headers = {"Content-Type": "application/json"}
     payload = {
         "contents": [
@@ -43,6 +47,9 @@ Jawab hanya JSON saja.
         ]
     }
     params = {"key": GEMINI_API_KEY}
-    response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
-    response.raise_for_status()
-    result_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
\ No newline at end of file
+    with llm_call("gemini"):
+        response = requests.post(url, headers=headers, params=params, json=payload, timeout=30)
+        response.raise_for_status()
+        response_json = response.json()
+    record_gemini_response(response_json)
+    result_text = response_json["candidates"][0]["content"]["parts"][0]["text"]
\ No newline at end of file
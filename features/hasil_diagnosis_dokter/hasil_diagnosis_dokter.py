@@ -1,7 +1,7 @@
 import os
 from features.data_asuransi_ai.scan_data import extract_text
-import whisper
 import logging
+from core.asr import transcribe_file
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,7 +20,7 @@ def process_diagnosis(image_bytes=None, text=None, audio_path=None):
         return {"jenis": "text", "hasil": text}
 
     if audio_path is not None:
-        # Proses audio dengan OpenAI Whisper (local)
+        # Proses audio dengan backend ASR yang sama dengan fitur lain (ASR_BACKEND, model di-cache)
         try:
             logger.info(f"Audio file path received: {audio_path}")
             if not audio_path or not isinstance(audio_path, str) or not os.path.exists(audio_path):
@@ -29,13 +29,11 @@ def process_diagnosis(image_bytes=None, text=None, audio_path=None):
             logger.info(f"File size: {file_size} bytes")
             if file_size == 0:
                 raise Exception("Audio file is empty")
-            model = whisper.load_model("base")
-            result = model.transcribe(audio_path, language="indonesian")
-            transcription = result["text"]
-            logger.info(f"OpenAI Whisper transcription result: '{transcription}'")
+            transcription = transcribe_file(audio_path)
+            logger.info(f"Whisper transcription result: '{transcription}'")
             return {"jenis": "audio", "hasil": transcription.strip()}
         except Exception as e:
-            logger.error(f"Error in OpenAI Whisper transcribe_audio: {str(e)}")
+            logger.error(f"Error in Whisper transcribe_audio: {str(e)}")
             return {"jenis": "audio", "hasil": f"Error transcribing audio: {str(e)}"}
 
     # Jika tidak ada input
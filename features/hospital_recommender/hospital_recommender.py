@@ -3,7 +3,20 @@ from dotenv import load_dotenv
 import os
 from typing import Optional
 from daftar_rumah_sakit.preprocessing import preprocessing_id
-from daftar_rumah_sakit.data_processing import normalize
+from daftar_rumah_sakit.data_processing import normalize, gather_results
+from core.metrics import timer
+
+HOSPITAL_FIELDS = {'nama_rumah_sakit': '', 'alamat': '', 'telp': '', 'text': ''}
+QUERY_FIELDS = ('nama', 'kelurahan_desa', 'kecamatan', 'jenis_layanan', 'keluhan',
+                'nama_asuransi', 'nama_provinsi', 'nama_daerah')
+
+def build_query_text(nama, kelurahan_desa, kecamatan, jenis_layanan, keluhan,
+                     nama_asuransi, nama_provinsi, nama_daerah) -> str:
+    # Gabungkan semua input jadi satu query
+    return (
+        f"{nama} {kelurahan_desa} {kecamatan} layanan:{jenis_layanan} "
+        f"keluhan:{keluhan} asuransi:{nama_asuransi} provinsi:{nama_provinsi} daerah:{nama_daerah}"
+    )
 
 def recommend_hospitals(
     data, index, model,
@@ -20,19 +33,22 @@ def recommend_hospitals(
     """
     Merekomendasikan rumah sakit berdasarkan input user dan kemiripan embedding.
     """
-    # Gabungkan semua input jadi satu query
-    query_text = (
-        f"{nama} {kelurahan_desa} {kecamatan} layanan:{jenis_layanan} "
-        f"keluhan:{keluhan} asuransi:{nama_asuransi} provinsi:{nama_provinsi} daerah:{nama_daerah}"
-    )
-    query_text = preprocessing_id(query_text)
-    query_emb = model.encode([query_text])
-    query_emb = normalize(query_emb)
+    query_text = build_query_text(nama, kelurahan_desa, kecamatan, jenis_layanan, keluhan,
+                                  nama_asuransi, nama_provinsi, nama_daerah)
+    with timer("preprocess"):
+        query_text = preprocessing_id(query_text)
+    with timer("encode"):
+        query_emb = model.encode([query_text])
+        query_emb = normalize(query_emb)
 
     # Cari kemiripan di index
-    D, I = index.search(query_emb, top_n)
+    with timer("faiss_search"):
+        D, I = index.search(query_emb, top_n)
     results = []
     for idx, dist in zip(I[0], D[0]):
+        if idx < 0:
+            # Index berisi kurang dari top_n vektor
+            continue
         d = data[idx]
         results.append({
             'nama_rumah_sakit': d.get('nama_rumah_sakit', ''),
@@ -41,4 +57,38 @@ def recommend_hospitals(
             'text': d.get('text', ''),
             'score': float(dist)
         })
-    return results
\ No newline at end of file
+    return results
+
+def recommend_hospitals_batch(columns: dict, index, model, queries: list, batch_size: int = 64) -> list:
+    """
+    Versi batch recommend_hospitals: semua query di-encode dan dicari dalam satu panggilan
+    index.search, lalu hasil dirakit dari metadata kolom (lihat to_columns).
+    queries: list of dict berisi QUERY_FIELDS dan top_n (opsional, default 5).
+    """
+    if not queries:
+        return []
+    top_ns = [int(q.get('top_n', 5)) for q in queries]
+    with timer("preprocess"):
+        texts = [preprocessing_id(build_query_text(*(q.get(f, '') for f in QUERY_FIELDS))) for q in queries]
+    with timer("encode"):
+        query_emb = normalize(model.encode(texts, batch_size=batch_size))
+    with timer("faiss_search"):
+        D, I = index.search(np.ascontiguousarray(query_emb, dtype='float32'), max(top_ns))
+    return gather_results(columns, I, D, top_ns)
+
+def recommend_hospitals_sharded(search, model, queries: list, batch_size: int = 64) -> tuple:
+    """
+    Versi scatter-gather recommend_hospitals_batch: query di-encode di sini, pencarian dilakukan
+    shard server (lihat daftar_rumah_sakit/sharding.py). Kembalikan (hasil per query, info shard).
+    """
+    if not queries:
+        return [], {}
+    top_ns = [int(q.get('top_n', 5)) for q in queries]
+    with timer("preprocess"):
+        texts = [preprocessing_id(build_query_text(*(q.get(f, '') for f in QUERY_FIELDS))) for q in queries]
+    with timer("encode"):
+        query_emb = normalize(model.encode(texts, batch_size=batch_size)).astype('float32')
+    with timer("shard_search"):
+        routes = [search.route(q.get('nama_provinsi')) for q in queries]
+        results, info = search.search(query_emb, max(top_ns), routes)
+    return [rows[:top_n] for rows, top_n in zip(results, top_ns)], info
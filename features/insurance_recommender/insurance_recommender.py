@@ -2,6 +2,10 @@ import numpy as np
 from daftar_rumah_sakit.preprocessing import preprocessing_id
 import os
 import json
+from daftar_rumah_sakit.data_processing import gather_results
+from core.metrics import timer
+
+ASURANSI_FIELDS = {'nama_produk_asuransi': '', 'nama_pt_asuransi': '', 'contact_center_asuransi': None}
 
 def recommend_asuransi(
     query, data, index, model, top_n=5
@@ -10,14 +14,20 @@ def recommend_asuransi(
     Merekomendasikan produk asuransi berdasarkan input user dan kemiripan embedding.
     """
     # Preprocessing query
-    query_text = preprocessing_id(query)
-    query_emb = model.encode([query_text])
-    query_emb = query_emb / np.linalg.norm(query_emb, axis=1, keepdims=True)
+    with timer("preprocess"):
+        query_text = preprocessing_id(query)
+    with timer("encode"):
+        query_emb = model.encode([query_text])
+        query_emb = query_emb / np.linalg.norm(query_emb, axis=1, keepdims=True)
 
     # Cari kemiripan di index
-    D, I = index.search(query_emb, top_n)
+    with timer("faiss_search"):
+        D, I = index.search(query_emb, top_n)
     results = []
     for idx, dist in zip(I[0], D[0]):
+        if idx < 0:
+            # Index berisi kurang dari top_n vektor
+            continue
         d = data[idx]
         results.append({
             'nama_produk_asuransi': d.get('nama_produk_asuransi', ''),
@@ -27,6 +37,22 @@ def recommend_asuransi(
         })
     return results
 
+def recommend_asuransi_batch(queries: list, columns: dict, index, model, top_ns: list, batch_size: int = 64) -> list:
+    """
+    Versi batch recommend_asuransi: preprocessing, encode, dan index.search untuk seluruh
+    query sekaligus; hasil dirakit dari metadata kolom (lihat to_columns).
+    """
+    if not queries:
+        return []
+    with timer("preprocess"):
+        texts = [preprocessing_id(q) for q in queries]
+    with timer("encode"):
+        query_emb = model.encode(texts, batch_size=batch_size)
+        query_emb = query_emb / np.linalg.norm(query_emb, axis=1, keepdims=True)
+    with timer("faiss_search"):
+        D, I = index.search(np.ascontiguousarray(query_emb, dtype='float32'), max(top_ns))
+    return gather_results(columns, I, D, top_ns)
+
 def load_asuransi_data(folder_path):
     data_path = os.path.join(folder_path, "preprocessed/daftar_asuransi_all.json")
     with open(data_path, "r", encoding="utf-8") as f:
@@ -6,9 +6,8 @@ import re
 import tempfile
 import shutil
 import logging
-from transformers import WhisperProcessor, WhisperForConditionalGeneration, pipeline
-import torch
-import librosa
+from core.metrics import llm_call, record_hf_response
+from core.asr import get_asr_backend, transcribe_file
 
 # Setup logging for debugging
 logging.basicConfig(level=logging.INFO)
@@ -17,7 +16,7 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 client = InferenceClient(
-    model="meta-llama/Llama-3.2-3B-Instruct",
+    model=os.getenv("HF_CHAT_MODEL", "meta-llama/Llama-3.2-3B-Instruct"),
     token=os.getenv("HF_TOKEN")
 )
 
@@ -34,12 +33,12 @@ Berdasarkan keluhan yang diberikan, berikan analisis dalam format JSON:
 
 Berikan jawaban yang akurat dan profesional. Persentase klaim harus berupa satu angka pasti, bukan rentang atau 'sampai dengan'. Contoh: 80, 90, 90.5, 10."""
 
-# Ganti fungsi transcribe_audio agar pakai pipeline Whisper Transformers
-pipe = pipeline("automatic-speech-recognition", model="ayaayaa/whisper-finetuned-id")
+# Backend Whisper (transformers fp32 / int8 / ctranslate2) dipilih lewat ASR_BACKEND, dimuat sekali saat import
+get_asr_backend()
 
 def transcribe_audio(audio_file_path):
     """
-    Convert audio file to text using HuggingFace Whisper pipeline (ayaayaa/whisper-finetuned-id)
+    Convert audio file to text using Whisper fine-tuned Indonesia (ayaayaa/whisper-finetuned-id)
     """
     try:
         logger.info(f"Audio file path received: {audio_file_path}")
@@ -50,25 +49,9 @@ def transcribe_audio(audio_file_path):
         if file_size == 0:
             raise Exception("Audio file is empty")
 
-        import soundfile as sf
-        import librosa
-        import torch
-
-        # Load audio
-        audio, sr = sf.read(audio_file_path)
-        # Resample to 16kHz if needed
-        if sr != 16000:
-            audio = librosa.resample(audio, orig_sr=sr, target_sr=16000)
-            sr = 16000
-
-        # Use Whisper pipeline components directly for robust inference
-        with torch.no_grad():
-            inputs = pipe.feature_extractor(audio, sampling_rate=sr, return_tensors="pt").input_features
-            result = pipe.model.generate(inputs)
-            text = pipe.tokenizer.batch_decode(result, skip_special_tokens=True)
-
-        transcription = text[0] if isinstance(text, list) and len(text) > 0 else ""
-        logger.info(f"Whisper pipeline transcription result: '{transcription}'")
+        # Audio > jendela Whisper (30 detik) dipotong di titik hening, tidak terpotong diam-diam
+        transcription = transcribe_file(audio_file_path)
+        logger.info(f"Whisper transcription result: '{transcription}'")
         return transcription.strip()
     except Exception as e:
         logger.error(f"Error in pipeline transcribe_audio: {str(e)}")
@@ -100,12 +83,14 @@ def analyze_health_complaint(keluhan_text):
             {"role": "user", "content": analysis_prompt}
         ]
         
-        response = client.chat_completion(
-            messages=messages,
-            max_tokens=1024,
-            temperature=0.3,
-            stream=False
-        )
+        with llm_call("hf_inference"):
+            response = client.chat_completion(
+                messages=messages,
+                max_tokens=1024,
+                temperature=0.3,
+                stream=False
+            )
+        record_hf_response(response)
         
         ai_response = response.choices[0].message.content
         
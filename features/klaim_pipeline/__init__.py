@@ -0,0 +1,4 @@
+# Klaim Pipeline package
+from .klaim_pipeline import build_klaim_pipeline
+
+__all__ = ["build_klaim_pipeline"]
@@ -0,0 +1,117 @@
+"""
+Pipeline klaim end-to-end di server: OCR KTP/polis, parsing AI, analisis keluhan, diagnosis dokter
+(foto/teks/suara), cek kelengkapan, rekomendasi rumah sakit, dan analisis tanggungan dalam satu DAG.
+
+    ocr_ktp -> parse_ktp --\\
+                            +-> isi_data -> bantu_proses
+    ocr_polis -> parse_polis/          \\-> rekomendasi_rumah_sakit
+    diagnosis_foto / diagnosis_text / diagnosis_audio -> hasil_diagnosis --\\
+                                                    isi_data --------------+-> tanggungan
+    keluhan (analisis keluhan, independen)
+"""
+import os
+import tempfile
+from features.data_asuransi_ai.scan_data import extract_text, parse_with_ai
+from features.hasil_diagnosis_dokter.hasil_diagnosis_dokter import process_diagnosis
+from features.bantu_proses_ai.bantu_proses_ai import cek_data_isi_data
+from features.keluhanmu_bisa_diklaim.keluhanmu_bisa_diklaim import analyze_health_complaint
+from features.tanggungan_ai.tanggungan_ai import analisis_tanggungan_ai
+from core.executors import POOL_OCR, POOL_ASR, POOL_EMBEDDING
+from core.pipeline import Pipeline, Stage
+
+FORM_FIELDS = ("nomor_polis", "jenis_layanan", "nomor_hp", "input_keluhan")
+
+
+def _section(parsed, key: str):
+    """Ambil bagian "ktp"/"polis" dari hasil parse_with_ai (kunci bisa huruf kecil atau besar)."""
+    if not hasattr(parsed, "get"):
+        return parsed
+    return parsed.get(key, parsed.get(key.upper()))
+
+
+def _parse_polis(ctx: dict):
+    parsed = parse_with_ai(ctx["ocr_polis"])
+    if isinstance(parsed, dict) and "jenis_layanan" in parsed:
+        parsed.pop("jenis_layanan")
+    return parsed
+
+
+def _isi_data(ctx: dict) -> dict:
+    # Bentuk sama dengan response /isi_data
+    return {
+        "ktp": _section(ctx["parse_ktp"], "ktp"),
+        "polis": _section(ctx["parse_polis"], "polis"),
+        "raw_text": f"{ctx['ocr_ktp'] or ''}\n{ctx['ocr_polis'] or ''}",
+        "nomor_polis": ctx["nomor_polis"],
+        "layanan": ctx["jenis_layanan"],
+        "nomor_hp": ctx["nomor_hp"],
+        "keluhan": ctx["input_keluhan"],
+    }
+
+
+def _diagnosis_audio(ctx: dict) -> dict:
+    # Input berupa byte audio agar memo berbasis isi file, bukan path file sementara
+    with tempfile.NamedTemporaryFile(delete=False, suffix=ctx["diagnosis_audio_ext"] or ".wav") as f:
+        f.write(ctx["diagnosis_audio"])
+        path = f.name
+    try:
+        return process_diagnosis(audio_path=path)
+    finally:
+        os.remove(path)
+
+
+def _hasil_diagnosis(ctx: dict) -> dict:
+    # Bentuk sama dengan response /hasil_diagnosis_dokter
+    result = {key: ctx[key] for key in ("diagnosis_foto", "diagnosis_text", "diagnosis_audio")
+              if ctx[key] is not None}
+    return {"status": "success", "hasil_diagnosis": result}
+
+
+def _hospital_query(ctx: dict) -> dict:
+    isi_data = ctx["isi_data"]
+    ktp = isi_data["ktp"] if isinstance(isi_data["ktp"], dict) else {}
+    polis = isi_data["polis"] if isinstance(isi_data["polis"], dict) else {}
+    return {
+        "nama": "",
+        "kelurahan_desa": ktp.get("kelurahan_desa") or "",
+        "kecamatan": ktp.get("kecamatan") or "",
+        "jenis_layanan": isi_data["layanan"] or "",
+        "keluhan": isi_data["keluhan"] or "",
+        "nama_asuransi": polis.get("nama_asuransi") or "",
+        "nama_provinsi": ktp.get("nama_provinsi") or "",
+        "nama_daerah": ktp.get("nama_daerah") or "",
+        "top_n": 5,
+    }
+
+
+def build_klaim_pipeline(recommend_hospitals) -> Pipeline:
+    """
+    recommend_hospitals(query: dict) -> list: disuntik dari main.py agar memakai snapshot index
+    atau shard yang sedang aktif.
+    """
+    pipeline = Pipeline("klaim")
+    pipeline.add(Stage("ocr_ktp", lambda ctx: extract_text(ctx["foto_ktp"]), inputs=("foto_ktp",),
+                       pool=POOL_OCR, when=lambda ctx: ctx["foto_ktp"] is not None))
+    pipeline.add(Stage("ocr_polis", lambda ctx: extract_text(ctx["foto_polis"]), inputs=("foto_polis",),
+                       pool=POOL_OCR, when=lambda ctx: ctx["foto_polis"] is not None))
+    pipeline.add(Stage("parse_ktp", lambda ctx: parse_with_ai(ctx["ocr_ktp"]), deps=("ocr_ktp",),
+                       when=lambda ctx: bool(ctx["ocr_ktp"])))
+    pipeline.add(Stage("parse_polis", _parse_polis, deps=("ocr_polis",), when=lambda ctx: bool(ctx["ocr_polis"])))
+    pipeline.add(Stage("isi_data", _isi_data, deps=("ocr_ktp", "ocr_polis", "parse_ktp", "parse_polis"),
+                       inputs=FORM_FIELDS))
+    pipeline.add(Stage("keluhan", lambda ctx: analyze_health_complaint(ctx["input_keluhan"]), inputs=("input_keluhan",),
+                       when=lambda ctx: bool((ctx["input_keluhan"] or "").strip())))
+    pipeline.add(Stage("diagnosis_foto", lambda ctx: process_diagnosis(image_bytes=ctx["foto_diagnosis"]),
+                       inputs=("foto_diagnosis",), pool=POOL_OCR, when=lambda ctx: ctx["foto_diagnosis"] is not None))
+    pipeline.add(Stage("diagnosis_text", lambda ctx: process_diagnosis(text=ctx["diagnosis_text"]),
+                       inputs=("diagnosis_text",), when=lambda ctx: bool((ctx["diagnosis_text"] or "").strip())))
+    pipeline.add(Stage("diagnosis_audio", _diagnosis_audio, inputs=("diagnosis_audio", "diagnosis_audio_ext"),
+                       pool=POOL_ASR, when=lambda ctx: ctx["diagnosis_audio"] is not None))
+    pipeline.add(Stage("hasil_diagnosis", _hasil_diagnosis, deps=("diagnosis_foto", "diagnosis_text", "diagnosis_audio")))
+    pipeline.add(Stage("bantu_proses", lambda ctx: cek_data_isi_data(ctx["isi_data"]), deps=("isi_data",)))
+    pipeline.add(Stage("rekomendasi_rumah_sakit", lambda ctx: recommend_hospitals(_hospital_query(ctx)),
+                       deps=("isi_data",), pool=POOL_EMBEDDING))
+    pipeline.add(Stage("tanggungan", lambda ctx: analisis_tanggungan_ai(ctx["isi_data"], ctx["hasil_diagnosis"]),
+                       deps=("isi_data", "hasil_diagnosis"),
+                       when=lambda ctx: bool(ctx["hasil_diagnosis"]["hasil_diagnosis"])))
+    return pipeline
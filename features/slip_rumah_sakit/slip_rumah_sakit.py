@@ -1,12 +1,14 @@
 from PIL import Image
 from huggingface_hub import InferenceClient
 from dotenv import load_dotenv
+from core.metrics import timer, llm_call, record_llm_usage
+from core.tokens import count_tokens
 import os
 import tempfile
 
 load_dotenv()
 client = InferenceClient(
-    model="meta-llama/Llama-3.2-3B-Instruct",
+    model=os.getenv("HF_CHAT_MODEL", "meta-llama/Llama-3.2-3B-Instruct"),
     token=os.getenv("HF_TOKEN")
 )
 
@@ -20,7 +22,8 @@ def extract_text(image_bytes):
         # Gunakan OCR, misal pytesseract (bisa diganti sesuai kebutuhan)
         try:
             import pytesseract
-            raw_text = pytesseract.image_to_string(image, lang="ind")
+            with timer("ocr"):
+                raw_text = pytesseract.image_to_string(image, lang="ind")
         except ImportError:
             raw_text = ""
         finally:
@@ -48,11 +51,14 @@ Ekstrak data berikut (isi null jika tidak ditemukan):
 
 Jawab dalam format JSON.
 """
-    response = client.text_generation(
-        prompt=prompt,
-        max_tokens=512,
-        temperature=0,
-    )
+    with llm_call("hf_inference"):
+        response = client.text_generation(
+            prompt=prompt,
+            max_tokens=512,
+            temperature=0,
+        )
+    # text_generation tidak mengembalikan usage: jumlah token dihitung dengan tokenizer lokal
+    record_llm_usage("hf_inference", count_tokens(prompt), count_tokens(response))
     # Parsing response AI ke dict
     import json
     try:
@@ -1,4 +1,4 @@
 # Surat Aju Banding package
-from .surat_aju_banding import buat_surat_aju_banding_pdf
+from .surat_aju_banding import buat_surat_aju_banding_pdf, buat_surat_aju_banding_batch, gabung_pdf, zip_pdf
 
-__all__ = ["buat_surat_aju_banding_pdf"]
\ No newline at end of file
+__all__ = ["buat_surat_aju_banding_pdf", "buat_surat_aju_banding_batch", "gabung_pdf", "zip_pdf"]
\ No newline at end of file
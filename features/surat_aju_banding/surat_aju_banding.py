@@ -2,20 +2,43 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
+from reportlab.pdfbase import pdfmetrics
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+from PyPDF2 import PdfReader, PdfWriter
+import io
+import os
+import zipfile
+from core.metrics import timer
+
+SURAT_BATCH_WORKERS = int(os.getenv("SURAT_BATCH_WORKERS", str(os.cpu_count() or 2)))
+
+@lru_cache(maxsize=1)
+def get_styles():
+    """Stylesheet dibuat sekali dan dipakai ulang untuk semua surat."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Justify', alignment=4, leading=16))
+    return styles
 
 def buat_surat_aju_banding_pdf(
     nama, no_polis, alamat, no_telepon,
     tanggal_pengajuan, nomor_klaim, perihal_klaim, alasan_penolakan, alasan_banding,
     nama_perusahaan_asuransi="PT ASURANSI SINARMAS",
-    nama_file_output="surat_aju_banding.pdf"
+    nama_file_output=None
 ):
-    doc = SimpleDocTemplate(nama_file_output, pagesize=A4,
+    """
+    Buat PDF surat aju banding. Jika nama_file_output diisi (path atau file-like),
+    PDF ditulis ke sana; jika tidak, PDF dirender di memori dan dikembalikan sebagai bytes.
+    """
+    buffer = io.BytesIO() if nama_file_output is None else None
+    doc = SimpleDocTemplate(buffer or nama_file_output, pagesize=A4,
                             rightMargin=3*cm, leftMargin=3*cm,
                             topMargin=2*cm, bottomMargin=2*cm)
 
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='Justify', alignment=4, leading=16))
+    styles = get_styles()
 
     elements = []
 
@@ -62,5 +85,65 @@ def buat_surat_aju_banding_pdf(
     elements.append(Paragraph(f"<b>{nama}</b><br/>{datetime.now().strftime('%-d %B %Y')}", styles['Normal']))
 
     # Build PDF
-    doc.build(elements)
-    print(f"Surat berhasil dibuat: {nama_file_output}")
+    with timer("pdf_render"):
+        doc.build(elements)
+    if buffer is not None:
+        return buffer.getvalue()
+
+def _init_batch_worker():
+    # Siapkan stylesheet dan font sekali per proses agar dipakai ulang oleh semua surat
+    get_styles()
+    pdfmetrics.getFont('Helvetica')
+    pdfmetrics.getFont('Helvetica-Bold')
+
+def _render_surat(kwargs):
+    return buat_surat_aju_banding_pdf(**kwargs)
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+def get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            # spawn, bukan fork: proses API sudah punya thread executor, event loop, dan model besar di memori
+            _batch_pool = ProcessPoolExecutor(max_workers=SURAT_BATCH_WORKERS, initializer=_init_batch_worker,
+                                              mp_context=multiprocessing.get_context("spawn"))
+        return _batch_pool
+
+def shutdown_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is not None:
+            _batch_pool.shutdown(wait=False, cancel_futures=True)
+            _batch_pool = None
+
+def buat_surat_aju_banding_batch(daftar_surat):
+    """
+    Render banyak surat aju banding secara paralel di process pool.
+    daftar_surat: list of dict dengan argumen yang sama seperti buat_surat_aju_banding_pdf.
+    Mengembalikan list bytes PDF dengan urutan yang sama.
+    """
+    if len(daftar_surat) == 1:
+        return [_render_surat(daftar_surat[0])]
+    chunksize = max(1, len(daftar_surat) // (SURAT_BATCH_WORKERS * 4))
+    return list(get_batch_pool().map(_render_surat, daftar_surat, chunksize=chunksize))
+
+def gabung_pdf(daftar_pdf):
+    """Gabungkan beberapa PDF (bytes) menjadi satu PDF."""
+    writer = PdfWriter()
+    for pdf_bytes in daftar_pdf:
+        for page in PdfReader(io.BytesIO(pdf_bytes)).pages:
+            writer.add_page(page)
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+def zip_pdf(daftar_file):
+    """Bungkus list (nama_file, bytes PDF) menjadi satu arsip ZIP."""
+    buffer = io.BytesIO()
+    # PDF sudah terkompresi, jadi cukup disimpan tanpa kompresi ulang
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as zf:
+        for nama_file, pdf_bytes in daftar_file:
+            zf.writestr(nama_file, pdf_bytes)
+    return buffer.getvalue()
@@ -1,36 +1,62 @@
 import os
-import json
 from huggingface_hub import InferenceClient
+from core.metrics import llm_call, record_hf_response
+from core.prompts import PromptBuilder, PROMPT_OCR_TOKENS, slim
 
 client = InferenceClient(
-    model="google/gemini-pro",
+    model=os.getenv("TANGGUNGAN_AI_MODEL", "google/gemini-pro"),
     token=os.getenv("GEMINI_API_KEY")
 )
 
+# Field isi_data yang relevan untuk analisis tanggungan (raw_text dan nomor_hp tidak dikirim)
+ISI_DATA_FIELDS = ("ktp", "polis", "nomor_polis", "layanan", "keluhan")
+
+
+def _diagnosis_texts(hasil_diagnosis) -> dict:
+    """{"foto"/"text"/"audio": teks hasil} dari response /hasil_diagnosis_dokter (atau dict diagnosis langsung)."""
+    if not isinstance(hasil_diagnosis, dict):
+        return {"diagnosis": hasil_diagnosis}
+    entries = hasil_diagnosis.get("hasil_diagnosis", hasil_diagnosis)
+    if not isinstance(entries, dict):
+        return {"diagnosis": entries}
+    return {key: value.get("hasil") if isinstance(value, dict) and "hasil" in value else value
+            for key, value in entries.items() if key != "status"}
+
+
+def build_tanggungan_prompt(isi_data, hasil_diagnosis) -> PromptBuilder:
+    builder = PromptBuilder("tanggungan_ai")
+    data = slim(isi_data, ISI_DATA_FIELDS) if isinstance(isi_data, dict) else isi_data
+    builder.add_fields("Data user", data)
+    if isinstance(isi_data, dict) and not (data.get("ktp") or data.get("polis")):
+        # Parsing KTP/polis gagal: kirim potongan teks OCR sebagai gantinya
+        builder.add("Teks OCR KTP/polis", isi_data.get("raw_text"), max_tokens=PROMPT_OCR_TOKENS)
+    builder.add_fields("Hasil diagnosis dokter", _diagnosis_texts(hasil_diagnosis))
+    return builder
+
+
 def analisis_tanggungan_ai(isi_data, hasil_diagnosis):
     """
     Analisis gabungan data isi_data dan hasil diagnosis dokter menggunakan Gemini.
     """
-    prompt = f"""
-Data user dari form isi_data:
-{json.dumps(isi_data, ensure_ascii=False, indent=2)}
-
-Hasil diagnosis dokter:
-{json.dumps(hasil_diagnosis, ensure_ascii=False, indent=2)}
-
-Analisis gabungan: Berikan saran, kemungkinan diagnosis, dan langkah selanjutnya untuk proses asuransi. Jawab singkat, jelas, dan profesional.
-"""
-    messages = [{"role": "user", "content": prompt}]
-    response = client.chat_completion(
-        messages=messages,
-        max_tokens=512,
-        temperature=0.2,
-        stream=False
+    builder = build_tanggungan_prompt(isi_data, hasil_diagnosis)
+    prompt = builder.build(
+        "Analisis gabungan: Berikan saran, kemungkinan diagnosis, dan langkah selanjutnya untuk proses asuransi. "
+        "Jawab singkat, jelas, dan profesional."
     )
+    messages = [{"role": "user", "content": prompt}]
+    with llm_call("hf_inference"):
+        response = client.chat_completion(
+            messages=messages,
+            max_tokens=512,
+            temperature=0.2,
+            stream=False
+        )
+    record_hf_response(response)
     ai_result = response.choices[0].message.content
     return {
         "status": "success",
         "analisis_tanggungan": ai_result,
         "isi_data": isi_data,
-        "hasil_diagnosis": hasil_diagnosis
+        "hasil_diagnosis": hasil_diagnosis,
+        "prompt_tokens": builder.tokens
     }
\ No newline at end of file
@@ -1,29 +1,55 @@
-from fastapi import FastAPI, Request, HTTPException, File, UploadFile, Form, Body
-from fastapi.responses import FileResponse
-from pydantic import BaseModel
-from features.bisabot.bisabot import ask_bisabot, get_chat_history, clear_chat_history
-from features.surat_aju_banding.surat_aju_banding import buat_surat_aju_banding_pdf
+from fastapi import FastAPI, Request, HTTPException, File, UploadFile, Form, Body, Query as QueryParam, WebSocket, WebSocketDisconnect
+from starlette.websockets import WebSocketState
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from features.bisabot.bisabot import ask_bisabot, retrieve_context, get_chat_history, clear_chat_history
+from features.surat_aju_banding.surat_aju_banding import buat_surat_aju_banding_pdf, buat_surat_aju_banding_batch, shutdown_batch_pool, gabung_pdf, zip_pdf
 from features.keluhanmu_bisa_diklaim.keluhanmu_bisa_diklaim import analyze_health_complaint, analyze_health_complaint_from_audio
-from features.hospital_recommender.hospital_recommender import recommend_hospitals
+from features.hospital_recommender.hospital_recommender import recommend_hospitals, recommend_hospitals_batch, recommend_hospitals_sharded, HOSPITAL_FIELDS
 from features.data_asuransi_ai.scan_data import extract_text, parse_with_ai
 from features.bantu_proses_ai.bantu_proses_ai import cek_data_isi_data
 from features.slip_rumah_sakit.slip_rumah_sakit import extract_text, parse_slip_with_ai
-from features.insurance_recommender.insurance_recommender import load_asuransi_data, recommend_asuransi
+from features.insurance_recommender.insurance_recommender import load_asuransi_data, recommend_asuransi, recommend_asuransi_batch, ASURANSI_FIELDS
 from features.hasil_diagnosis_dokter.hasil_diagnosis_dokter import process_diagnosis
 from features.tanggungan_ai.tanggungan_ai import analisis_tanggungan_ai
-from daftar_rumah_sakit.data_processing import load_faiss_index, load_json, build_model
+from features.klaim_pipeline.klaim_pipeline import build_klaim_pipeline
+from daftar_rumah_sakit.data_processing import load_faiss_index, load_json, build_model, to_columns
+from daftar_rumah_sakit.columnar_store import load_columnar_store
+from daftar_rumah_sakit.sharding import HOSPITAL_SHARDS, ShardedHospitalSearch
 import os
+import io
 import uuid
+import asyncio
 import tempfile
 import shutil
-from typing import Optional
+import subprocess
+import threading
+import sys
+import re
+from typing import Optional, List, Literal
 import logging
 from features.data_asuransi_ai_slip.data_asuransi_ai_slip import extract_slip_text
-import whisper
+from core.result_store import ResultStore, purge_expired, RESULT_STORE_PURGE_SECONDS
+from core.audio import StreamingDecoder, SAMPLE_RATE, STREAM_FORMATS
+from core.asr import StreamingTranscriber, transcribe_file
+from core.executors import run_in_pool, pool_stats, shutdown_pools, POOL_EMBEDDING, POOL_OCR, POOL_ASR, POOL_PDF, POOL_DEFAULT
+from core.tokens import load_tokenizer
+from core.metrics import REQUEST_SECONDS, start_request_timing, finish_request_timing, render_prometheus
+from core.profiling import (ADMIN_TOKEN, PROFILING_ENABLED, PROFILE_HEADER, ADMIN_HEADER, MAX_SAMPLE_SECONDS, RequestProfile, is_admin_token,
+                            sample_process, tracemalloc_start, tracemalloc_stop, tracemalloc_report)
+from core.snapshots import CorpusSnapshot, CORPORA, index_registry, read_state, list_snapshots, activate, rollback
+from core.jobs import job_queue, QueueFullError, FINISHED_STATUSES, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+import json
+import hmac
+import hashlib
+import secrets
+import time
 
 app = FastAPI(title="BISAcare - AI-Powered Insurance Assistant")
 logger = logging.getLogger("uvicorn.error")
 
+RECOMMEND_TOP_N_MAX = int(os.getenv("RECOMMEND_TOP_N_MAX", "100"))
+
 class Query(BaseModel):
     question: str
 
@@ -39,6 +65,10 @@ class SuratAjuBandingRequest(BaseModel):
     alasan_banding: str
     nama_asuransi: str         # Ubah dari nama_perusahaan_asuransi
 
+class SuratAjuBandingBatchRequest(BaseModel):
+    surat: List[SuratAjuBandingRequest]
+    format: str = "zip"        # "zip" atau "pdf" (digabung jadi satu PDF)
+
 class KeluhanRequest(BaseModel):
     keluhan_text: str
     metode_input: str = "text"
@@ -52,16 +82,263 @@ class HospitalRecommendRequest(BaseModel):
     nama_asuransi: str
     nama_provinsi: str
     nama_daerah: str
-    top_n: int = 5
+    top_n: int = Field(5, gt=0, le=RECOMMEND_TOP_N_MAX)
 
 class InsuranceRecommendRequest(BaseModel):
     query: str
-    top_n: int = 5
+    top_n: int = Field(5, gt=0, le=RECOMMEND_TOP_N_MAX)
+
+class HospitalRecommendBatchRequest(BaseModel):
+    queries: List[HospitalRecommendRequest]
+
+class InsuranceRecommendBatchRequest(BaseModel):
+    queries: List[InsuranceRecommendRequest]
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Catat durasi request ke /metrics dan kirim rincian per tahap lewat header Server-Timing."""
+    token = start_request_timing()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - start
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        REQUEST_SECONDS.observe(elapsed, method=request.method, path=path, status=str(status))
+        server_timing = finish_request_timing(token)
+    total = f"total;dur={1000 * elapsed:.1f}"
+    response.headers["Server-Timing"] = f"{server_timing}, {total}" if server_timing else total
+    return response
+
+@app.get("/metrics")
+async def metrics():
+    """Metrik format Prometheus (durasi per tahap, request, cache, token LLM, pool executor)."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+profile_store = ResultStore("profiles", ttl=3600)
+
+def require_admin(request: Request, enabled: bool = PROFILING_ENABLED):
+    """
+    Endpoint admin hanya tersedia jika fiturnya aktif (default: profiling, yaitu PROFILING_ENABLED=1 dan ADMIN_TOKEN
+    terisi; keduanya mati secara default) dan header X-Admin-Token cocok.
+    """
+    if not enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin_token(request.headers.get(ADMIN_HEADER, "")):
+        raise HTTPException(status_code=403, detail="Admin token tidak valid")
+
+if PROFILING_ENABLED:
+    # Middleware hanya dipasang saat profiling aktif, sehingga tanpa biaya saat nonaktif
+    @app.middleware("http")
+    async def profiling_middleware(request: Request, call_next):
+        """Profil satu request jika membawa header X-Debug-Profile + X-Admin-Token yang valid."""
+        if not request.headers.get(PROFILE_HEADER) or not is_admin_token(request.headers.get(ADMIN_HEADER, "")):
+            return await call_next(request)
+        profile = RequestProfile()
+        profile.start()
+        try:
+            response = await call_next(request)
+        finally:
+            folded = profile.stop()
+        profile_id = str(uuid.uuid4())
+        profile_store.set(profile_id, {"path": request.url.path, "folded": folded})
+        response.headers["X-Profile-Id"] = profile_id
+        return response
+
+@app.get("/admin/profile/sample")
+async def admin_profile_sample(
+    request: Request,
+    seconds: float = QueryParam(10, gt=0, le=MAX_SAMPLE_SECONDS),
+    interval_ms: float = QueryParam(10, ge=1, le=1000)
+):
+    """Sampling stack seluruh worker selama N detik; output folded stacks untuk flamegraph."""
+    require_admin(request)
+    folded = await asyncio.to_thread(sample_process, seconds, interval_ms / 1000)
+    return PlainTextResponse(folded)
+
+@app.get("/admin/profile/requests/{profile_id}")
+async def admin_profile_request(request: Request, profile_id: str):
+    """Ambil hasil profil satu request (folded stacks) berdasarkan header X-Profile-Id."""
+    require_admin(request)
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profil tidak ditemukan")
+    return PlainTextResponse(profile["folded"])
+
+@app.post("/admin/profile/tracemalloc/start")
+async def admin_tracemalloc_start(request: Request, nframes: int = QueryParam(25, ge=1, le=100)):
+    require_admin(request)
+    # Snapshot baseline bisa lama pada heap besar: jangan jalankan di event loop
+    await asyncio.to_thread(tracemalloc_start, nframes)
+    return {"status": "tracing"}
+
+@app.post("/admin/profile/tracemalloc/stop")
+async def admin_tracemalloc_stop(request: Request):
+    require_admin(request)
+    await asyncio.to_thread(tracemalloc_stop)
+    return {"status": "stopped"}
+
+@app.get("/admin/profile/tracemalloc")
+async def admin_tracemalloc_report(request: Request, path: str = "", top: int = QueryParam(30, ge=1, le=500)):
+    """Snapshot tracemalloc; path=embedding atau path=whisper untuk memfilter jalur tertentu."""
+    require_admin(request)
+    return await asyncio.to_thread(tracemalloc_report, path, top)
+
+index_builds = {}
+# Jumlah build selesai yang tetap ditampilkan di status; yang lebih lama dibuang
+INDEX_BUILD_HISTORY = 20
+
+def require_index_admin(request: Request, corpus: str):
+    require_admin(request, enabled=bool(ADMIN_TOKEN))
+    if corpus not in CORPORA:
+        raise HTTPException(status_code=404, detail=f"Korpus tidak dikenali: {corpus}")
+    if corpus == "hospital" and hospital_shards:
+        raise HTTPException(status_code=409, detail="Mode shard aktif (HOSPITAL_SHARDS); snapshot hospital tidak dipakai")
+
+async def reload_index(corpus: str, state: dict) -> dict:
+    """Swap snapshot di worker ini; jika gagal dimuat, snapshot lama tetap melayani request."""
+    try:
+        snapshot = await asyncio.to_thread(index_registry.reload, corpus)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Versi {state['current']} aktif tetapi gagal dimuat: {str(e)}; gunakan rollback")
+    return {"state": state, "loaded_version": snapshot.version}
+
+@app.get("/admin/index/{corpus}")
+async def admin_index_status(request: Request, corpus: str):
+    """Versi aktif, versi yang dimuat worker ini, daftar snapshot, dan build yang dipicu dari worker ini."""
+    require_index_admin(request, corpus)
+    builds = [{"pid": pid, "returncode": proc.returncode} for pid, (name, proc) in index_builds.items() if name == corpus]
+    return {
+        "state": read_state(corpus),
+        "loaded_version": index_registry.version(corpus),
+        "snapshots": list_snapshots(corpus),
+        "builds": builds
+    }
+
+@app.post("/admin/index/{corpus}/build")
+async def admin_index_build(request: Request, corpus: str, activate_after: bool = QueryParam(True, alias="activate")):
+    """Bangun snapshot baru di proses terpisah; activate=true mengaktifkannya setelah selesai."""
+    require_index_admin(request, corpus)
+    command = [sys.executable, "-m", "core.snapshots", "build", corpus] + (["--activate"] if activate_after else [])
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, start_new_session=True)
+    # Tunggu di thread agar proses yang selesai langsung di-reap (tidak jadi zombie)
+    threading.Thread(target=proc.wait, daemon=True).start()
+    finished = [pid for pid, (_, p) in index_builds.items() if p.returncode is not None]
+    for pid in finished[:-INDEX_BUILD_HISTORY]:
+        del index_builds[pid]
+    index_builds[proc.pid] = (corpus, proc)
+    return JSONResponse(status_code=202, content={"status": "building", "pid": proc.pid, "status_url": f"/admin/index/{corpus}"})
+
+@app.post("/admin/index/{corpus}/activate")
+async def admin_index_activate(request: Request, corpus: str, version: str):
+    """Aktifkan versi tertentu; worker ini langsung swap, worker lain dalam SNAPSHOT_POLL_SECONDS."""
+    require_index_admin(request, corpus)
+    try:
+        state = await asyncio.to_thread(activate, corpus, version)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return await reload_index(corpus, state)
+
+@app.post("/admin/index/{corpus}/rollback")
+async def admin_index_rollback(request: Request, corpus: str):
+    require_index_admin(request, corpus)
+    try:
+        state = await asyncio.to_thread(rollback, corpus)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return await reload_index(corpus, state)
+
+async def purge_result_store():
+    """Bersihkan hasil kedaluwarsa di backend result store saat startup lalu setiap RESULT_STORE_PURGE_SECONDS."""
+    while True:
+        removed = await asyncio.to_thread(purge_expired)
+        if removed:
+            logger.info(f"Purged {removed} expired result store rows")
+        await asyncio.sleep(RESULT_STORE_PURGE_SECONDS)
+
+background_tasks = []
+
+@app.on_event("startup")
+async def startup_job_queue():
+    await job_queue.start()
+    await asyncio.to_thread(load_tokenizer)
+    background_tasks.append(asyncio.create_task(purge_result_store()))
+
+@app.on_event("shutdown")
+async def shutdown_job_queue():
+    for task in background_tasks:
+        task.cancel()
+    await job_queue.stop()
+    shutdown_pools()
+    shutdown_batch_pool()
+
+def submit_job(job_type: str, func, *args, priority: int = PRIORITY_NORMAL, **kwargs):
+    """Masukkan pekerjaan berat ke antrian job dan langsung kembalikan job_id (HTTP 202)."""
+    try:
+        job_id = job_queue.submit(job_type, func, *args, priority=priority, **kwargs)
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return JSONResponse(status_code=202, content={
+        "status": "queued",
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "events_url": f"/jobs/{job_id}/events"
+    })
+
+def save_upload_to_temp(upload: UploadFile) -> str:
+    suffix = os.path.splitext(upload.filename or "")[1].lower()
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        shutil.copyfileobj(upload.file, temp_file)
+        return temp_file.name
+
+def remove_temp_file(path: Optional[str]):
+    if path and os.path.exists(path):
+        os.unlink(path)
+
+@app.get("/executors/stats")
+async def executor_stats():
+    """Metrik pool executor: queue depth, waktu tunggu, dan waktu eksekusi per pool."""
+    return {"pools": pool_stats(), "jobs_pending": job_queue.pending()}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Cek status job async (queued, running, done, error) beserta hasilnya."""
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """Subscribe perubahan status job via Server-Sent Events."""
+    if job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job tidak ditemukan")
+
+    async def event_stream():
+        last_status = None
+        while True:
+            job = await job_queue.wait_for_change(job_id, last_status)
+            if job is None:
+                break
+            if job["status"] != last_status:
+                last_status = job["status"]
+                yield f"event: {last_status}\ndata: {json.dumps(job, ensure_ascii=False)}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+            if last_status in FINISHED_STATUSES:
+                break
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @app.post("/bisabot") #OK
 async def chat(query: Query):
     """Chat dengan BISAbot yang sudah terintegrasi dengan RAG"""
-    response = ask_bisabot(query.question)
+    # Retrieval (encode + FAISS) di pool embedding; panggilan Gemini yang dominan I/O di pool default
+    context = await run_in_pool(POOL_EMBEDDING, retrieve_context, query.question)
+    response = await run_in_pool(POOL_DEFAULT, ask_bisabot, query.question, context)
     return {"answer": response}
 
 @app.get("/bisabot/history") #OK
@@ -76,53 +353,154 @@ async def clear_history():
     clear_chat_history()
     return {"message": "Chat history cleared successfully"}
 
+SURAT_TTL = int(os.getenv("SURAT_TTL", "3600"))
+SURAT_BATCH_MAX = int(os.getenv("SURAT_BATCH_MAX", "500"))
+surat_store = ResultStore("surat", ttl=SURAT_TTL)
+
+def surat_kwargs(request: SuratAjuBandingRequest) -> dict:
+    return dict(
+        nama=request.nama,
+        no_polis=request.nomor_polis,
+        alamat=request.alamat,
+        no_telepon=request.nomor_hp,
+        tanggal_pengajuan=request.tanggal_pengajuan,
+        nomor_klaim=request.nomor_klaim,
+        perihal_klaim=request.perihal_klaim,
+        alasan_penolakan=request.alasan_penolakan,
+        alasan_banding=request.alasan_banding,
+        nama_perusahaan_asuransi=request.nama_asuransi
+    )
+
 @app.post("/surat_aju_banding") #OK
-async def buat_surat_banding(request: SuratAjuBandingRequest):
+async def buat_surat_banding(request: SuratAjuBandingRequest, mode: str = QueryParam("link")):
+    """
+    Buat surat aju banding (PDF) di memori tanpa menulis ke disk.
+    mode=link (default): PDF disimpan sementara di result store, unduh lewat download_url.
+    mode=stream: PDF langsung dikirim sebagai response.
+    """
     try:
         unique_id = str(uuid.uuid4())[:8]
         nama_file = f"surat_aju_banding_{unique_id}.pdf"
         
-        buat_surat_aju_banding_pdf(
-            nama=request.nama,
-            no_polis=request.nomor_polis,              
-            alamat=request.alamat,
-            no_telepon=request.nomor_hp,              
-            tanggal_pengajuan=request.tanggal_pengajuan,
-            nomor_klaim=request.nomor_klaim,
-            perihal_klaim=request.perihal_klaim,
-            alasan_penolakan=request.alasan_penolakan,
-            alasan_banding=request.alasan_banding,
-            nama_perusahaan_asuransi=request.nama_asuransi, 
-            nama_file_output=nama_file
-        )
+        pdf_bytes = await run_in_pool(POOL_PDF, buat_surat_aju_banding_pdf, **surat_kwargs(request))
         
-        if not os.path.exists(nama_file):
+        if not pdf_bytes:
             raise HTTPException(status_code=500, detail="Gagal membuat file PDF")
-        
+
+        if mode == "stream":
+            return StreamingResponse(
+                io.BytesIO(pdf_bytes),
+                media_type="application/pdf",
+                headers={"Content-Disposition": f'attachment; filename="{nama_file}"'}
+            )
+
+        surat_store.set(nama_file, pdf_bytes)
         return {
             "message": "Surat aju banding berhasil dibuat",
             "filename": nama_file,
-            "download_url": f"/download/{nama_file}"
+            "download_url": f"/download/{nama_file}",
+            "expires_in": SURAT_TTL
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/surat_aju_banding/batch")
+async def buat_surat_banding_batch(request: SuratAjuBandingBatchRequest):
+    """
+    Buat banyak surat aju banding sekaligus (dirender paralel di process pool).
+    format=zip: satu file PDF per surat dalam arsip ZIP. format=pdf: semua surat digabung jadi satu PDF.
+    """
+    if not request.surat:
+        raise HTTPException(status_code=400, detail="Daftar surat tidak boleh kosong")
+    if len(request.surat) > SURAT_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"Maksimal {SURAT_BATCH_MAX} surat per batch")
+    if request.format not in ("zip", "pdf"):
+        raise HTTPException(status_code=400, detail="Format harus 'zip' atau 'pdf'")
+
+    try:
+        daftar_pdf = await run_in_pool(
+            POOL_PDF,
+            buat_surat_aju_banding_batch,
+            [surat_kwargs(surat) for surat in request.surat]
+        )
+        batch_id = str(uuid.uuid4())[:8]
+        if request.format == "pdf":
+            content = await run_in_pool(POOL_PDF, gabung_pdf, daftar_pdf)
+            media_type = "application/pdf"
+            nama_file = f"surat_aju_banding_batch_{batch_id}.pdf"
+        else:
+            daftar_file = [
+                (f"{i + 1:04d}_{re.sub(r'[^A-Za-z0-9_-]', '_', surat.nomor_klaim)}.pdf", pdf_bytes)
+                for i, (surat, pdf_bytes) in enumerate(zip(request.surat, daftar_pdf))
+            ]
+            content = await run_in_pool(POOL_PDF, zip_pdf, daftar_file)
+            media_type = "application/zip"
+            nama_file = f"surat_aju_banding_batch_{batch_id}.zip"
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+    return StreamingResponse(
+        io.BytesIO(content),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{nama_file}"'}
+    )
+
 DATA_PATH = "daftar_rumah_sakit/preprocessed/daftar_rumah_sakit_all.json"
 INDEX_PATH = "daftar_rumah_sakit/app/embeddings/hospital_st.index"
 MODEL_PATH = "daftar_rumah_sakit/app/models/st_model"
+# Store kolom hasil `python -m daftar_rumah_sakit.columnar_store`; dibuka via mmap jika tersedia
+HOSPITAL_STORE_PATH = os.getenv("HOSPITAL_STORE_PATH", "daftar_rumah_sakit/app/columnar/hospital")
+
+def load_legacy_hospital() -> CorpusSnapshot:
+    """Index dan data bawaan repo, dipakai selama belum ada snapshot aktif (lihat core/snapshots.py)."""
+    if os.path.exists(HOSPITAL_STORE_PATH):
+        data = load_columnar_store(HOSPITAL_STORE_PATH)
+        columns = data.columns
+    else:
+        logger.info(f"Columnar store {HOSPITAL_STORE_PATH} not found, falling back to {DATA_PATH}")
+        data = load_json(DATA_PATH)
+        columns = to_columns(data, HOSPITAL_FIELDS)
+    return CorpusSnapshot("hospital", "legacy", index=load_faiss_index(INDEX_PATH), model=build_model(MODEL_PATH),
+                          data=data, columns=columns)
+
+index_registry.register("hospital", load_legacy_hospital)
+if HOSPITAL_SHARDS:
+    # Mode shard: worker ini hanya meng-encode query; index dan metadata dilayani proses shard
+    hospital_shards = ShardedHospitalSearch(HOSPITAL_SHARDS)
+    hospital_query_model = build_model(MODEL_PATH)
+    if read_state("hospital")["current"]:
+        logger.warning("HOSPITAL_SHARDS is set: the active hospital snapshot is ignored, queries are encoded "
+                       f"with {MODEL_PATH}; rebuild the shards whenever the model changes")
+else:
+    hospital_shards = None
+    index_registry.get("hospital")
+
+RECOMMEND_BATCH_MAX = int(os.getenv("RECOMMEND_BATCH_MAX", "5000"))
 
-hospital_data = load_json(DATA_PATH)
-hospital_index = load_faiss_index(INDEX_PATH)
-hospital_model = build_model(MODEL_PATH)
+def check_batch_size(n: int):
+    if n == 0:
+        raise HTTPException(status_code=400, detail="Daftar query kosong")
+    if n > RECOMMEND_BATCH_MAX:
+        raise HTTPException(status_code=413, detail=f"Maksimal {RECOMMEND_BATCH_MAX} query per batch")
 
 @app.post("/rekomendasi_rumah_sakit") #OK
 async def rekomendasi_rumah_sakit(request: HospitalRecommendRequest):
+    if hospital_shards:
+        try:
+            results, info = await run_in_pool(POOL_EMBEDDING, recommend_hospitals_sharded,
+                                              hospital_shards, hospital_query_model, [request.dict()])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        return {"results": results[0], **info}
+    hospital = index_registry.get("hospital")
     try:
-        results = recommend_hospitals(
-            data=hospital_data,
-            index=hospital_index,
-            model=hospital_model,
+        results = await run_in_pool(
+            POOL_EMBEDDING,
+            recommend_hospitals,
+            data=hospital.data,
+            index=hospital.index,
+            model=hospital.model,
             nama=request.nama,
             kelurahan_desa=request.kelurahan_desa,
             kecamatan=request.kecamatan,
@@ -141,36 +519,87 @@ ASURANSI_DATA_PATH = "daftar_asuransi/preprocessed/daftar_asuransi_all.json"
 ASURANSI_INDEX_PATH = "daftar_asuransi/app/embeddings/asuransi_st.index"
 ASURANSI_MODEL_PATH = "daftar_asuransi/app/models/st_model"
 
-asuransi_data = load_json(ASURANSI_DATA_PATH)
-asuransi_index = load_faiss_index(ASURANSI_INDEX_PATH)
-asuransi_model = build_model(ASURANSI_MODEL_PATH)
+def load_legacy_asuransi() -> CorpusSnapshot:
+    data = load_json(ASURANSI_DATA_PATH)
+    return CorpusSnapshot("asuransi", "legacy", index=load_faiss_index(ASURANSI_INDEX_PATH),
+                          model=build_model(ASURANSI_MODEL_PATH), data=data, columns=to_columns(data, ASURANSI_FIELDS))
+
+index_registry.register("asuransi", load_legacy_asuransi)
+index_registry.get("asuransi")
 
 @app.post("/rekomendasi_asuransi") #OK
 async def rekomendasi_asuransi(request: InsuranceRecommendRequest):
+    asuransi = index_registry.get("asuransi")
     try:
-        results = recommend_asuransi(
+        results = await run_in_pool(
+            POOL_EMBEDDING,
+            recommend_asuransi,
             query=request.query,
-            data=asuransi_data,
-            index=asuransi_index,
-            model=asuransi_model,
+            data=asuransi.data,
+            index=asuransi.index,
+            model=asuransi.model,
             top_n=request.top_n
         )
         return {"results": results}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
 
+@app.post("/rekomendasi_rumah_sakit/batch")
+async def rekomendasi_rumah_sakit_batch(request: HospitalRecommendBatchRequest):
+    """Rekomendasi rumah sakit untuk banyak query sekaligus (satu kali encode dan index.search)."""
+    check_batch_size(len(request.queries))
+    if hospital_shards:
+        try:
+            results, info = await run_in_pool(POOL_EMBEDDING, recommend_hospitals_sharded,
+                                              hospital_shards, hospital_query_model, [q.dict() for q in request.queries])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+        return {"results": results, **info}
+    hospital = index_registry.get("hospital")
+    try:
+        results = await run_in_pool(
+            POOL_EMBEDDING,
+            recommend_hospitals_batch,
+            hospital.columns,
+            hospital.index,
+            hospital.model,
+            [q.dict() for q in request.queries]
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
+@app.post("/rekomendasi_asuransi/batch")
+async def rekomendasi_asuransi_batch(request: InsuranceRecommendBatchRequest):
+    """Rekomendasi asuransi untuk banyak query sekaligus (satu kali encode dan index.search)."""
+    check_batch_size(len(request.queries))
+    asuransi = index_registry.get("asuransi")
+    try:
+        results = await run_in_pool(
+            POOL_EMBEDDING,
+            recommend_asuransi_batch,
+            [q.query for q in request.queries],
+            asuransi.columns,
+            asuransi.index,
+            asuransi.model,
+            [q.top_n for q in request.queries]
+        )
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error: {str(e)}")
+
 # Download surat aju banding
 @app.get("/download/{filename}") #OK
 async def download_file(filename: str):
-    file_path = f"./{filename}"
+    pdf_bytes = surat_store.get(filename)
     
-    if not os.path.exists(file_path):
+    if pdf_bytes is None:
         raise HTTPException(status_code=404, detail="File tidak ditemukan")
     
-    return FileResponse(
-        path=file_path,
-        filename=filename,
-        media_type='application/pdf'
+    return StreamingResponse(
+        io.BytesIO(pdf_bytes),
+        media_type='application/pdf',
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
     )
 
 @app.post("/isi_data")
@@ -187,12 +616,18 @@ async def isi_data(
     Output: hasil OCR & parsing + data form.
     """
     ktp_bytes = await foto_ktp.read()
-    ktp_raw_text = extract_text(ktp_bytes)
-    ktp_parsed = parse_with_ai(ktp_raw_text)
-
     polis_bytes = await foto_polis.read()
-    polis_raw_text = extract_text(polis_bytes)
-    polis_parsed = parse_with_ai(polis_raw_text)
+    ktp_raw_text, polis_raw_text = await asyncio.gather(
+        run_in_pool(POOL_OCR, extract_text, ktp_bytes),
+        run_in_pool(POOL_OCR, extract_text, polis_bytes)
+    )
+    try:
+        ktp_parsed, polis_parsed = await asyncio.gather(
+            run_in_pool(POOL_DEFAULT, parse_with_ai, ktp_raw_text),
+            run_in_pool(POOL_DEFAULT, parse_with_ai, polis_raw_text)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=502, detail=str(e))
 
     if isinstance(polis_parsed, dict) and "jenis_layanan" in polis_parsed:
         polis_parsed.pop("jenis_layanan")
@@ -215,10 +650,10 @@ async def bantu_proses_ai_endpoint(
     """
     Mengecek data hasil isi_data dan memberi saran AI untuk langkah selanjutnya.
     """
-    result = cek_data_isi_data(data_isi)
+    result = await run_in_pool(POOL_DEFAULT, cek_data_isi_data, data_isi)
     return result
 
-slip_data_store = {}
+slip_data_store = ResultStore("slip")
 
 @app.post("/slip_rumah_sakit")
 async def upload_slip_rumah_sakit(
@@ -228,14 +663,14 @@ async def upload_slip_rumah_sakit(
     Upload foto slip rumah sakit, ekstrak data penting dengan AI.
     """
     image_bytes = await foto_slip.read()
-    raw_text = extract_text(image_bytes)
-    parsed = parse_slip_with_ai(raw_text)
+    raw_text = await run_in_pool(POOL_OCR, extract_text, image_bytes)
+    parsed = await run_in_pool(POOL_DEFAULT, parse_slip_with_ai, raw_text)
     slip_id = str(uuid.uuid4())[:8]
-    slip_data_store[slip_id] = {
+    slip_data_store.set(slip_id, {
         "filename": foto_slip.filename,
         "raw_text": raw_text,
         "parsed": parsed
-    }
+    })
     return {
         "slip_id": slip_id,
         "filename": foto_slip.filename,
@@ -252,16 +687,51 @@ async def get_slip_rumah_sakit(slip_id: str):
         raise HTTPException(status_code=404, detail="Slip tidak ditemukan")
     return data
 
-keluhan_data_store = {}
+keluhan_data_store = ResultStore("keluhan")
+
+def simpan_hasil_keluhan(result: dict, keluhan_input: str, metode: str) -> dict:
+    keluhan_id = str(uuid.uuid4())[:8]
+    keluhan_data = {
+        "keluhan_input": keluhan_input,
+        "metode_input": metode,
+        "analisis": {
+            "persentase_kemungkinan_klaim": result.get("persentase_klaim", "Tidak dapat ditentukan"),
+            "kemungkinan_diagnosis": result.get("kemungkinan_diagnosis", []),
+            "rekomendasi_tindakan": result.get("rekomendasi_tindakan", []),
+            "tingkat_urgensi": result.get("tingkat_urgensi", "sedang"),
+            "dokumen_pendukung_diperlukan": result.get("dokumen_pendukung", [])
+        },
+        "disclaimer": "Hasil analisis ini hanya sebagai referensi. Konsultasikan dengan dokter untuk diagnosis yang akurat."
+    }
+    keluhan_data_store.set(keluhan_id, keluhan_data)
+    return {
+        "status": "success",
+        "keluhan_id": keluhan_id,
+        **keluhan_data
+    }
+
+def proses_keluhan_audio(temp_file_path: str, file_extension: str) -> dict:
+    try:
+        result = analyze_health_complaint_from_audio(temp_file_path)
+    finally:
+        remove_temp_file(temp_file_path)
+    metode = "voice" if file_extension != '.mp4' else "video"
+    return simpan_hasil_keluhan(result, result.get("transcribed_text", ""), metode)
+
+def proses_keluhan_text(keluhan_text: str) -> dict:
+    result = analyze_health_complaint(keluhan_text)
+    return simpan_hasil_keluhan(result, keluhan_text, "text")
 
 @app.post("/keluhanmu_bisa_diklaim") #OK
 async def analisis_keluhan(
     keluhan_text: Optional[str] = Form(None),
     metode_input: Optional[str] = Form("text"),
-    audio_file: Optional[UploadFile] = File(None)
+    audio_file: Optional[UploadFile] = File(None),
+    mode: Literal["sync", "async"] = QueryParam("sync")
 ):
     """
     Analisis keluhan kesehatan, input bisa teks atau audio/video.
+    Gunakan ?mode=async untuk langsung mendapat job_id tanpa menunggu analisis selesai.
     """
     try:
         if metode_input == "voice" and audio_file is not None:
@@ -273,42 +743,19 @@ async def analisis_keluhan(
                     detail=f"Format file tidak didukung. Gunakan: {', '.join(allowed_extensions)}"
                 )
             logger.info(f"Saving audio file: {audio_file.filename}")
-            with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-                shutil.copyfileobj(audio_file.file, temp_file)
-                temp_file_path = temp_file.name
+            temp_file_path = save_upload_to_temp(audio_file)
             logger.info(f"Temp file saved at: {temp_file_path}, exists: {os.path.exists(temp_file_path)}")
-            try:
-                result = analyze_health_complaint_from_audio(temp_file_path)
-                keluhan_input = result.get("transcribed_text", "")
-                metode = "voice" if file_extension != '.mp4' else "video"
-            finally:
-                if os.path.exists(temp_file_path):
-                    os.unlink(temp_file_path)
+            if mode == "async":
+                return submit_job("audio", proses_keluhan_audio, temp_file_path, file_extension, priority=PRIORITY_LOW)
+            return await run_in_pool(POOL_ASR, proses_keluhan_audio, temp_file_path, file_extension)
         elif keluhan_text is not None and keluhan_text.strip():
-            result = analyze_health_complaint(keluhan_text)
-            keluhan_input = keluhan_text
-            metode = "text"
+            if mode == "async":
+                return submit_job("llm", proses_keluhan_text, keluhan_text)
+            return await run_in_pool(POOL_DEFAULT, proses_keluhan_text, keluhan_text)
         else:
             raise HTTPException(status_code=400, detail="Keluhan tidak boleh kosong")
-        
-        keluhan_id = str(uuid.uuid4())[:8]
-        keluhan_data_store[keluhan_id] = {
-            "keluhan_input": keluhan_input,
-            "metode_input": metode,
-            "analisis": {
-                "persentase_kemungkinan_klaim": result.get("persentase_klaim", "Tidak dapat ditentukan"),
-                "kemungkinan_diagnosis": result.get("kemungkinan_diagnosis", []),
-                "rekomendasi_tindakan": result.get("rekomendasi_tindakan", []),
-                "tingkat_urgensi": result.get("tingkat_urgensi", "sedang"),
-                "dokumen_pendukung_diperlukan": result.get("dokumen_pendukung", [])
-            },
-            "disclaimer": "Hasil analisis ini hanya sebagai referensi. Konsultasikan dengan dokter untuk diagnosis yang akurat."
-        }
-        return {
-            "status": "success",
-            "keluhan_id": keluhan_id,
-            **keluhan_data_store[keluhan_id]
-        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error menganalisis keluhan: {str(e)}")
 
@@ -319,20 +766,119 @@ async def get_keluhanmu_bisa_diklaim(keluhan_id: str):
         raise HTTPException(status_code=404, detail="Data keluhan tidak ditemukan")
     return data
 
-@app.post("/hasil_diagnosis_dokter")
-async def hasil_diagnosis_dokter(
-    foto_diagnosis: UploadFile = File(None),
-    diagnosis_text: str = Form(None),
-    diagnosis_audio: UploadFile = File(None)
-):
+STREAM_PARTIAL_SECONDS = float(os.getenv("STREAM_PARTIAL_SECONDS", "1.5"))
+STREAM_MAX_SECONDS = float(os.getenv("STREAM_MAX_SECONDS", "300"))
+
+@app.websocket("/ws/keluhanmu_bisa_diklaim")
+async def keluhan_stream(websocket: WebSocket, format: str = QueryParam("auto")):
     """
-    Terima hasil diagnosis dokter melalui foto, text, atau voice over.
+    Transkripsi keluhan suara real-time. Client mengirim frame audio biner selagi bicara (webm/ogg dari
+    MediaRecorder, atau PCM 16 kHz mono dengan ?format=pcm_s16le / pcm_f32le), lalu teks {"event": "end"}.
+    Server mengirim {"event": "partial"} berkala, {"event": "final"}, lalu {"event": "result"} berisi analisis keluhan.
     """
+    await websocket.accept()
+    if format not in STREAM_FORMATS:
+        await websocket.close(code=1003, reason=f"Format audio tidak didukung (pilihan: {', '.join(STREAM_FORMATS)})")
+        return
+    decoder = StreamingDecoder(format)
+    transcriber = StreamingTranscriber()
+    ended = asyncio.Event()
+    state = {"disconnected": False}
+
+    async def receive_audio():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    state["disconnected"] = True
+                    break
+                if message.get("bytes"):
+                    await asyncio.to_thread(decoder.feed, message["bytes"])
+                elif message.get("text"):
+                    try:
+                        event = json.loads(message["text"]).get("event")
+                    except (ValueError, AttributeError):
+                        event = message["text"].strip()
+                    if event == "end":
+                        break
+        finally:
+            ended.set()
+
+    receiver = asyncio.create_task(receive_audio())
+    partial_task = None
+    close_code = 1000
+    try:
+        total_samples = 0
+        pending = []  # sampel yang belum diberikan ke transcriber selama partial masih berjalan
+        while not ended.is_set():
+            try:
+                await asyncio.wait_for(ended.wait(), timeout=STREAM_PARTIAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            samples = decoder.read()
+            if len(samples):
+                total_samples += len(samples)
+                if total_samples > STREAM_MAX_SECONDS * SAMPLE_RATE:
+                    await websocket.send_json({"event": "error", "detail": f"Rekaman melebihi {STREAM_MAX_SECONDS:.0f} detik"})
+                    return
+                pending.append(samples)
+            if partial_task is not None:
+                # Partial sebelumnya masih di pool ASR: lewati tick ini agar satu koneksi tidak menumpuk
+                # pekerjaan dan menahan koneksi lain
+                if not partial_task.done():
+                    continue
+                await websocket.send_json({"event": "partial", "text": partial_task.result()})
+                partial_task = None
+            if not pending:
+                continue
+            for chunk in pending:
+                transcriber.add(chunk)
+            pending = []
+            partial_task = asyncio.create_task(run_in_pool(POOL_ASR, transcriber.partial))
+        if state["disconnected"]:
+            return
+        if partial_task is not None:
+            await asyncio.gather(partial_task, return_exceptions=True)
+        if receiver.done() and receiver.exception() is not None:
+            # Decoder (ffmpeg) mati di tengah rekaman: jangan kirim transkrip final dari audio terpotong
+            logger.error(f"Streaming audio decoder failed: {receiver.exception()!r}")
+            await websocket.send_json({"event": "error", "detail": "Gagal men-decode audio, rekaman tidak lengkap"})
+            close_code = 1011
+            return
+
+        await asyncio.to_thread(decoder.close)
+        for chunk in pending:
+            transcriber.add(chunk)
+        transcriber.add(decoder.read())
+        final_text = await run_in_pool(POOL_ASR, transcriber.finish)
+        await websocket.send_json({"event": "final", "text": final_text})
+        if not final_text:
+            await websocket.send_json({"event": "error", "detail": "Tidak ada suara yang terdeteksi"})
+            return
+
+        # Analisis dimulai begitu segmen terakhir di-commit
+        result = await run_in_pool(POOL_DEFAULT, analyze_health_complaint, final_text)
+        await websocket.send_json({"event": "result", **simpan_hasil_keluhan(result, final_text, "voice")})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.error(f"Error in streaming transcription: {str(e)}")
+        close_code = 1011
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.send_json({"event": "error", "detail": f"Error menganalisis keluhan: {str(e)}"})
+    finally:
+        receiver.cancel()
+        if partial_task is not None:
+            partial_task.cancel()
+        decoder.kill()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await websocket.close(code=close_code)
+
+def proses_hasil_diagnosis(image_bytes: Optional[bytes], diagnosis_text: Optional[str], audio_path: Optional[str]) -> dict:
     result = {}
 
     # 1. Jika ada foto diagnosis
-    if foto_diagnosis is not None:
-        image_bytes = await foto_diagnosis.read()
+    if image_bytes is not None:
         # Proses OCR atau parsing gambar di sini
         result["foto_diagnosis"] = process_diagnosis(image_bytes=image_bytes)
 
@@ -342,66 +888,180 @@ async def hasil_diagnosis_dokter(
         result["diagnosis_text"] = process_diagnosis(text=diagnosis_text)
 
     # 3. Jika ada audio diagnosis
-    if diagnosis_audio is not None:
-        audio_path = f"/tmp/{diagnosis_audio.filename}"
-        with open(audio_path, "wb") as f:
-            f.write(await diagnosis_audio.read())
+    if audio_path is not None:
         # Proses transkripsi audio di sini
-        result["diagnosis_audio"] = process_diagnosis(audio_path=audio_path)
-        os.remove(audio_path)
-
-    if not result:
-        raise HTTPException(status_code=400, detail="Harus upload foto, isi text, atau voice diagnosis dokter.")
+        try:
+            result["diagnosis_audio"] = process_diagnosis(audio_path=audio_path)
+        finally:
+            remove_temp_file(audio_path)
 
     return {
         "status": "success",
         "hasil_diagnosis": result
     }
 
+@app.post("/hasil_diagnosis_dokter")
+async def hasil_diagnosis_dokter(
+    foto_diagnosis: UploadFile = File(None),
+    diagnosis_text: str = Form(None),
+    diagnosis_audio: UploadFile = File(None),
+    mode: Literal["sync", "async"] = QueryParam("sync")
+):
+    """
+    Terima hasil diagnosis dokter melalui foto, text, atau voice over.
+    Gunakan ?mode=async untuk memproses di background.
+    """
+    image_bytes = await foto_diagnosis.read() if foto_diagnosis is not None else None
+    has_text = diagnosis_text is not None and diagnosis_text.strip()
+    if image_bytes is None and not has_text and diagnosis_audio is None:
+        raise HTTPException(status_code=400, detail="Harus upload foto, isi text, atau voice diagnosis dokter.")
+
+    audio_path = save_upload_to_temp(diagnosis_audio) if diagnosis_audio is not None else None
+    job_type = "audio" if audio_path else "ocr"
+    if mode == "async":
+        return submit_job(job_type, proses_hasil_diagnosis, image_bytes, diagnosis_text, audio_path)
+    pool_name = POOL_ASR if job_type == "audio" else POOL_OCR
+    return await run_in_pool(pool_name, proses_hasil_diagnosis, image_bytes, diagnosis_text, audio_path)
+
 @app.post("/tanggungan_ai")
 async def tanggungan_ai_endpoint(
     isi_data: dict = Body(...),
-    hasil_diagnosis: dict = Body(...)
+    hasil_diagnosis: dict = Body(...),
+    mode: Literal["sync", "async"] = QueryParam("sync")
 ):
     """
     Analisis tanggungan asuransi berdasarkan data isi_data dan hasil diagnosis dokter (menggunakan Gemini/AI).
+    Gunakan ?mode=async untuk memproses di background.
     """
-    result = analisis_tanggungan_ai(isi_data=isi_data, hasil_diagnosis=hasil_diagnosis)
+    if mode == "async":
+        return submit_job("llm", analisis_tanggungan_ai, isi_data=isi_data, hasil_diagnosis=hasil_diagnosis,
+                          priority=PRIORITY_HIGH)
+    result = await run_in_pool(POOL_DEFAULT, analisis_tanggungan_ai, isi_data=isi_data, hasil_diagnosis=hasil_diagnosis)
     return result
 
-@app.post("/scan_data_slip")
-async def scan_data_slip(
-    foto_slip: UploadFile = File(None),
-    audio_slip: UploadFile = File(None)
-):
-    """
-    Upload foto slip rumah sakit (gambar) dan/atau audio slip (suara), baca teks slip dengan OCR dan transkripsi suara.
-    """
+def proses_scan_data_slip(image_bytes: Optional[bytes], audio_path: Optional[str]) -> dict:
     result = {}
 
     # Proses gambar slip dengan OCR
-    if foto_slip is not None:
-        image_bytes = await foto_slip.read()
+    if image_bytes is not None:
         slip_text = extract_slip_text(image_bytes)
         result["slip_text"] = slip_text
 
-    # Proses audio slip dengan OpenAI Whisper
-    if audio_slip is not None:
-        audio_path = f"/tmp/{audio_slip.filename}"
-        with open(audio_path, "wb") as f:
-            f.write(await audio_slip.read())
+    # Proses audio slip dengan backend ASR bersama (ASR_BACKEND, model di-cache per proses)
+    if audio_path is not None:
         try:
-            model = whisper.load_model("base")
-            transcribe_result = model.transcribe(audio_path, language="indonesian")
-            result["slip_audio_text"] = transcribe_result["text"]
+            result["slip_audio_text"] = transcribe_file(audio_path)
         finally:
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
+            remove_temp_file(audio_path)
+
+    return result
 
-    if not result:
+@app.post("/scan_data_slip")
+async def scan_data_slip(
+    foto_slip: UploadFile = File(None),
+    audio_slip: UploadFile = File(None),
+    mode: Literal["sync", "async"] = QueryParam("sync")
+):
+    """
+    Upload foto slip rumah sakit (gambar) dan/atau audio slip (suara), baca teks slip dengan OCR dan transkripsi suara.
+    Gunakan ?mode=async untuk memproses di background.
+    """
+    if foto_slip is None and audio_slip is None:
         raise HTTPException(status_code=400, detail="Harus upload foto slip atau audio slip.")
 
-    return result
+    image_bytes = await foto_slip.read() if foto_slip is not None else None
+    audio_path = save_upload_to_temp(audio_slip) if audio_slip is not None else None
+    job_type = "audio" if audio_path else "ocr"
+    if mode == "async":
+        return submit_job(job_type, proses_scan_data_slip, image_bytes, audio_path)
+    pool_name = POOL_ASR if job_type == "audio" else POOL_OCR
+    return await run_in_pool(pool_name, proses_scan_data_slip, image_bytes, audio_path)
+
+def recommend_hospital_for_claim(query: dict) -> list:
+    """Rekomendasi rumah sakit untuk pipeline klaim, dari shard atau snapshot index yang aktif."""
+    if hospital_shards:
+        results, _ = recommend_hospitals_sharded(hospital_shards, hospital_query_model, [query])
+        return results[0]
+    hospital = index_registry.get("hospital")
+    return recommend_hospitals_batch(hospital.columns, hospital.index, hospital.model, [query])[0]
+
+klaim_pipeline = build_klaim_pipeline(recommend_hospital_for_claim)
+# claim_id -> sha256(claim_token); hanya pemegang token yang bisa membaca atau mengirim ulang klaim
+klaim_tokens = ResultStore("klaim_tokens", memory=None)
+CLAIM_TOKEN_HEADER = "X-Claim-Token"
+
+def hash_claim_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def require_claim_token(claim_id: str, token: Optional[str]):
+    expected = klaim_tokens.get(claim_id)
+    if expected is None:
+        raise HTTPException(status_code=404, detail="Klaim tidak ditemukan atau sudah kedaluwarsa")
+    if not token or not hmac.compare_digest(expected, hash_claim_token(token)):
+        raise HTTPException(status_code=403, detail="claim_token tidak valid")
+
+@app.post("/klaim")
+async def klaim(
+    claim_id: Optional[str] = Form(None),
+    claim_token: Optional[str] = Form(None),
+    foto_ktp: UploadFile = File(None),
+    foto_polis: UploadFile = File(None),
+    nomor_polis: str = Form(""),
+    jenis_layanan: str = Form(""),
+    nomor_hp: str = Form(""),
+    input_keluhan: str = Form(""),
+    foto_diagnosis: UploadFile = File(None),
+    diagnosis_text: str = Form(None),
+    diagnosis_audio: UploadFile = File(None),
+    mode: Literal["stream", "sync"] = QueryParam("stream")
+):
+    """
+    Proses klaim lengkap dalam satu request (isi_data, keluhan, diagnosis, bantu_proses, rekomendasi
+    rumah sakit, tanggungan). Tahap yang independen berjalan bersamaan. claim_id dan claim_token dibuat server
+    pada pengiriman pertama; kirim ulang dengan keduanya untuk memakai ulang hasil tahap yang inputnya tidak berubah.
+    mode=stream (default): Server-Sent Events per tahap begitu selesai; mode=sync: JSON setelah semua selesai.
+    """
+    if claim_id:
+        require_claim_token(claim_id, claim_token)
+        issued = {"claim_id": claim_id}
+    else:
+        claim_id, claim_token = str(uuid.uuid4()), secrets.token_urlsafe(32)
+        issued = {"claim_id": claim_id, "claim_token": claim_token}
+    # Disimpan ulang tiap pengiriman agar TTL token mengikuti memo tahap
+    klaim_tokens.set(claim_id, hash_claim_token(claim_token))
+    inputs = {
+        "foto_ktp": await foto_ktp.read() if foto_ktp is not None else None,
+        "foto_polis": await foto_polis.read() if foto_polis is not None else None,
+        "nomor_polis": nomor_polis,
+        "jenis_layanan": jenis_layanan,
+        "nomor_hp": nomor_hp,
+        "input_keluhan": input_keluhan,
+        "foto_diagnosis": await foto_diagnosis.read() if foto_diagnosis is not None else None,
+        "diagnosis_text": diagnosis_text,
+        "diagnosis_audio": await diagnosis_audio.read() if diagnosis_audio is not None else None,
+        "diagnosis_audio_ext": os.path.splitext(diagnosis_audio.filename or "")[1].lower() if diagnosis_audio is not None else None,
+    }
+
+    if mode == "sync":
+        return {**issued, "stages": await klaim_pipeline.run(claim_id, inputs)}
+
+    async def event_stream():
+        yield f"event: claim\ndata: {json.dumps(issued)}\n\n"
+        async for event in klaim_pipeline.stream(claim_id, inputs):
+            yield f"event: stage\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+        yield f"event: done\ndata: {json.dumps({'claim_id': claim_id})}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.get("/klaim/{claim_id}")
+async def get_klaim(request: Request, claim_id: str):
+    """Hasil tahap pipeline klaim yang tersimpan untuk claim_id; butuh header X-Claim-Token."""
+    require_claim_token(claim_id, request.headers.get(CLAIM_TOKEN_HEADER))
+    stages = klaim_pipeline.memo(claim_id)
+    if not stages:
+        raise HTTPException(status_code=404, detail="Klaim tidak ditemukan")
+    return {"claim_id": claim_id, "stages": {name: {"status": entry["status"], "result": entry["result"]}
+                                            for name, entry in stages.items()}}
 
 @app.get("/")
 async def root():
@@ -417,16 +1077,25 @@ async def root():
             "bisabot": "/bisabot (POST) - Chat dengan BISAbot (RAG terintegrasi)", # OK
             "bisabot_history": "/bisabot/history (GET) - Lihat riwayat chat", #OK
             "clear_history": "/bisabot/history (DELETE) - Hapus riwayat chat", #OK
-            "surat_banding": "/surat_aju_banding (POST) - Buat surat aju banding",
+            "surat_banding": "/surat_aju_banding (POST) - Buat surat aju banding (?mode=stream untuk langsung unduh PDF)",
+            "surat_banding_batch": "/surat_aju_banding/batch (POST) - Buat banyak surat aju banding (ZIP atau satu PDF)",
             "analisis_keluhan": "/keluhanmu_bisa_diklaim (POST) - Analisis keluhan kesehatan (text)", #OK
             "download": "/download/{filename} (GET) - Download file PDF",
             "isi_data": "/isi_data (POST) - Upload foto KTP & Polis, dan data form lain",
             "bantu_proses_ai": "/bantu_proses_ai (POST) - Cek data isi_data dan saran AI",
+            "klaim": "/klaim (POST) - Pipeline klaim lengkap dalam satu request (stream per tahap)",
             "upload_slip": "/slip_rumah_sakit (POST) - Upload slip rumah sakit dan ekstrak data",
             "get_slip": "/slip_rumah_sakit/{slip_id} (GET) - Ambil data slip rumah sakit berdasarkan ID",
             "get_keluhan": "/keluhanmu_bisa_diklaim/{keluhan_id} (GET) - Ambil data keluhan berdasarkan ID",
+            "keluhan_stream": "/ws/keluhanmu_bisa_diklaim (WebSocket) - Transkripsi keluhan suara real-time + analisis",
             "rekomendasi_rumah_sakit": "/rekomendasi_rumah_sakit (POST) - Rekomendasi rumah sakit", #OK
-            "rekomendasi_asuransi": "/rekomendasi_asuransi (POST) - Rekomendasi asuransi" # OK
+            "rekomendasi_asuransi": "/rekomendasi_asuransi (POST) - Rekomendasi asuransi", # OK
+            "rekomendasi_batch": "/rekomendasi_rumah_sakit/batch, /rekomendasi_asuransi/batch (POST) - Rekomendasi banyak query sekaligus",
+            "job_status": "/jobs/{job_id} (GET) - Cek status job async (?mode=async)",
+            "job_events": "/jobs/{job_id}/events (GET) - Subscribe status job (Server-Sent Events)",
+            "executor_stats": "/executors/stats (GET) - Metrik antrian pool executor",
+            "admin_profile": "/admin/profile/* - Profiling on-demand (khusus admin, nonaktif secara default)",
+            "metrics": "/metrics (GET) - Metrik Prometheus"
         },
         "setup": {
             "rag_documents": "Letakkan file PDF asuransi di folder: ./rag/documents/",
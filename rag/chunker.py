@@ -0,0 +1,126 @@
+import os
+import re
+import logging
+from typing import List, Optional
+from dotenv import load_dotenv
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "24"))
+# Versi aturan chunking; disimpan di metadata index RAG agar index lama dibangun ulang saat aturan berubah
+CHUNKER_VERSION = "token-v1"
+
+# Singkatan umum di polis Indonesia yang tidak mengakhiri kalimat
+ABBREVIATIONS = ["No", "Rp", "dll", "dsb", "dst", "Tbk", "PT", "hlm", "Jl", "Dr", "dr", "Prof", "tsb", "Yth",
+                 "s.d", "a.n", "u.p", "Kec", "Kab", "Kel", "Sdr", "Ny", "Tn", "Hal", "Ps", "ayat"]
+_ABBREV_RE = re.compile(r"\b(" + "|".join(re.escape(a) for a in ABBREVIATIONS) + r")\.", re.IGNORECASE)
+# Penomoran butir di tengah kalimat ("a. ...", "2. ...") juga bukan akhir kalimat
+_ENUM_RE = re.compile(r"(?<!\S)([a-z]|\d{1,2})\.(?=\s)")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+(?=[\"'(\[]?[A-Z0-9])")
+# Awal bagian: BAB/Pasal/Bagian, nomor butir (1. / 1.2 / a. / a)), atau judul huruf kapital
+_SECTION_RE = re.compile(r"^\s*(BAB\s+[IVXLC\d]+|Pasal\s+\d+|Bagian\s+\w+|\d+(\.\d+)*[.)]\s|[a-z][.)]\s|[A-Z][A-Z /&-]{6,}$)")
+_PROTECT = "․"  # one dot leader, pengganti titik sementara
+
+
+def split_sentences(text: str) -> List[tuple]:
+    """Pecah teks jadi [(kalimat, awal_bagian)]: paragraf/baris judul dan butir bernomor menandai awal bagian."""
+    units = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        for line_no, line in enumerate(paragraph.split("\n")):
+            line = line.strip()
+            if not line:
+                continue
+            starts_section = line_no == 0 or bool(_SECTION_RE.match(line))
+            if units and not starts_section and not units[-1][0].endswith((".", "!", "?", ":", ";")):
+                # Baris PDF yang terpotong di tengah kalimat: sambung ke unit sebelumnya
+                units[-1] = (units[-1][0] + " " + line, units[-1][1])
+            else:
+                units.append((line, starts_section))
+    sentences = []
+    for unit, starts_section in units:
+        protected = _ABBREV_RE.sub(lambda m: m.group(1) + _PROTECT, unit)
+        protected = _ENUM_RE.sub(lambda m: m.group(1) + _PROTECT, protected)
+        for i, sentence in enumerate(_SENTENCE_RE.split(protected)):
+            sentence = sentence.replace(_PROTECT, ".").strip()
+            if sentence:
+                sentences.append((sentence, starts_section and i == 0))
+    return sentences
+
+
+class TokenChunker:
+    """
+    Chunker berbasis jumlah token tokenizer model embedding: kalimat dikumpulkan sampai max_tokens,
+    batas bagian (BAB/Pasal/butir) memulai chunk baru, overlap berupa kalimat utuh di akhir chunk sebelumnya.
+    Tokenisasi dilakukan sekaligus (batch) untuk semua kalimat dari banyak halaman.
+    """
+
+    def __init__(self, tokenizer, max_tokens: int, overlap_tokens: int = CHUNK_OVERLAP_TOKENS):
+        self.tokenizer = tokenizer
+        # Sisakan ruang untuk token spesial ([CLS]/[SEP] atau <s>/</s>)
+        self.max_tokens = max(16, max_tokens - tokenizer.num_special_tokens_to_add())
+        self.overlap_tokens = min(overlap_tokens, self.max_tokens // 4)
+
+    def _split_long(self, sentence: str) -> List[tuple]:
+        """Kalimat yang melebihi max_tokens dipotong per jendela token berdasarkan offset karakter."""
+        offsets = self.tokenizer(sentence, add_special_tokens=False, return_offsets_mapping=True)["offset_mapping"]
+        pieces = []
+        for start in range(0, len(offsets), self.max_tokens):
+            window = offsets[start:start + self.max_tokens]
+            pieces.append((sentence[window[0][0]:window[-1][1]].strip(), len(window)))
+        return pieces
+
+    def _pack(self, sentences: List[tuple], lengths: List[int]) -> List[str]:
+        chunks, current, current_tokens = [], [], 0
+        for (sentence, starts_section), n_tokens in zip(sentences, lengths):
+            pieces = self._split_long(sentence) if n_tokens > self.max_tokens else [(sentence, n_tokens)]
+            for piece, piece_tokens in pieces:
+                new_section = starts_section and current_tokens >= self.max_tokens // 3
+                if current and (current_tokens + piece_tokens > self.max_tokens or new_section):
+                    chunks.append(" ".join(s for s, _ in current))
+                    # Overlap: kalimat terakhir chunk sebelumnya (jika muat), kecuali saat pindah bagian
+                    overlap, overlap_tokens = [], 0
+                    if not new_section:
+                        for s, t in reversed(current):
+                            if overlap_tokens + t > self.overlap_tokens or overlap_tokens + t + piece_tokens > self.max_tokens:
+                                break
+                            overlap.insert(0, (s, t))
+                            overlap_tokens += t
+                    current, current_tokens = overlap, overlap_tokens
+                current.append((piece, piece_tokens))
+                current_tokens += piece_tokens
+        if current:
+            chunks.append(" ".join(s for s, _ in current))
+        return chunks
+
+    def split_texts(self, texts: List[str]) -> List[List[str]]:
+        """Chunk banyak teks sekaligus; satu panggilan tokenizer untuk semua kalimat."""
+        per_text = [split_sentences(text or "") for text in texts]
+        flat = [sentence for sentences in per_text for sentence, _ in sentences]
+        lengths = [len(ids) for ids in self.tokenizer(flat, add_special_tokens=False)["input_ids"]] if flat else []
+        results, pos = [], 0
+        for sentences in per_text:
+            results.append(self._pack(sentences, lengths[pos:pos + len(sentences)]))
+            pos += len(sentences)
+        return results
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        chunked = self.split_texts([doc.page_content for doc in documents])
+        result = []
+        for doc, chunks in zip(documents, chunked):
+            for i, chunk in enumerate(chunks):
+                result.append(Document(page_content=chunk, metadata={**doc.metadata, "chunk": i}))
+        return result
+
+
+def chunker_for_model(model) -> TokenChunker:
+    """TokenChunker dari SentenceTransformer (tokenizer + max_seq_length model)."""
+    return TokenChunker(model.tokenizer, model.max_seq_length)
+
+
+def load_chunker(model_name: str, max_tokens: Optional[int] = None) -> TokenChunker:
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    return TokenChunker(tokenizer, max_tokens or min(tokenizer.model_max_length, 512))
+
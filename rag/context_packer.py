@@ -0,0 +1,92 @@
+import os
+import logging
+from typing import List, Dict, Any
+import numpy as np
+from dotenv import load_dotenv
+from core.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+RAG_CONTEXT_TOKENS = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))
+RAG_CANDIDATES = int(os.getenv("RAG_CANDIDATES", "12"))
+RAG_MMR_LAMBDA = float(os.getenv("RAG_MMR_LAMBDA", "0.7"))
+# Kandidat dengan kemiripan >= ambang ini terhadap chunk yang sudah dipilih dianggap duplikat
+RAG_DUPLICATE_SIMILARITY = float(os.getenv("RAG_DUPLICATE_SIMILARITY", "0.95"))
+
+
+def mmr_order(query_scores: np.ndarray, vectors: np.ndarray, mmr_lambda: float = RAG_MMR_LAMBDA,
+              duplicate_similarity: float = RAG_DUPLICATE_SIMILARITY) -> List[int]:
+    """
+    Urutkan kandidat dengan Maximal Marginal Relevance (relevansi ke query dikurangi kemiripan
+    ke chunk yang sudah dipilih); kandidat yang hampir identik dengan pilihan sebelumnya dibuang.
+    """
+    similarity = vectors @ vectors.T
+    remaining = list(range(len(query_scores)))
+    selected = []
+    while remaining:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining))
+        mmr = mmr_lambda * query_scores[remaining] - (1 - mmr_lambda) * redundancy
+        best = int(np.argmax(mmr))
+        if redundancy[best] < duplicate_similarity:
+            selected.append(remaining[best])
+        remaining.pop(best)
+    return selected
+
+
+def merge_overlap(first: str, second: str, max_overlap: int = 400, min_overlap: int = 20) -> str:
+    """Gabungkan dua chunk berurutan, buang bagian overlap splitter yang terulang di awal chunk kedua."""
+    for size in range(min(len(first), len(second), max_overlap), min_overlap - 1, -1):
+        if first.endswith(second[:size]):
+            return first + second[size:]
+    return f"{first} {second}"
+
+
+def _render(groups: Dict[tuple, list], order: List[tuple]) -> str:
+    blocks = []
+    for source, page in order:
+        chunks = sorted(groups[(source, page)], key=lambda c: c["index"])
+        text = chunks[0]["content"]
+        for prev, chunk in zip(chunks, chunks[1:]):
+            if chunk["index"] == prev["index"] + 1:
+                text = merge_overlap(text, chunk["content"])
+            else:
+                text = f"{text}\n...\n{chunk['content']}"
+        header = f"[Dari: {source}, hal. {page + 1}" if isinstance(page, int) else f"[Dari: {source}"
+        also_in = max(c.get("also_in", 0) for c in chunks)
+        header += f"; juga di {also_in} bagian dokumen lain]" if also_in else "]"
+        blocks.append(f"{header}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def pack_context(chunks: List[Dict[str, Any]], max_tokens: int = RAG_CONTEXT_TOKENS) -> str:
+    """
+    Isi budget token dengan chunk (urutan MMR). Chunk dari halaman yang sama digabung dalam satu blok,
+    chunk yang bersebelahan digabung tanpa overlap. Chunk yang membuat budget terlampaui dilewati.
+    chunks: [{"index", "content", "source", "page", "also_in"(opsional)}]
+    """
+    groups, order = {}, []
+    block_tokens, total = {}, 0
+    for chunk in chunks:
+        key = (chunk["source"], chunk["page"])
+        group = groups.get(key, []) + [chunk]
+        # Hanya blok halaman ini yang di-render ulang; total token blok lain dibawa sebagai running count
+        tokens = count_tokens(_render({key: group}, [key]))
+        new_total = total - block_tokens.get(key, 0) + tokens
+        if new_total > max_tokens:
+            continue
+        if key not in groups:
+            order.append(key)
+        groups[key], block_tokens[key], total = group, tokens, new_total
+    context = _render(groups, order) if order else ""
+
+    if not context and chunks:
+        # Chunk teratas sendiri sudah melebihi budget: potong sesuai sisa token
+        first = chunks[0]
+        header = _render({(first["source"], first["page"]): [dict(first, content="")]}, [(first["source"], first["page"])])
+        first = dict(first, content=truncate_to_tokens(first["content"], max_tokens - count_tokens(header)))
+        context = _render({(first["source"], first["page"]): [first]}, [(first["source"], first["page"])])
+    return context
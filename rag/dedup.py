@@ -0,0 +1,133 @@
+"""
+Deduplikasi near-duplicate chunk saat build index (MinHash + LSH).
+
+PDF polis berbagi banyak boilerplate (pengecualian standar, disclaimer OJK, header/footer tiap halaman).
+Chunk yang hampir identik digabung menjadi satu vektor; sumber lainnya disimpan di metadata "sources".
+"""
+import os
+import re
+import zlib
+import logging
+from itertools import combinations
+from typing import List
+import numpy as np
+from dotenv import load_dotenv
+from langchain.schema import Document
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+# Estimasi Jaccard minimum (shingle kata) agar dua chunk dianggap duplikat; 0 = dedup dimatikan
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_SHINGLE = int(os.getenv("DEDUP_SHINGLE", "5"))
+DEDUP_BANDS = 16  # LSH: 16 band x 4 baris, kandidat ditemukan dengan peluang tinggi untuk Jaccard >= ~0.7
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d+")
+# Nomor halaman di header/footer ("Halaman 3 dari 20", "Page 4 of 12", baris yang hanya berisi "- 5 -").
+# Angka lain (nilai manfaat, limit, usia, nomor pasal) dipertahankan: tabel manfaat plan A dan plan B
+# sering hanya berbeda angkanya.
+_PAGE_MARKER_RE = re.compile(r"\b(?:halaman|hal|page)\.?\s*\d+(?:\s*(?:dari|of|/)\s*\d+)?|^\W*\d+\W*$",
+                             re.IGNORECASE | re.MULTILINE)
+
+
+def dedup_version(threshold: float = DEDUP_THRESHOLD) -> str:
+    """Disimpan di metadata index agar index dibangun ulang saat parameter dedup berubah."""
+    return f"minhash3-{DEDUP_NUM_PERM}-{DEDUP_SHINGLE}-{threshold}" if threshold > 0 else "off"
+
+
+def _normalize(text: str) -> str:
+    """Huruf kecil, nomor halaman header/footer dibuang agar footer tiap halaman tidak membedakan chunk."""
+    return _PAGE_MARKER_RE.sub(" ", text.lower())
+
+
+def _numbers(text: str) -> tuple:
+    """Semua angka di luar nomor halaman; dua chunk hanya boleh digabung jika angkanya persis sama."""
+    return tuple(_NUMBER_RE.findall(_normalize(text)))
+
+
+def _shingles(text: str, size: int) -> np.ndarray:
+    words = _WORD_RE.findall(_normalize(text))
+    if len(words) <= size:
+        grams = [" ".join(words)]
+    else:
+        grams = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.array(sorted({zlib.crc32(g.encode("utf-8")) for g in grams}), dtype=np.uint64)
+
+
+def minhash_signatures(texts: List[str], num_perm: int = DEDUP_NUM_PERM, shingle: int = DEDUP_SHINGLE) -> np.ndarray:
+    """Signature MinHash (n, num_perm) uint32; permutasi deterministik (seed tetap) antar proses."""
+    rng = np.random.RandomState(1)
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    with np.errstate(over="ignore"):
+        for i, text in enumerate(texts):
+            hashes = _shingles(text, shingle)
+            permuted = ((np.outer(hashes, a) + b) % _MERSENNE_PRIME) & _MAX_HASH
+            signatures[i] = permuted.min(axis=0).astype(np.uint32)
+    return signatures
+
+
+def near_duplicate_groups(texts: List[str], threshold: float = DEDUP_THRESHOLD) -> List[int]:
+    """
+    Untuk tiap teks, kembalikan indeks representatifnya (kemunculan pertama di grupnya).
+    Kandidat (semua pasangan dalam satu bucket LSH) diverifikasi dengan estimasi Jaccard dari signature
+    dan kesamaan persis semua angka (selain nomor halaman), lalu digabung dengan union-find.
+    """
+    parent = list(range(len(texts)))
+    if threshold <= 0 or len(texts) < 2:
+        return parent
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = minhash_signatures(texts)
+    numbers = [_numbers(text) for text in texts]
+    rows = DEDUP_NUM_PERM // DEDUP_BANDS
+    checked = set()
+    for band in range(DEDUP_BANDS):
+        buckets = {}
+        for i, row in enumerate(signatures[:, band * rows:(band + 1) * rows]):
+            key = row.tobytes()
+            buckets.setdefault(key, []).append(i)
+        for members in buckets.values():
+            # Semua pasangan di bucket (bucket kecil), bukan hanya terhadap anggota pertama
+            for i, j in combinations(members, 2):
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                if numbers[i] == numbers[j] and np.mean(signatures[i] == signatures[j]) >= threshold:
+                    ri, rj = find(i), find(j)
+                    parent[max(ri, rj)] = min(ri, rj)
+    return [find(i) for i in range(len(texts))]
+
+
+def dedup_documents(documents: List[Document], threshold: float = DEDUP_THRESHOLD) -> List[Document]:
+    """
+    Gabungkan chunk near-duplicate: chunk pertama dipertahankan (urutan tetap), dan metadata-nya
+    mendapat "sources" berisi semua (source, page) yang memuat chunk tersebut.
+    """
+    groups = near_duplicate_groups([doc.page_content for doc in documents], threshold)
+    sources = {}
+    for i, rep in enumerate(groups):
+        meta = documents[i].metadata
+        sources.setdefault(rep, []).append({"source": meta.get("source"), "page": meta.get("page")})
+
+    result = []
+    for i, doc in enumerate(documents):
+        if groups[i] != i:
+            continue
+        metadata = dict(doc.metadata)
+        if len(sources[i]) > 1:
+            metadata["sources"] = sources[i]
+        result.append(Document(page_content=doc.page_content, metadata=metadata))
+    if len(result) < len(documents):
+        logger.info(f"Dedup: {len(documents)} chunks -> {len(result)} unique chunks")
+    return result
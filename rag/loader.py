@@ -2,19 +2,18 @@ import os
 import logging
 from typing import List, Dict
 from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
+from .chunker import TokenChunker, load_chunker
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_TOKENIZER_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
 class DocumentLoader:
-    def __init__(self, documents_path: str = "./rag/documents"):
+    def __init__(self, documents_path: str = "./rag/documents", chunker: TokenChunker = None):
         self.documents_path = documents_path
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            separators=["\n\n", "\n", ".", "!", "?", ",", " ", ""]
-        )
+        # Chunk berdasarkan jumlah token tokenizer model embedding (lihat rag/chunker.py)
+        self.chunker = chunker or load_chunker(DEFAULT_TOKENIZER_MODEL)
         
         # Create documents directory if it doesn't exist
         os.makedirs(documents_path, exist_ok=True)
@@ -33,7 +32,7 @@ class DocumentLoader:
                 })
             
             # Split documents
-            split_docs = self.text_splitter.split_documents(documents)
+            split_docs = self.chunker.split_documents(documents)
             logger.info(f"Loaded {len(split_docs)} chunks from {file_path}")
             
             return split_docs
@@ -3,10 +3,17 @@ import logging
 from typing import List, Dict, Any
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from langchain.schema import Document
 from .loader import DocumentLoader
+from .chunker import chunker_for_model, CHUNKER_VERSION
+from .dedup import dedup_documents, dedup_version
 import pickle
+from core.metrics import timer
+from core.embeddings import load_sentence_model
+from core.embedding_cache import cached_encode
+from core.vector_index import build_vector_index, save_vector_index, load_vector_index, FP32_SUFFIX
+from core.tokens import count_tokens
+from .context_packer import mmr_order, pack_context, RAG_CONTEXT_TOKENS, RAG_CANDIDATES
 
 logger = logging.getLogger(__name__)
 
@@ -14,18 +21,29 @@ class SimpleRAGRetriever:
     def __init__(self, 
                  documents_path: str = "./rag/documents",
                  embeddings_model: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
-                 index_path: str = "./rag/index"):
-        
+                 index_path: str = "./rag/index",
+                 rebuild_stale: bool = False,
+                 read_only: bool = False):
+        """
+        rebuild_stale: bangun ulang index yang dibuat dengan versi chunker/dedup lama. Default False: index lama
+        tetap dilayani (dengan warning) agar worker tidak membangun ulang index di dalam request;
+        jalankan `python -m rag.retriever` sekali setelah upgrade.
+        read_only: hanya muat index yang sudah ada (dipakai snapshot). Tidak pernah membuat direktori,
+        membangun atau menyimpan index; ValueError jika index tidak ada, rusak, atau versinya tidak cocok.
+        """
         self.documents_path = documents_path
         self.embeddings_model_name = embeddings_model
         self.index_path = index_path
+        self.rebuild_stale = rebuild_stale
+        self.read_only = read_only
         
         # Create index directory if it doesn't exist
-        os.makedirs(index_path, exist_ok=True)
+        if not read_only:
+            os.makedirs(index_path, exist_ok=True)
         
         # Initialize embedding model
         try:
-            self.embeddings_model = SentenceTransformer(embeddings_model)
+            self.embeddings_model = load_sentence_model(embeddings_model)
             logger.info("Embedding model loaded successfully")
         except Exception as e:
             logger.error(f"Failed to load embedding model: {str(e)}")
@@ -38,6 +56,8 @@ class SimpleRAGRetriever:
         
         # Load documents and create index
         self._initialize()
+        if read_only and self.index is None:
+            raise ValueError(f"Index RAG di {index_path} tidak bisa dimuat (read_only)")
     
     def _save_index(self):
         """Save FAISS index and metadata to disk"""
@@ -48,13 +68,15 @@ class SimpleRAGRetriever:
             
             # Save FAISS index
             index_file = os.path.join(self.index_path, "faiss_index.bin")
-            faiss.write_index(self.index, index_file)
+            save_vector_index(self.index, index_file, self.document_embeddings)
             
             # Save documents and embeddings metadata
             metadata_file = os.path.join(self.index_path, "metadata.pkl")
             metadata = {
                 'documents': self.documents,
                 'embeddings_model_name': self.embeddings_model_name,
+                'chunker': CHUNKER_VERSION,
+                'dedup': dedup_version(),
                 'document_count': len(self.documents)
             }
             
@@ -77,7 +99,11 @@ class SimpleRAGRetriever:
                 return False
             
             # Load FAISS index
-            self.index = faiss.read_index(index_file)
+            self.index = load_vector_index(index_file)
+            # Index terkompresi (SQ/PQ) punya vektor fp32 di file samping; dipakai untuk MMR karena
+            # reconstruct() dari kode terkuantisasi tidak eksak
+            fp32_file = index_file + FP32_SUFFIX
+            self.document_embeddings = np.load(fp32_file, mmap_mode="r") if os.path.exists(fp32_file) else None
             
             # Load metadata
             with open(metadata_file, 'rb') as f:
@@ -90,6 +116,14 @@ class SimpleRAGRetriever:
                 logger.warning("Embeddings model mismatch, recreating index")
                 return False
             
+            if metadata.get('chunker') != CHUNKER_VERSION or metadata.get('dedup') != dedup_version():
+                if not self.rebuild_stale and not self.read_only:
+                    logger.warning("Index was built with an older chunker/dedup version, serving it as is; "
+                                   "rebuild with `python -m rag.retriever`")
+                    return True
+                logger.warning("Chunker/dedup version mismatch, recreating index")
+                return False
+            
             logger.info(f"Loaded index with {len(self.documents)} documents")
             return True
             
@@ -108,10 +142,14 @@ class SimpleRAGRetriever:
             if self._load_index():
                 logger.info("Loaded existing index")
                 return
+            if self.read_only:
+                self.index = None
+                self.documents = []
+                return
                 
             # Load documents
-            loader = DocumentLoader(self.documents_path)
-            self.documents = loader.load_all_documents()
+            loader = DocumentLoader(self.documents_path, chunker_for_model(self.embeddings_model))
+            self.documents = dedup_documents(loader.load_all_documents())
             
             if not self.documents:
                 logger.warning("No documents found, RAG will not work")
@@ -152,12 +190,12 @@ class SimpleRAGRetriever:
             
             # FIX: Encode with proper error handling
             try:
-                self.document_embeddings = self.embeddings_model.encode(
+                # Chunk yang tidak berubah sejak build sebelumnya diambil dari cache embedding
+                self.document_embeddings = cached_encode(
+                    self.embeddings_model,
                     texts,  # Pass list of strings directly
                     show_progress_bar=True,
-                    batch_size=16,  # Reduce batch size for stability
-                    convert_to_numpy=True,  # Ensure numpy output
-                    normalize_embeddings=False  # We'll normalize manually
+                    batch_size=16  # Reduce batch size for stability
                 )
                 
                 logger.info(f"Successfully created embeddings with shape: {self.document_embeddings.shape}")
@@ -186,12 +224,11 @@ class SimpleRAGRetriever:
                     return
             
             # Create FAISS index
-            dimension = self.document_embeddings.shape[1]
-            self.index = faiss.IndexFlatIP(dimension)  # Inner product for cosine similarity
-            
             # Normalize embeddings for cosine similarity
+            self.document_embeddings = self.document_embeddings.astype('float32')
             faiss.normalize_L2(self.document_embeddings)
-            self.index.add(self.document_embeddings.astype('float32'))
+            # Inner product for cosine similarity; jenis penyimpanan mengikuti INDEX_STORAGE
+            self.index = build_vector_index(self.document_embeddings, metric=faiss.METRIC_INNER_PRODUCT)
             
             logger.info(f"Created FAISS index with {len(self.documents)} documents")
             
@@ -199,6 +236,29 @@ class SimpleRAGRetriever:
             logger.error(f"Error creating index: {str(e)}")
             self.index = None
     
+    def _search(self, query: str, top_k: int):
+        """Encode query lalu cari di index; kembalikan (scores, indices) baris pertama atau None."""
+        # FIX: Properly encode query
+        if not isinstance(query, str) or not query.strip():
+            logger.warning("Invalid query provided")
+            return None
+        
+        # Encode query
+        with timer("rag_encode"):
+            query_embedding = self.embeddings_model.encode([query.strip()])
+        
+        # Ensure proper shape and type
+        if len(query_embedding.shape) == 2:
+            query_embedding = query_embedding[0]  # Take first embedding if batch
+        
+        query_embedding = query_embedding.reshape(1, -1).astype('float32')  # Ensure 2D shape
+        faiss.normalize_L2(query_embedding)
+        
+        # Search
+        with timer("rag_search"):
+            scores, indices = self.index.search(query_embedding, min(top_k, len(self.documents)))
+        return scores[0], indices[0]
+    
     def retrieve(self, query: str, top_k: int = 3) -> List[Dict[str, Any]]:
         """Retrieve relevant documents for a query"""
         if not self.index or not self.documents or not self.embeddings_model:
@@ -206,30 +266,13 @@ class SimpleRAGRetriever:
             return []
         
         try:
-            # FIX: Properly encode query
-            if not isinstance(query, str) or not query.strip():
-                logger.warning("Invalid query provided")
+            found = self._search(query, top_k)
+            if found is None:
                 return []
             
-            # Encode query
-            query_embedding = self.embeddings_model.encode([query.strip()])
-            
-            # Ensure proper shape and type
-            if len(query_embedding.shape) == 2:
-                query_embedding = query_embedding[0]  # Take first embedding if batch
-            
-            query_embedding = query_embedding.reshape(1, -1)  # Ensure 2D shape
-            faiss.normalize_L2(query_embedding)
-            
-            # Search
-            scores, indices = self.index.search(
-                query_embedding.astype('float32'), 
-                min(top_k, len(self.documents))
-            )
-            
             # Format results
             results = []
-            for i, (score, idx) in enumerate(zip(scores[0], indices[0])):
+            for i, (score, idx) in enumerate(zip(*found)):
                 if idx != -1 and score > 0.1:  # Filter low-quality matches
                     doc = self.documents[idx]
                     results.append({
@@ -246,33 +289,51 @@ class SimpleRAGRetriever:
             logger.error(f"Error during retrieval: {str(e)}")
             return []
     
-    def get_context_for_query(self, query: str, max_context_length: int = 1500) -> str:
-        """Get formatted context for RAG (simplified)"""
-        relevant_docs = self.retrieve(query, top_k=3)
-        
-        if not relevant_docs:
+    def get_context_for_query(self, query: str, max_tokens: int = RAG_CONTEXT_TOKENS,
+                              candidates: int = RAG_CANDIDATES) -> str:
+        """
+        Context RAG dalam budget token LLM: ambil kandidat lebih banyak, urutkan dengan MMR
+        (buang near-duplicate), gabungkan chunk bersebelahan dari halaman yang sama tanpa overlap.
+        """
+        if not self.index or not self.documents or not self.embeddings_model:
+            logger.warning("RAG system not properly initialized")
             return ""
         
-        context_parts = []
-        current_length = 0
-        
-        for doc in relevant_docs:
-            content = doc['content'].strip()
-            source = doc['metadata'].get('source', 'Unknown')
-            
-            # Simple formatting without document type
-            formatted_content = f"[Dari: {source}]\n{content}\n"
-            
-            if current_length + len(formatted_content) <= max_context_length:
-                context_parts.append(formatted_content)
-                current_length += len(formatted_content)
+        try:
+            found = self._search(query, candidates)
+            if found is None:
+                return ""
+            scores, indices = found
+            keep = [(float(score), int(idx)) for score, idx in zip(scores, indices) if idx != -1 and score > 0.1]
+            if not keep:
+                return ""
+            
+            query_scores = np.array([score for score, _ in keep], dtype='float32')
+            ids = [idx for _, idx in keep]
+            if self.document_embeddings is not None:
+                vectors = np.array(self.document_embeddings[ids], dtype='float32')
             else:
-                break
-        
-        context = "\n".join(context_parts)
-        logger.info(f"Generated context with {len(context)} characters from {len(context_parts)} documents")
-        
-        return context
+                vectors = np.vstack([self.index.reconstruct(idx) for idx in ids]).astype('float32')
+            faiss.normalize_L2(vectors)
+            chunks = []
+            for pos in mmr_order(query_scores, vectors):
+                doc = self.documents[keep[pos][1]]
+                chunks.append({
+                    # Urutan chunk di halamannya (indeks dokumen tidak lagi berurutan setelah dedup)
+                    'index': doc.metadata.get('chunk', keep[pos][1]),
+                    'content': doc.page_content.strip(),
+                    'source': doc.metadata.get('source', 'Unknown'),
+                    'page': doc.metadata.get('page'),
+                    'also_in': len(doc.metadata.get('sources', [])) - 1 if doc.metadata.get('sources') else 0
+                })
+            
+            context = pack_context(chunks, max_tokens)
+            logger.info(f"Generated context with {count_tokens(context)} tokens from {len(chunks)} candidate chunks")
+            return context
+            
+        except Exception as e:
+            logger.error(f"Error building context: {str(e)}")
+            return ""
     
     def is_available(self) -> bool:
         """Check if RAG system is available and working"""
@@ -286,8 +347,8 @@ class SimpleRAGRetriever:
             logger.info("Refreshing RAG index...")
             
             # Load documents again
-            loader = DocumentLoader(self.documents_path)
-            self.documents = loader.load_all_documents()
+            loader = DocumentLoader(self.documents_path, chunker_for_model(self.embeddings_model))
+            self.documents = dedup_documents(loader.load_all_documents())
             
             if not self.documents:
                 logger.warning("No documents found after refresh")
@@ -304,4 +365,17 @@ class SimpleRAGRetriever:
             
         except Exception as e:
             logger.error(f"Error refreshing index: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Bangun (ulang) index RAG jika belum ada atau versinya lama")
+    parser.add_argument("--documents", default="./rag/documents")
+    parser.add_argument("--index", default="./rag/index")
+    args = parser.parse_args()
+    retriever = SimpleRAGRetriever(documents_path=args.documents, index_path=args.index, rebuild_stale=True)
+    if not retriever.is_available():
+        raise SystemExit("Index RAG gagal dibangun (model atau dokumen tidak tersedia)")
+    print(f"Index RAG berisi {len(retriever.documents)} chunk di {args.index}")
@@ -0,0 +1,8 @@
+import os
+
+# Konfigurasi di-set sebelum modul core/rag di-import (load_dotenv tidak menimpa env yang sudah ada):
+# result store tanpa backend file, hitungan token pakai perkiraan karakter, cache embedding mati.
+os.environ["RESULT_STORE_URL"] = "memory://"
+os.environ["LLM_TOKENIZER"] = ""
+os.environ["CHARS_PER_TOKEN"] = "3.5"
+os.environ["EMBEDDING_CACHE_ENABLED"] = "0"
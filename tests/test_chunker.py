@@ -0,0 +1,114 @@
+import re
+
+from langchain.schema import Document
+
+from rag.chunker import TokenChunker, split_sentences
+
+
+class WordTokenizer:
+    """Tokenizer palsu: satu token per kata (tanpa spasi), 2 token spesial seperti [CLS]/[SEP]."""
+
+    def num_special_tokens_to_add(self):
+        return 2
+
+    def _encode(self, text):
+        offsets = [m.span() for m in re.finditer(r"\S+", text)]
+        return list(range(len(offsets))), offsets
+
+    def __call__(self, text, add_special_tokens=True, return_offsets_mapping=False):
+        if isinstance(text, list):
+            return {"input_ids": [self._encode(t)[0] for t in text]}
+        ids, offsets = self._encode(text)
+        result = {"input_ids": ids}
+        if return_offsets_mapping:
+            result["offset_mapping"] = offsets
+        return result
+
+
+def n_tokens(text: str) -> int:
+    return len(text.split())
+
+
+def sentences(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix} ke{i} berlaku." for i in range(count))
+
+
+def test_split_sentences_keeps_abbreviations_and_enumerations():
+    text = "Limit Rp. 5.000.000 per tahun. Lihat No. 3 di atas. Manfaat a. rawat inap. Berlaku dst. Selesai!"
+    assert [s for s, _ in split_sentences(text)] == [
+        "Limit Rp. 5.000.000 per tahun.",
+        "Lihat No. 3 di atas.",
+        "Manfaat a. rawat inap.",
+        "Berlaku dst. Selesai!",
+    ]
+
+
+def test_split_sentences_marks_sections_and_joins_wrapped_lines():
+    text = "Pasal 1\nPeserta adalah orang yang\nterdaftar dalam polis.\nPasal 2\nKlaim diajukan dalam 30 hari."
+    assert split_sentences(text) == [
+        ("Pasal 1 Peserta adalah orang yang terdaftar dalam polis.", True),
+        ("Pasal 2 Klaim diajukan dalam 30 hari.", True),
+    ]
+
+
+def test_max_tokens_reserves_special_tokens_and_bounds_overlap():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=18, overlap_tokens=24)
+    assert chunker.max_tokens == 16
+    assert chunker.overlap_tokens == 4
+
+
+def test_chunks_respect_budget_and_overlap_whole_sentences():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=18, overlap_tokens=4)
+    [chunks] = chunker.split_texts([sentences("Kalimat", 12)])
+
+    assert len(chunks) > 1
+    assert all(n_tokens(chunk) <= 16 for chunk in chunks)
+    for prev, chunk in zip(chunks, chunks[1:]):
+        last_sentence = re.findall(r"Kalimat ke\d+ berlaku\.", prev)[-1]
+        assert chunk.startswith(last_sentence)
+    # Tidak ada kalimat yang hilang
+    covered = set(re.findall(r"ke\d+", " ".join(chunks)))
+    assert covered == {f"ke{i}" for i in range(12)}
+
+
+def test_sentence_longer_than_overlap_is_not_repeated():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=18, overlap_tokens=2)
+    [chunks] = chunker.split_texts([sentences("Kalimat", 12)])
+    joined = " ".join(chunks)
+    assert all(joined.count(f"ke{i} ") == 1 for i in range(12))
+
+
+def test_section_boundary_starts_new_chunk_without_overlap():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=34, overlap_tokens=8)
+    text = "Pasal 1\n" + sentences("Peserta", 3) + "\n\nPasal 2\n" + sentences("Klaim", 2)
+    [chunks] = chunker.split_texts([text])
+
+    assert len(chunks) == 2
+    assert chunks[0].startswith("Pasal 1") and "Klaim" not in chunks[0]
+    assert chunks[1].startswith("Pasal 2") and "Peserta" not in chunks[1]
+
+
+def test_small_section_is_merged_with_next():
+    # Bagian yang masih < max_tokens/3 tidak dijadikan chunk sendiri
+    chunker = TokenChunker(WordTokenizer(), max_tokens=34, overlap_tokens=8)
+    [chunks] = chunker.split_texts(["Pasal 1\nSingkat.\n\nPasal 2\n" + sentences("Klaim", 2)])
+    assert len(chunks) == 1
+
+
+def test_long_sentence_split_into_token_windows():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=22, overlap_tokens=0)
+    words = [f"kata{i}" for i in range(45)]
+    [chunks] = chunker.split_texts([" ".join(words) + "."])
+
+    assert [n_tokens(chunk) for chunk in chunks] == [20, 20, 5]
+    assert " ".join(chunks) == " ".join(words) + "."
+
+
+def test_split_texts_batches_and_split_documents_metadata():
+    chunker = TokenChunker(WordTokenizer(), max_tokens=18, overlap_tokens=4)
+    assert chunker.split_texts(["", None, "Satu kalimat saja."]) == [[], [], ["Satu kalimat saja."]]
+
+    docs = [Document(page_content=sentences("Kalimat", 12), metadata={"source": "polis.pdf", "page": 3})]
+    chunked = chunker.split_documents(docs)
+    assert [doc.metadata["chunk"] for doc in chunked] == list(range(len(chunked)))
+    assert all(doc.metadata["source"] == "polis.pdf" and doc.metadata["page"] == 3 for doc in chunked)
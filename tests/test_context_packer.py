@@ -0,0 +1,76 @@
+import numpy as np
+
+from core.tokens import count_tokens
+from rag.context_packer import merge_overlap, mmr_order, pack_context
+
+
+def unit(*rows):
+    vectors = np.array(rows, dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def chunk(index, content, source="polis.pdf", page=0, **extra):
+    return {"index": index, "content": content, "source": source, "page": page, **extra}
+
+
+def words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def test_mmr_prefers_diverse_candidate_over_redundant_one():
+    scores = np.array([0.9, 0.85, 0.7], dtype=np.float32)
+    vectors = unit([1, 0], [0.8, 0.6], [0, 1])
+
+    assert mmr_order(scores, vectors, mmr_lambda=0.7) == [0, 2, 1]
+    # lambda=1: murni relevansi
+    assert mmr_order(scores, vectors, mmr_lambda=1.0) == [0, 1, 2]
+
+
+def test_mmr_drops_near_duplicates():
+    scores = np.array([0.9, 0.89, 0.5], dtype=np.float32)
+    vectors = unit([1, 0], [0.99, 0.05], [0, 1])
+    assert mmr_order(scores, vectors, mmr_lambda=0.7, duplicate_similarity=0.95) == [0, 2]
+
+
+def test_merge_overlap():
+    first = "Peserta wajib membayar premi tepat waktu setiap bulan."
+    second = "premi tepat waktu setiap bulan. Keterlambatan menyebabkan polis lapse."
+    assert merge_overlap(first, second) == first + " Keterlambatan menyebabkan polis lapse."
+    # Overlap di bawah min_overlap tidak dianggap overlap
+    assert merge_overlap("abc def", "def ghi") == "abc def def ghi"
+
+
+def test_pack_context_respects_budget_in_mmr_order():
+    chunks = [
+        chunk(0, words("a", 40), page=0),
+        chunk(5, words("b", 200), page=4),  # terlalu besar untuk sisa budget, dilewati
+        chunk(9, words("c", 30), page=7),
+    ]
+    context = pack_context(chunks, max_tokens=150)
+
+    assert count_tokens(context) <= 150
+    assert "a0" in context and "c0" in context and "b0" not in context
+    assert context.index("hal. 1]") < context.index("hal. 8]")
+
+
+def test_pack_context_groups_page_and_merges_adjacent_chunks():
+    shared = "overlap yang diulang oleh splitter"
+    chunks = [
+        chunk(3, f"awal halaman {shared}", page=2),
+        chunk(1, "bagian lain dari dokumen", source="lain.pdf", page=None),
+        chunk(4, f"{shared} lanjutan halaman", page=2, also_in=2),
+        chunk(7, "bagian jauh di halaman yang sama", page=2),
+    ]
+    context = pack_context(chunks, max_tokens=600)
+
+    assert context.count("[Dari: polis.pdf, hal. 3; juga di 2 bagian dokumen lain]") == 1
+    assert f"awal halaman {shared} lanjutan halaman\n...\nbagian jauh" in context
+    assert "[Dari: lain.pdf]" in context
+    assert context.index("polis.pdf") < context.index("lain.pdf")
+
+
+def test_pack_context_truncates_oversized_top_chunk():
+    context = pack_context([chunk(0, words("kata", 500))], max_tokens=50)
+    assert context.startswith("[Dari: polis.pdf, hal. 1]")
+    assert 0 < count_tokens(context) <= 50
+    assert pack_context([], max_tokens=50) == ""
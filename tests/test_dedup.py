@@ -0,0 +1,74 @@
+import numpy as np
+from langchain.schema import Document
+
+from rag import dedup
+from rag.dedup import DEDUP_NUM_PERM, dedup_documents, near_duplicate_groups
+
+BOILERPLATE = (
+    "Pengecualian umum polis ini meliputi perawatan akibat cedera yang disengaja, penyalahgunaan obat "
+    "terlarang, kegiatan olahraga berbahaya, perawatan kosmetik, kehamilan di luar manfaat bersalin, "
+    "serta kondisi yang sudah ada sebelumnya dan tidak diungkapkan pada saat pengajuan polis asuransi. "
+    "Penanggung tidak bertanggung jawab atas biaya yang timbul dari peperangan, kerusuhan, atau bencana "
+    "nuklir, dan seluruh klaim wajib diajukan bersama dokumen asli yang sah dari rumah sakit rekanan."
+)
+
+
+def benefit_table(limit: str) -> str:
+    return f"Tabel manfaat rawat inap dengan limit tahunan Rp {limit} juta per peserta. {BOILERPLATE}"
+
+
+def test_page_markers_ignored():
+    texts = [
+        f"{BOILERPLATE}\nHalaman 3 dari 20",
+        f"{BOILERPLATE}\nHalaman 4 dari 20",
+        f"- 7 -\n{BOILERPLATE}",
+    ]
+    assert near_duplicate_groups(texts, threshold=0.85) == [0, 0, 0]
+
+
+def test_chunks_differing_only_in_numbers_are_kept_apart():
+    texts = [benefit_table("100"), benefit_table("250"), benefit_table("100")]
+    assert near_duplicate_groups(texts, threshold=0.85) == [0, 1, 0]
+
+
+def test_duplicates_found_when_first_bucket_member_differs(monkeypatch):
+    # Signature identik: ketiga teks jatuh di bucket yang sama di setiap band. Anggota pertama bucket
+    # berbeda angka, anggota ke-2 dan ke-3 tetap harus digabung.
+    monkeypatch.setattr(dedup, "minhash_signatures",
+                        lambda texts: np.zeros((len(texts), DEDUP_NUM_PERM), dtype=np.uint32))
+    texts = [benefit_table("100"), benefit_table("250"), benefit_table("250")]
+    assert near_duplicate_groups(texts, threshold=0.85) == [0, 1, 1]
+
+
+def test_groups_are_transitive(monkeypatch):
+    signatures = np.zeros((3, DEDUP_NUM_PERM), dtype=np.uint32)
+    signatures[1, :8] = 1  # 0~1 dan 1~2 mirip (>= 0.85), 0 dan 2 tidak langsung
+    signatures[2, :8] = 1
+    signatures[2, 8:16] = 2
+    monkeypatch.setattr(dedup, "minhash_signatures", lambda texts: signatures)
+    assert near_duplicate_groups([BOILERPLATE] * 3, threshold=0.85) == [0, 0, 0]
+
+
+def test_unrelated_texts_and_disabled_threshold():
+    texts = [
+        BOILERPLATE,
+        "Jadwal praktik dokter spesialis penyakit dalam tersedia setiap hari kerja di poliklinik utama.",
+        BOILERPLATE,
+    ]
+    assert near_duplicate_groups(texts, threshold=0.85) == [0, 1, 0]
+    assert near_duplicate_groups(texts, threshold=0) == [0, 1, 2]
+    assert near_duplicate_groups([BOILERPLATE], threshold=0.85) == [0]
+
+
+def test_dedup_documents_keeps_first_and_records_sources():
+    documents = [
+        Document(page_content=f"{BOILERPLATE}\nHalaman 1 dari 5", metadata={"source": "a.pdf", "page": 0}),
+        Document(page_content=benefit_table("100"), metadata={"source": "a.pdf", "page": 1}),
+        Document(page_content=f"{BOILERPLATE}\nHalaman 4 dari 5", metadata={"source": "b.pdf", "page": 3}),
+    ]
+    result = dedup_documents(documents, threshold=0.85)
+
+    assert [doc.page_content for doc in result] == [documents[0].page_content, documents[1].page_content]
+    assert result[0].metadata["sources"] == [{"source": "a.pdf", "page": 0}, {"source": "b.pdf", "page": 3}]
+    assert "sources" not in result[1].metadata
+    assert "sources" not in documents[0].metadata  # metadata asli tidak diubah
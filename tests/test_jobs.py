@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from core.jobs import JobQueue, PRIORITY_HIGH, QueueFullError, parse_type_limits
+from core.result_store import ResultStore
+
+
+def make_queue(**kwargs) -> JobQueue:
+    return JobQueue(store=ResultStore("test_jobs", memory=None, backend=None), **kwargs)
+
+
+async def wait_finished(queue: JobQueue, job_ids, timeout: float = 5.0) -> dict:
+    jobs = {}
+    for job_id in job_ids:
+        job = await queue.wait_for_change(job_id, "queued", timeout=timeout, interval=0.01)
+        while job["status"] not in ("done", "error"):
+            job = await queue.wait_for_change(job_id, job["status"], timeout=timeout, interval=0.01)
+        jobs[job_id] = job
+    return jobs
+
+
+def test_parse_type_limits():
+    assert parse_type_limits("audio:1, ocr:2,llm:0,invalid") == {"audio": 1, "ocr": 2, "llm": 1}
+
+
+def test_type_limit_caps_concurrency():
+    async def scenario():
+        queue = make_queue(workers=4, type_limits={"audio": 1, "llm": 2})
+        await queue.start()
+        running = {"audio": 0, "llm": 0}
+        peak = {"audio": 0, "llm": 0}
+
+        async def job(job_type):
+            running[job_type] += 1
+            peak[job_type] = max(peak[job_type], running[job_type])
+            await asyncio.sleep(0.02)
+            running[job_type] -= 1
+            return job_type
+
+        ids = [queue.submit("audio", job, "audio") for _ in range(3)]
+        ids += [queue.submit("llm", job, "llm") for _ in range(4)]
+        jobs = await wait_finished(queue, ids)
+        await queue.stop()
+        return peak, jobs, queue.pending()
+
+    peak, jobs, pending = asyncio.run(scenario())
+    assert peak == {"audio": 1, "llm": 2}
+    assert all(job["status"] == "done" for job in jobs.values())
+    assert pending == 0
+
+
+def test_full_type_does_not_block_other_types():
+    async def scenario():
+        queue = make_queue(workers=2, type_limits={"audio": 1})
+        await queue.start()
+        release = asyncio.Event()
+
+        async def slow_audio():
+            await release.wait()
+            return "audio"
+
+        async def llm():
+            return "llm"
+
+        audio_ids = [queue.submit("audio", slow_audio) for _ in range(2)]
+        llm_id = queue.submit("llm", llm)
+        llm_job = (await wait_finished(queue, [llm_id]))[llm_id]
+        # Audio kedua ditunda (slot audio penuh) tanpa memakan worker yang dibutuhkan job llm
+        audio_statuses = sorted(queue.get(job_id)["status"] for job_id in audio_ids)
+        release.set()
+        audio_jobs = await wait_finished(queue, audio_ids)
+        await queue.stop()
+        return llm_job, audio_statuses, audio_jobs
+
+    llm_job, audio_statuses, audio_jobs = asyncio.run(scenario())
+    assert llm_job["result"] == "llm"
+    assert audio_statuses == ["queued", "running"]
+    assert [job["result"] for job in audio_jobs.values()] == ["audio", "audio"]
+
+
+def test_priority_order_and_errors():
+    async def scenario():
+        queue = make_queue(workers=1, type_limits={})
+        await queue.start()
+        order = []
+
+        async def job(name):
+            order.append(name)
+            if name == "boom":
+                raise ValueError("gagal")
+            return name
+
+        ids = [queue.submit("llm", job, "normal"), queue.submit("llm", job, "boom"),
+               queue.submit("llm", job, "high", priority=PRIORITY_HIGH)]
+        jobs = await wait_finished(queue, ids)
+        await queue.stop()
+        return order, [jobs[job_id] for job_id in ids]
+
+    order, jobs = asyncio.run(scenario())
+    assert order == ["high", "normal", "boom"]
+    assert jobs[0]["status"] == "done"
+    assert jobs[1]["status"] == "error" and jobs[1]["error"] == "gagal"
+
+
+def test_submit_requires_start_and_respects_max_pending():
+    queue = make_queue(workers=1, max_pending=2, type_limits={})
+    with pytest.raises(RuntimeError):
+        queue.submit("llm", lambda: None)
+
+    async def scenario():
+        await queue.start()
+        queue.submit("llm", asyncio.sleep, 0)
+        queue.submit("llm", asyncio.sleep, 0)
+        with pytest.raises(QueueFullError):
+            queue.submit("llm", asyncio.sleep, 0)
+        await queue.stop()
+
+    asyncio.run(scenario())
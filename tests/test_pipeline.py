@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from collections import Counter
+
+import pytest
+
+from core.pipeline import Pipeline, Stage, STATUS_CACHED, STATUS_DONE, STATUS_ERROR, STATUS_SKIPPED
+from core.result_store import ResultStore
+
+
+def make_pipeline(name: str, *stages: Stage, store: ResultStore = None) -> Pipeline:
+    pipeline = Pipeline(name, store=store or ResultStore(f"pipeline:{name}", backend=None))
+    for stage in stages:
+        pipeline.add(stage)
+    return pipeline
+
+
+def run(pipeline: Pipeline, run_id: str, inputs: dict) -> dict:
+    return asyncio.run(pipeline.run(run_id, inputs))
+
+
+def collect(pipeline: Pipeline, run_id: str, inputs: dict) -> list:
+    async def scenario():
+        return [event async for event in pipeline.stream(run_id, inputs)]
+    return asyncio.run(scenario())
+
+
+class Recorder:
+    """Stage func palsu yang mencatat jumlah pemanggilan dan urutan selesai."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.finished = []
+        self._lock = threading.Lock()
+
+    def stage(self, name, compute, **kwargs) -> Stage:
+        def func(ctx):
+            result = compute(ctx)
+            with self._lock:
+                self.calls[name] += 1
+                self.finished.append(name)
+            return result
+        return Stage(name, func, **kwargs)
+
+
+def build_claim(recorder: Recorder, name: str, ocr_version: str = "1", store: ResultStore = None) -> Pipeline:
+    return make_pipeline(
+        name,
+        recorder.stage("ocr", lambda ctx: ctx["slip"].upper(), inputs=("slip",), version=ocr_version),
+        recorder.stage("asr", lambda ctx: ctx["audio"].lower(), inputs=("audio",)),
+        recorder.stage("merge", lambda ctx: f"{ctx['ocr']}|{ctx['asr']}", deps=("ocr", "asr")),
+        recorder.stage("report", lambda ctx: f"laporan:{ctx['merge']}", deps=("merge",)),
+        store=store,
+    )
+
+
+def test_add_rejects_unknown_dependency():
+    pipeline = make_pipeline("test_unknown")
+    with pytest.raises(ValueError):
+        pipeline.add(Stage("report", lambda ctx: None, deps=("merge",)))
+
+
+def test_stage_order_and_results():
+    recorder = Recorder()
+    pipeline = build_claim(recorder, "test_order")
+    events = collect(pipeline, "claim-1", {"slip": "slip", "audio": "SUARA"})
+
+    assert recorder.finished.index("merge") > max(recorder.finished.index("ocr"), recorder.finished.index("asr"))
+    assert recorder.finished[-1] == "report"
+    order = [event["stage"] for event in events]
+    assert order.index("merge") > max(order.index("ocr"), order.index("asr"))
+    assert order[-1] == "report"
+    assert events[-1]["result"] == "laporan:SLIP|suara"
+    assert all(event["status"] == STATUS_DONE for event in events)
+
+
+def test_independent_stages_run_concurrently():
+    # Barrier hanya lolos jika kedua tahap berjalan bersamaan; eksekusi berurutan berakhir timeout
+    barrier = threading.Barrier(2, timeout=5)
+
+    def wait(ctx):
+        barrier.wait()
+        return True
+
+    pipeline = make_pipeline("test_parallel", Stage("a", wait), Stage("b", wait))
+    events = run(pipeline, "run", {})
+    assert {name: event["status"] for name, event in events.items()} == {"a": STATUS_DONE, "b": STATUS_DONE}
+
+
+def test_memoized_stages_rerun_only_when_inputs_change():
+    recorder = Recorder()
+    pipeline = build_claim(recorder, "test_memo")
+    inputs = {"slip": "slip", "audio": "SUARA"}
+    run(pipeline, "claim-1", inputs)
+
+    events = run(pipeline, "claim-1", inputs)
+    assert all(event["status"] == STATUS_CACHED for event in events.values())
+    assert events["report"]["result"] == "laporan:SLIP|suara"
+    assert sum(recorder.calls.values()) == 4
+
+    # Audio berubah: ocr tetap dari memo, asr dan tahap turunannya dijalankan ulang
+    events = run(pipeline, "claim-1", {"slip": "slip", "audio": "LAIN"})
+    assert {name: event["status"] for name, event in events.items()} == {
+        "ocr": STATUS_CACHED, "asr": STATUS_DONE, "merge": STATUS_DONE, "report": STATUS_DONE,
+    }
+    assert events["report"]["result"] == "laporan:SLIP|lain"
+
+    # Memo per run_id: klaim lain menjalankan semua tahap
+    run(pipeline, "claim-2", inputs)
+    assert recorder.calls == Counter({"ocr": 2, "asr": 3, "merge": 3, "report": 3})
+    assert set(pipeline.memo("claim-1")) == {"ocr", "asr", "merge", "report"}
+
+
+def test_stage_version_invalidates_memo():
+    recorder = Recorder()
+    store = ResultStore("pipeline:test_version", backend=None)
+    inputs = {"slip": "slip", "audio": "SUARA"}
+    run(build_claim(recorder, "test_version", store=store), "claim-1", inputs)
+    events = run(build_claim(recorder, "test_version", ocr_version="2", store=store), "claim-1", inputs)
+
+    assert events["ocr"]["status"] == STATUS_DONE
+    assert events["asr"]["status"] == STATUS_CACHED
+    assert events["report"]["status"] == STATUS_DONE
+
+
+def test_skipped_and_failed_stages():
+    recorder = Recorder()
+
+    def fail(ctx):
+        raise RuntimeError("OCR gagal")
+
+    pipeline = make_pipeline(
+        "test_errors",
+        Stage("ocr", fail),
+        recorder.stage("audio", lambda ctx: "teks", inputs=("audio",), when=lambda ctx: ctx["audio"] is not None),
+        recorder.stage("merge", lambda ctx: ctx["audio"], deps=("ocr", "audio")),
+        recorder.stage("summary", lambda ctx: ctx["audio"] or "tanpa audio", deps=("audio",)),
+    )
+    events = run(pipeline, "claim-1", {"audio": None})
+
+    assert events["ocr"] == {**events["ocr"], "status": STATUS_ERROR, "error": "OCR gagal"}
+    assert events["audio"]["status"] == STATUS_SKIPPED and events["audio"]["result"] is None
+    assert events["merge"]["status"] == STATUS_ERROR and events["merge"]["error"] == "dependensi gagal"
+    assert events["summary"]["result"] == "tanpa audio"
+    assert recorder.calls == Counter({"summary": 1})
+
+    # Tahap yang gagal tidak dimemo: run berikutnya mencobanya lagi
+    assert "ocr" not in pipeline.memo("claim-1")
+    assert run(pipeline, "claim-1", {"audio": None})["ocr"]["status"] == STATUS_ERROR
@@ -0,0 +1,157 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core import result_store
+from core.result_store import MemoryTier, ResultStore, SQLiteBackend
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Jam palsu untuk core.result_store; clock.now bisa dimajukan di dalam test."""
+    fake = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(result_store, "time", SimpleNamespace(time=lambda: fake.now))
+    return fake
+
+
+class FailingBackend:
+    def get(self, namespace, key):
+        raise OSError("backend down")
+
+    def set(self, namespace, key, raw, expires_at):
+        raise OSError("backend down")
+
+    def delete(self, namespace, key):
+        raise OSError("backend down")
+
+
+def test_memory_tier_evicts_least_recently_used(clock):
+    tier = MemoryTier(max_items=2, max_bytes=1024)
+    tier.set("a", b"1", clock.now + 60)
+    tier.set("b", b"2", clock.now + 60)
+    assert tier.get("a") == b"1"  # "a" jadi yang terbaru dipakai
+    tier.set("c", b"3", clock.now + 60)
+
+    assert tier.get("b") is None
+    assert tier.get("a") == b"1"
+    assert tier.get("c") == b"3"
+    assert tier.stats()["evictions"] == 1
+
+
+def test_memory_tier_byte_budget(clock):
+    tier = MemoryTier(max_items=10, max_bytes=10)
+    tier.set("a", b"x" * 4, clock.now + 60)
+    tier.set("b", b"x" * 4, clock.now + 60)
+    tier.set("c", b"x" * 4, clock.now + 60)
+
+    assert tier.get("a") is None
+    assert tier.stats()["bytes"] == 8
+    # Nilai yang lebih besar dari seluruh budget tidak disimpan sama sekali
+    tier.set("big", b"x" * 11, clock.now + 60)
+    assert tier.get("big") is None
+    assert tier.stats()["items"] == 2
+
+
+def test_memory_tier_overwrite_updates_byte_count(clock):
+    tier = MemoryTier(max_items=10, max_bytes=100)
+    tier.set("a", b"x" * 30, clock.now + 60)
+    tier.set("a", b"x" * 5, clock.now + 60)
+    assert tier.stats()["bytes"] == 5
+    tier.delete("a")
+    assert tier.stats()["bytes"] == 0
+
+
+def test_memory_tier_ttl(clock):
+    tier = MemoryTier(max_items=10, max_bytes=1024)
+    tier.set("a", b"1", clock.now + 10)
+    tier.set("b", b"2", clock.now + 100)
+    clock.now += 50
+
+    assert tier.get("a") is None
+    assert tier.get("b") == b"2"
+    # Item kedaluwarsa juga dibuang saat set berikutnya, bukan hanya saat dibaca
+    tier.set("c", b"3", clock.now + 10)
+    clock.now += 60
+    tier.set("d", b"4", clock.now + 10)
+    assert tier.stats()["items"] == 1
+
+
+def test_store_roundtrip_json_and_bytes(clock):
+    store = ResultStore("test_roundtrip", backend=None)
+    store.set("json", {"nama": "Budi", "skor": [1, 2.5]})
+    store.set("raw", b"\x00\x01pdf")
+
+    assert store.get("json") == {"nama": "Budi", "skor": [1, 2.5]}
+    assert store.get("raw") == b"\x00\x01pdf"
+    assert store.get("missing", "default") == "default"
+    assert "json" in store
+    store.delete("json")
+    assert "json" not in store
+
+
+def test_store_ttl_expiry(clock):
+    store = ResultStore("test_ttl", ttl=30, backend=None)
+    store.set("default_ttl", 1)
+    store.set("long_ttl", 2, ttl=300)
+    clock.now += 60
+
+    assert store.get("default_ttl") is None
+    assert store.get("long_ttl") == 2
+
+
+def test_store_memory_tier_filled_from_backend(clock, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.db"))
+    writer = ResultStore("test_fill", backend=backend)
+    reader = ResultStore("test_fill", backend=backend)
+    writer.set("k", {"v": 1})
+
+    assert reader.get("k") == {"v": 1}
+    assert reader.memory.stats()["items"] == 1
+    # Namespace berbeda tidak saling terlihat
+    assert ResultStore("test_other", backend=backend).get("k") is None
+
+
+def test_store_backend_only_sees_writes_from_other_workers(clock, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.db"))
+    worker_a = ResultStore("test_jobs", memory=None, backend=backend)
+    worker_b = ResultStore("test_jobs", memory=None, backend=backend)
+    assert worker_a.memory is None
+
+    worker_a.set("job", {"status": "queued"})
+    assert worker_b.get("job") == {"status": "queued"}
+    worker_a.set("job", {"status": "done"})
+    # Tanpa tier memori tidak ada salinan basi di worker_b
+    assert worker_b.get("job") == {"status": "done"}
+
+    worker_b.delete("job")
+    assert worker_a.get("job") is None
+    assert worker_a.stats()["memory"] is None
+
+
+def test_store_backend_only_ttl(clock, tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "results.db"))
+    store = ResultStore("test_jobs_ttl", ttl=30, memory=None, backend=backend)
+    store.set("job", {"status": "done"})
+    clock.now += 60
+
+    assert store.get("job") is None
+    assert backend.purge_expired() == 1
+
+
+def test_store_memory_none_without_backend_keeps_memory_tier(clock):
+    store = ResultStore("test_no_backend", memory=None, backend=None)
+    assert isinstance(store.memory, MemoryTier)
+    store.set("k", "v")
+    assert store.get("k") == "v"
+
+
+def test_store_tolerates_backend_errors(clock):
+    store = ResultStore("test_failing", backend=FailingBackend())
+    store.set("k", "v")
+    assert store.get("k") == "v"  # tetap tersimpan di tier memori
+    store.delete("k")
+    assert store.get("k", "default") == "default"
+
+    backend_only = ResultStore("test_failing_only", memory=None, backend=FailingBackend())
+    backend_only.set("k", "v")
+    assert backend_only.get("k", "default") == "default"